@@ -0,0 +1,153 @@
+import typing
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from apps.alerts.constants import AlertGroupState
+
+STATE_COUNTERS_TIMEOUT_MARGIN = 60  # seconds
+
+# {integration_id: {state: alert groups count}}
+StateCountersDict = typing.Dict[int, typing.Dict[str, int]]
+
+
+def get_alert_group_stats_version_key(organization_id: int) -> str:
+    return f"alert_group_stats_version_{organization_id}"
+
+
+def get_alert_group_stats_key(organization_id: int, version: str, filters_key: str) -> str:
+    return f"alert_group_stats_{organization_id}_{version}_{filters_key}"
+
+
+def get_alert_group_state_counters_version_key(organization_id: int) -> str:
+    return f"alert_group_state_counters_version_{organization_id}"
+
+
+def get_alert_group_state_counter_key(organization_id: int, version: str, integration_id: int, state: str) -> str:
+    return f"alert_group_state_counter_{organization_id}_{version}_{integration_id}_{state}"
+
+
+def _get_stats_version(organization_id: int) -> str:
+    version_key = get_alert_group_stats_version_key(organization_id)
+    version = cache.get(version_key)
+    if not version:
+        version = uuid.uuid4().hex
+        if not cache.add(version_key, version, timeout=settings.ALERT_GROUP_STATS_CACHE_TIMEOUT):
+            # another process has set the version in the meantime
+            version = cache.get(version_key, version)
+    return version
+
+
+def get_cached_alert_groups_count(
+    organization_id: int, filters_key: str, count_alert_groups: typing.Callable[[], int]
+) -> int:
+    """
+    Return alert groups count for the normalized filters of the organization, calling count_alert_groups on cache miss.
+    Counts are cached until any alert group of the organization changes its state, see update_alert_group_stats_cache.
+    """
+    # get the version before counting, so a count racing with a state change is stored under the outdated version
+    version = _get_stats_version(organization_id)
+    stats_key = get_alert_group_stats_key(organization_id, version, filters_key)
+    count = cache.get(stats_key)
+    if count is None:
+        count = count_alert_groups()
+        cache.set(stats_key, count, timeout=settings.ALERT_GROUP_STATS_CACHE_TIMEOUT)
+    return count
+
+
+def _calculate_state_counters(organization_id: int) -> StateCountersDict:
+    from apps.alerts.models import AlertGroup
+
+    states = {
+        AlertGroupState.FIRING.value: AlertGroup.get_new_state_filter(),
+        AlertGroupState.SILENCED.value: AlertGroup.get_silenced_state_filter(),
+        AlertGroupState.ACKNOWLEDGED.value: AlertGroup.get_acknowledged_state_filter(),
+        AlertGroupState.RESOLVED.value: AlertGroup.get_resolved_state_filter(),
+    }
+    alert_groups_stats = (
+        # maintenance incidents are not counted, as in metrics updated on alert group creation
+        AlertGroup.objects.filter(channel__organization_id=organization_id, maintenance_uuid__isnull=True)
+        .values("channel_id")
+        .annotate(**{state: Count("pk", filter=alert_group_filter) for state, alert_group_filter in states.items()})
+    )
+    return {stats["channel_id"]: {state: stats[state] for state in states} for stats in alert_groups_stats}
+
+
+def _get_state_counters_version(organization_id: int) -> str:
+    """
+    Return the version of the organization counters by state, calculating the counters if they are not cached.
+    Counters are stored in a key per (integration, state) under a new version once in
+    ALERT_GROUP_STATE_COUNTERS_CACHE_TIMEOUT, so they are reconciled with the database.
+    """
+    version_key = get_alert_group_state_counters_version_key(organization_id)
+    version = cache.get(version_key)
+    if version:
+        return version
+
+    version = uuid.uuid4().hex
+    timeout = settings.ALERT_GROUP_STATE_COUNTERS_CACHE_TIMEOUT
+    cache.set_many(
+        {
+            get_alert_group_state_counter_key(organization_id, version, integration_id, state): counter
+            for integration_id, integration_counters in _calculate_state_counters(organization_id).items()
+            for state, counter in integration_counters.items()
+        },
+        # counters must outlive the version key, so they are not read or incremented once expired
+        timeout=timeout + STATE_COUNTERS_TIMEOUT_MARGIN,
+    )
+    if not cache.add(version_key, version, timeout=timeout):
+        # another process has calculated the counters in the meantime
+        version = cache.get(version_key, version)
+    return version
+
+
+def get_alert_groups_count_by_states(
+    organization_id: int, integration_ids: typing.Iterable[int], states: typing.Iterable[AlertGroupState]
+) -> int:
+    """
+    Return the number of alert groups in the given states for the given integrations of the organization.
+    Counts by state are calculated with a single query and then kept up to date by update_alert_group_stats_cache,
+    until they are recalculated once in ALERT_GROUP_STATE_COUNTERS_CACHE_TIMEOUT to reconcile them with the database.
+    """
+    version = _get_state_counters_version(organization_id)
+    counter_keys = [
+        get_alert_group_state_counter_key(organization_id, version, integration_id, state.value)
+        for integration_id in integration_ids
+        for state in states
+    ]
+    # integrations without alert groups have no counters, counters could go below zero if updates are lost
+    return sum(max(counter, 0) for counter in cache.get_many(counter_keys).values())
+
+
+def update_alert_group_stats_cache(organization_id: int, states_diff: dict) -> None:
+    """
+    Invalidate cached alert groups counts of the organization and apply states diff to its counts by state.
+    states_diff has the same format as MetricsCacheManager.update_integration_states_diff returns.
+    Counters are updated with atomic increments, so concurrent updates are not lost.
+    """
+    cache.delete(get_alert_group_stats_version_key(organization_id))
+
+    version = cache.get(get_alert_group_state_counters_version_key(organization_id))
+    if not version:
+        return
+
+    for integration_id, integration_states_diff in states_diff.items():
+        counters_diff = defaultdict(int)
+        for previous_state, counter in integration_states_diff["previous_states"].items():
+            counters_diff[previous_state] -= counter
+        for new_state, counter in integration_states_diff["new_states"].items():
+            counters_diff[new_state] += counter
+        for state, delta in counters_diff.items():
+            if not delta:
+                continue
+            counter_key = get_alert_group_state_counter_key(organization_id, version, int(integration_id), state)
+            try:
+                cache.incr(counter_key, delta)
+            except ValueError:
+                # no alert groups in this state when counters were calculated
+                timeout = settings.ALERT_GROUP_STATE_COUNTERS_CACHE_TIMEOUT + STATE_COUNTERS_TIMEOUT_MARGIN
+                if not cache.add(counter_key, delta, timeout=timeout):
+                    cache.incr(counter_key, delta)
@@ -216,6 +216,7 @@ class EscalationPolicySnapshot:
 
     def _escalation_step_notify_multiple_users(self, alert_group: "AlertGroup", reason: str) -> None:
         tasks = []
+        log_records = []
         escalation_policy = self.escalation_policy
         if len(self.notify_to_users_queue) > 0:
             log_record = AlertGroupLogRecord(
@@ -241,14 +242,16 @@ class EscalationPolicySnapshot:
 
                 tasks.append(notify_task)
 
-                AlertGroupLogRecord(
-                    type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED,
-                    author=user,
-                    alert_group=alert_group,
-                    reason=reason,
-                    escalation_policy=escalation_policy,
-                    escalation_policy_step=self.step,
-                ).save()
+                log_records.append(
+                    AlertGroupLogRecord(
+                        type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED,
+                        author=user,
+                        alert_group=alert_group,
+                        reason=reason,
+                        escalation_policy=escalation_policy,
+                        escalation_policy_step=self.step,
+                    )
+                )
         else:
             log_record = AlertGroupLogRecord(
                 type=AlertGroupLogRecord.TYPE_ESCALATION_FAILED,
@@ -257,11 +260,13 @@ class EscalationPolicySnapshot:
                 escalation_error_code=AlertGroupLogRecord.ERROR_ESCALATION_NOTIFY_MULTIPLE_NO_RECIPIENTS,
                 escalation_policy_step=self.step,
             )
-        log_record.save()
+        log_records.append(log_record)
+        AlertGroupLogRecord.objects.bulk_create_and_notify(log_records)
         self._execute_tasks(tasks)
 
     def _escalation_step_notify_on_call_schedule(self, alert_group: "AlertGroup", reason: str) -> None:
         tasks = []
+        log_records = []
         escalation_policy = self.escalation_policy
         on_call_schedule = self.notify_schedule
         self.notify_to_users_queue = []
@@ -322,15 +327,18 @@ class EscalationPolicySnapshot:
 
                     tasks.append(notify_task)
 
-                    AlertGroupLogRecord(
-                        type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED,
-                        author=notify_to_user,
-                        alert_group=alert_group,
-                        reason=reason,
-                        escalation_policy=escalation_policy,
-                        escalation_policy_step=self.step,
-                    ).save()
-        log_record.save()
+                    log_records.append(
+                        AlertGroupLogRecord(
+                            type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED,
+                            author=notify_to_user,
+                            alert_group=alert_group,
+                            reason=reason,
+                            escalation_policy=escalation_policy,
+                            escalation_policy_step=self.step,
+                        )
+                    )
+        log_records.append(log_record)
+        AlertGroupLogRecord.objects.bulk_create_and_notify(log_records)
         self._execute_tasks(tasks)
 
     def _escalation_step_notify_user_group(self, alert_group: "AlertGroup", reason: str) -> None:
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.20 on 2026-10-17 09:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0033_alertgrouplogrecord_action_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=100)),
+                ('alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='alerts.alert')),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='alerts.alertreceivechannel')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='alertsearchtoken',
+            index=models.Index(fields=['token', 'channel'], name='alerts_aler_token_46f02d_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='alertsearchtoken',
+            unique_together={('alert', 'token')},
+        ),
+    ]
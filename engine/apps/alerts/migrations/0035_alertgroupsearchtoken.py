@@ -0,0 +1,31 @@
+# Generated by Django 3.2.20 on 2026-10-17 09:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0034_alertsearchtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertGroupSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=100)),
+                ('alert_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='alerts.alertgroup')),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='alerts.alertreceivechannel')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='alertgroupsearchtoken',
+            index=models.Index(fields=['token', 'channel'], name='alerts_aler_token_391243_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='alertgroupsearchtoken',
+            unique_together={('alert_group', 'token')},
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.20 on 2026-10-17 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0035_alertgroupsearchtoken'),
+    ]
+
+    # Nullable columns without a foreign key constraint or an index, so they are added to alert_group without
+    # rebuilding the table. Existing alert groups get alerts_count=None and are counted from their alerts when listing
+    # alert groups, run the backfill_alert_group_alerts_info task after the deploy to populate them.
+    operations = [
+        # existing alert groups get alerts_count=None (not counted), new alert groups start at 0
+        migrations.AddField(
+            model_name='alertgroup',
+            name='alerts_count',
+            field=models.PositiveIntegerField(default=None, null=True),
+        ),
+        migrations.AlterField(
+            model_name='alertgroup',
+            name='alerts_count',
+            field=models.PositiveIntegerField(default=0, null=True),
+        ),
+        migrations.AddField(
+            model_name='alertgroup',
+            name='last_alert_id',
+            field=models.BigIntegerField(default=None, null=True),
+        ),
+    ]
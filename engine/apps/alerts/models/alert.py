@@ -7,11 +7,13 @@ from uuid import uuid4
 from django.conf import settings
 from django.core.validators import MinLengthValidator
 from django.db import models, transaction
-from django.db.models import JSONField
+from django.db.models import F, JSONField, Value
+from django.db.models.functions import Coalesce, Greatest
 
 from apps.alerts import tasks
 from apps.alerts.constants import TASK_DELAY_SECONDS
 from apps.alerts.incident_appearance.templaters import TemplateLoader
+from apps.alerts.models.alert_search_token import AlertSearchToken
 from common.jinja_templater import apply_jinja_template
 from common.jinja_templater.apply_jinja_template import JinjaTemplateError, JinjaTemplateWarning
 from common.public_primary_keys import generate_public_primary_key, increase_public_primary_key_length
@@ -42,6 +44,7 @@ def generate_public_primary_key_for_alert():
 class Alert(models.Model):
     group: typing.Optional["AlertGroup"]
     resolved_alert_groups: "RelatedManager['AlertGroup']"
+    search_tokens: "RelatedManager['AlertSearchToken']"
 
     public_primary_key = models.CharField(
         max_length=20,
@@ -69,6 +72,24 @@ class Alert(models.Model):
         "alerts.AlertGroup", on_delete=models.CASCADE, null=True, default=None, related_name="alerts"
     )
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            if settings.FEATURE_ALERT_SEARCH_TOKENS_ENABLED:
+                AlertSearchToken.create_for_alerts([self])
+            if self.group_id is not None:
+                self._update_group_alerts_info()
+
+    def _update_group_alerts_info(self) -> None:
+        """Increment alerts_count and set last_alert_id of the group in a single atomic UPDATE."""
+        from apps.alerts.models import AlertGroup
+
+        AlertGroup.objects.filter(pk=self.group_id).update(
+            alerts_count=F("alerts_count") + 1,
+            last_alert_id=Greatest(Coalesce(F("last_alert_id"), Value(0)), Value(self.pk)),
+        )
+
     def get_integration_optimization_hash(self):
         """
         Should be overloaded in child classes.
@@ -89,22 +110,30 @@ class Alert(models.Model):
         is_demo=False,
         channel_filter=None,
         force_route_id=None,
+        group_data=None,
+        open_alert_group=None,
     ):
         """
         Creates an alert and a group if needed.
+        group_data and open_alert_group can be provided by callers which render and fetch them in bulk,
+        open_alert_group must be the group open for grouping for the given channel filter and group_data.
         """
         # This import is here to avoid circular imports
         from apps.alerts.models import AlertGroup, AlertGroupLogRecord, AlertReceiveChannel, ChannelFilter
 
-        group_data = Alert.render_group_data(alert_receive_channel, raw_request_data, is_demo)
+        if group_data is None:
+            group_data = Alert.render_group_data(alert_receive_channel, raw_request_data, is_demo)
         if channel_filter is None:
             channel_filter = ChannelFilter.select_filter(alert_receive_channel, raw_request_data, force_route_id)
 
-        group, group_created = AlertGroup.objects.get_or_create_grouping(
-            channel=alert_receive_channel,
-            channel_filter=channel_filter,
-            group_data=group_data,
-        )
+        if open_alert_group is not None:
+            group, group_created = open_alert_group, False
+        else:
+            group, group_created = AlertGroup.objects.get_or_create_grouping(
+                channel=alert_receive_channel,
+                channel_filter=channel_filter,
+                group_data=group_data,
+            )
 
         if group_created:
             group.log_records.create(type=AlertGroupLogRecord.TYPE_REGISTERED)
@@ -189,6 +218,7 @@ class Alert(models.Model):
                 "link_to_upstream_details",
             ]
         )
+        self.search_tokens.all().delete()
 
     @classmethod
     def render_group_data(cls, alert_receive_channel, raw_request_data, is_demo=False):
@@ -31,6 +31,7 @@ from common.public_primary_keys import generate_public_primary_key, increase_pub
 from common.utils import clean_markup, str_or_backup
 
 from .alert_group_counter import AlertGroupCounter
+from .alert_group_search_token import AlertGroupSearchToken
 
 if typing.TYPE_CHECKING:
     from django.db.models.manager import RelatedManager
@@ -48,6 +49,9 @@ if typing.TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# AlertGroup fields updated when alerts are created
+ALERTS_INFO_FIELDS = {"alerts_count", "last_alert_id"}
+
 
 def generate_public_primary_key_for_alert_group():
     prefix = "I"
@@ -96,8 +100,8 @@ class AlertGroupQuerySet(models.QuerySet):
         """
         This method is similar to default Django QuerySet.get_or_create(), please see the original get_or_create method.
         The difference is that this method is trying to get an object using multiple queries with different filters.
-        Also, "create" is invoked without transaction.atomic to reduce number of ConcurrentUpdateError's which can be
-        raised in AlertGroupQuerySet.create() due to optimistic locking of AlertGroupCounter model.
+        Also, "create" is invoked without transaction.atomic, so the AlertGroupCounter row locked in
+        AlertGroupQuerySet.create() is released right after inside_organization_number is allocated.
         """
         search_params = {
             "channel": channel,
@@ -165,6 +169,7 @@ class AlertGroup(AlertGroupSlackRenderingMixin, EscalationSnapshotMixin, models.
     resolution_note_slack_messages: "RelatedManager['ResolutionNoteSlackMessage']"
     resolved_by_alert: typing.Optional["Alert"]
     root_alert_group: typing.Optional["AlertGroup"]
+    search_tokens: "RelatedManager['AlertGroupSearchToken']"
     slack_log_message: typing.Optional["SlackMessage"]
     slack_messages: "RelatedManager['SlackMessage']"
     users: "RelatedManager['User']"
@@ -257,6 +262,12 @@ class AlertGroup(AlertGroupSlackRenderingMixin, EscalationSnapshotMixin, models.
         related_name="resolved_alert_groups",
     )
 
+    # number of alerts and ID of the latest alert of the group, updated with an atomic UPDATE when an alert is created
+    # (see Alert.save), alerts_count is None for alert groups created before these fields were added.
+    # last_alert_id is a plain column, not a foreign key, so it's added to alert_group without a constraint and an index
+    alerts_count = models.PositiveIntegerField(null=True, default=0)
+    last_alert_id = models.BigIntegerField(null=True, default=None)
+
     resolved_at = models.DateTimeField(blank=True, null=True)
     acknowledged = models.BooleanField(default=False)
     acknowledged_on_source = models.BooleanField(default=False)
@@ -308,6 +319,24 @@ class AlertGroup(AlertGroupSlackRenderingMixin, EscalationSnapshotMixin, models.
 
     response_time = models.DurationField(null=True, default=None)
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        if not adding and update_fields is None:
+            # don't overwrite counters updated by concurrent alerts with values loaded with the instance
+            deferred_fields = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ALERTS_INFO_FIELDS
+                and field.attname not in deferred_fields
+            ]
+        super().save(*args, **kwargs)
+        # keep search tokens in sync with the web title
+        if adding or (update_fields is not None and "web_title_cache" in update_fields):
+            AlertGroupSearchToken.update_for_alert_groups([self], created=adding)
+
     @property
     def is_silenced_forever(self):
         return self.silenced and self.silenced_until is None
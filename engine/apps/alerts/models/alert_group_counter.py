@@ -1,27 +1,66 @@
-from django.db import models
+import sqlite3
 
-
-class ConcurrentUpdateError(Exception):
-    pass
+from django.db import connections, models, router, transaction
+from django.db.models import F
 
 
 class AlertGroupCounterQuerySet(models.QuerySet):
     def get_value(self, organization):
-        counter, _ = self.get_or_create(organization=organization)
+        """
+        Atomically increment the organization's counter and return its previous value.
+        Concurrent callers never conflict, each of them gets a unique value without retries.
+        """
+        value = self._increment(organization)
+        if value is None:
+            # first alert group in the organization, create the counter and increment it
+            self.get_or_create(organization=organization)
+            value = self._increment(organization)
+        return value - 1
+
+    def _increment(self, organization):
+        """
+        Increment the counter with a single UPDATE statement and return the new value, or None if there's no counter.
+        The row is locked only for the duration of the statement (or a two statements transaction as a fallback).
+        """
+        db = router.db_for_write(self.model)
+        connection = connections[db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+
+        if connection.vendor == "mysql":
+            with connection.cursor() as cursor:
+                # LAST_INSERT_ID(expr) stores the value on the connection, so it can be read without another lock
+                cursor.execute(
+                    f"UPDATE {table} SET value = LAST_INSERT_ID(value + 1) WHERE organization_id = %s",
+                    [organization.pk],
+                )
+                if cursor.rowcount == 0:
+                    return None
+                cursor.execute("SELECT LAST_INSERT_ID()")
+                return cursor.fetchone()[0]
 
-        num_updated_rows = self.filter(organization=organization, value=counter.value).update(value=counter.value + 1)
-        if num_updated_rows == 0:
-            raise ConcurrentUpdateError()
+        if connection.vendor == "postgresql" or (
+            connection.vendor == "sqlite" and sqlite3.sqlite_version_info >= (3, 35, 0)
+        ):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET value = value + 1 WHERE organization_id = %s RETURNING value",
+                    [organization.pk],
+                )
+                row = cursor.fetchone()
+                return row[0] if row is not None else None
 
-        return counter.value
+        # UPDATE ... RETURNING is not available, the row lock taken by UPDATE is kept until the value is read
+        with transaction.atomic(using=db):
+            if self.using(db).filter(organization=organization).update(value=F("value") + 1) == 0:
+                return None
+            return self.using(db).filter(organization=organization).values_list("value", flat=True).get()
 
 
 class AlertGroupCounter(models.Model):
     """
     This model is used to assign unique, increasing inside_organization_number's for alert groups.
-    It uses optimistic locking to get values and raises ConcurrentUpdateError exception in case of concurrent updates.
-    This is used on alert group creation in order to not block Celery workers with select_for_update and give space
-    to other tasks to run in case of high load on alert group creation.
+    Values are allocated with an atomic UPDATE of the counter row, so concurrent alert group creation never has to
+    retry, and the row lock is held only for a single statement, not for the whole alert group creation.
     """
 
     objects = models.Manager.from_queryset(AlertGroupCounterQuerySet)()
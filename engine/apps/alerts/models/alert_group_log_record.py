@@ -23,6 +23,25 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
 
+class AlertGroupLogRecordQuerySet(models.QuerySet):
+    def bulk_create_and_notify(self, log_records: typing.List["AlertGroupLogRecord"]) -> None:
+        """
+        Insert log records with a single query, eg. one record per notified user during an escalation step.
+        bulk_create doesn't send post_save, so the log report update listen_for_alertgrouplogrecord would schedule
+        for every record is scheduled once per alert group instead.
+        """
+        if not log_records:
+            return
+        self.bulk_create(log_records)
+        alert_group_pks = {
+            log_record.alert_group_id
+            for log_record in log_records
+            if log_record.type != AlertGroupLogRecord.TYPE_DELETED
+        }
+        for alert_group_pk in alert_group_pks:
+            send_update_log_report_signal(alert_group_pk)
+
+
 class AlertGroupLogRecord(models.Model):
     alert_group: "AlertGroup"
     author: typing.Optional["User"]
@@ -32,6 +51,8 @@ class AlertGroupLogRecord(models.Model):
     invitation: typing.Optional["Invitation"]
     root_alert_group: typing.Optional["AlertGroup"]
 
+    objects = AlertGroupLogRecordQuerySet.as_manager()
+
     (
         TYPE_ACK,
         TYPE_UN_ACK,
@@ -588,6 +609,10 @@ class AlertGroupLogRecord(models.Model):
         return step_specific_info
 
 
+def send_update_log_report_signal(alert_group_pk: int) -> None:
+    tasks.send_update_log_report_signal.apply_async(kwargs={"alert_group_pk": alert_group_pk}, countdown=8)
+
+
 @receiver(post_save, sender=AlertGroupLogRecord)
 def listen_for_alertgrouplogrecord(sender, instance, created, *args, **kwargs):
     if instance.type != AlertGroupLogRecord.TYPE_DELETED:
@@ -596,4 +621,4 @@ def listen_for_alertgrouplogrecord(sender, instance, created, *args, **kwargs):
             f"send_update_log_report_signal for alert_group {alert_group_pk}, "
             f"alert group event: {instance.get_type_display()}"
         )
-        tasks.send_update_log_report_signal.apply_async(kwargs={"alert_group_pk": alert_group_pk}, countdown=8)
+        send_update_log_report_signal(alert_group_pk)
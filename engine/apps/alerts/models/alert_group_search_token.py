@@ -0,0 +1,46 @@
+import typing
+
+from django.db import models
+
+from apps.alerts.models.alert_search_token import SEARCH_TOKEN_MAX_LENGTH, get_search_tokens
+
+if typing.TYPE_CHECKING:
+    from apps.alerts.models import AlertGroup
+
+
+class AlertGroupSearchToken(models.Model):
+    """
+    Words of an alert group web title, its public primary key and its number inside the organization,
+    used to search alert groups in the web UI with an index lookup instead of LIKE over web_title_cache.
+    Rows are created with the alert group and updated when its web_title_cache is updated.
+    """
+
+    alert_group = models.ForeignKey("alerts.AlertGroup", on_delete=models.CASCADE, related_name="search_tokens")
+    # denormalized from alert_group.channel, to look up tokens of an organization without joining alert groups
+    channel = models.ForeignKey("alerts.AlertReceiveChannel", on_delete=models.CASCADE, related_name="+")
+    token = models.CharField(max_length=SEARCH_TOKEN_MAX_LENGTH)
+
+    class Meta:
+        unique_together = ("alert_group", "token")
+        indexes = [
+            models.Index(fields=["token", "channel"]),
+        ]
+
+    @staticmethod
+    def get_tokens(alert_group: "AlertGroup") -> typing.List[str]:
+        return get_search_tokens(
+            f"{alert_group.public_primary_key} {alert_group.inside_organization_number} "
+            f"{alert_group.web_title_cache or ''}"
+        )
+
+    @classmethod
+    def update_for_alert_groups(cls, alert_groups: typing.Iterable["AlertGroup"], created: bool = False) -> None:
+        alert_groups = list(alert_groups)
+        if not created:
+            cls.objects.filter(alert_group__in=alert_groups).delete()
+        search_tokens = [
+            cls(alert_group=alert_group, channel_id=alert_group.channel_id, token=token)
+            for alert_group in alert_groups
+            for token in cls.get_tokens(alert_group)
+        ]
+        cls.objects.bulk_create(search_tokens, batch_size=5000, ignore_conflicts=True)
@@ -35,7 +35,7 @@ from apps.slack.utils import post_message_to_channel
 from common.api_helpers.utils import create_engine_url
 from common.exceptions import TeamCanNotBeChangedError, UnableToSendDemoAlert
 from common.insight_log import EntityEvent, write_resource_insight_log
-from common.jinja_templater import jinja_template_env
+from common.jinja_templater import compiled_template_cache, jinja_template_env
 from common.public_primary_keys import generate_public_primary_key, increase_public_primary_key_length
 
 if typing.TYPE_CHECKING:
@@ -646,6 +646,14 @@ def listen_for_alertreceivechannel_model_save(
     from apps.alerts.models import ChannelFilter
     from apps.heartbeat.models import IntegrationHeartBeat
 
+    update_fields = kwargs.get("update_fields")
+    if not created and (
+        update_fields is None
+        or any(field.endswith("_template") or field == "messaging_backends_templates" for field in update_fields)
+    ):
+        # drop compiled templates of this process, so replaced templates don't occupy the cache
+        compiled_template_cache.clear()
+
     if created:
         write_resource_insight_log(instance=instance, author=instance.author, event=EntityEvent.CREATED)
         default_filter = ChannelFilter(alert_receive_channel=instance, filtering_term=None, is_default=True)
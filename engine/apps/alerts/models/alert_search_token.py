@@ -0,0 +1,73 @@
+import re
+import typing
+
+from django.db import models
+
+if typing.TYPE_CHECKING:
+    from apps.alerts.models import Alert
+
+SEARCH_TOKEN_RE = re.compile(r"\w+")
+SEARCH_TOKEN_MAX_LENGTH = 100
+# words found in almost every payload (URLs, stringified booleans), they would match any alert
+SEARCH_TOKEN_STOP_WORDS = frozenset(("http", "https", "www", "com", "true", "false", "null", "none"))
+# cap the number of rows written per alert, so huge payloads don't slow down alert ingestion
+MAX_SEARCH_TOKENS_PER_ALERT = 200
+
+
+def get_search_tokens(value: typing.Any, limit: int = MAX_SEARCH_TOKENS_PER_ALERT) -> typing.List[str]:
+    """
+    Return unique lowercase words of the scalar values of a JSON value, in order of appearance.
+    Keys are not indexed, words too long to be stored and stop words are skipped.
+    """
+    tokens: typing.Dict[str, None] = {}
+
+    def _add_text(text: str) -> None:
+        for token in SEARCH_TOKEN_RE.findall(text.lower()):
+            if len(tokens) >= limit:
+                return
+            if len(token) <= SEARCH_TOKEN_MAX_LENGTH and token not in SEARCH_TOKEN_STOP_WORDS:
+                tokens[token] = None
+
+    stack = [value]
+    while stack and len(tokens) < limit:
+        item = stack.pop()
+        if isinstance(item, dict):
+            stack.extend(reversed(item.values()))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, str):
+            _add_text(item)
+        elif isinstance(item, (int, float)) and not isinstance(item, bool):
+            _add_text(str(item))
+
+    return list(tokens)
+
+
+class AlertSearchToken(models.Model):
+    """
+    Words of an alert payload, used to search alerts by payload with an index lookup
+    instead of casting raw_request_data of every alert to text.
+    Rows are created when an alert is saved for the first time if FEATURE_ALERT_SEARCH_TOKENS_ENABLED is set
+    and deleted when the alert is wiped.
+    """
+
+    alert = models.ForeignKey("alerts.Alert", on_delete=models.CASCADE, related_name="search_tokens")
+    # denormalized from alert.group.channel, to look up tokens of an organization without joining alerts
+    channel = models.ForeignKey("alerts.AlertReceiveChannel", on_delete=models.CASCADE, related_name="+")
+    token = models.CharField(max_length=SEARCH_TOKEN_MAX_LENGTH)
+
+    class Meta:
+        unique_together = ("alert", "token")
+        indexes = [
+            models.Index(fields=["token", "channel"]),
+        ]
+
+    @classmethod
+    def create_for_alerts(cls, alerts: typing.Iterable["Alert"]) -> None:
+        search_tokens = [
+            cls(alert=alert, channel_id=alert.group.channel_id, token=token)
+            for alert in alerts
+            if alert.group is not None
+            for token in get_search_tokens(alert.raw_request_data)
+        ]
+        cls.objects.bulk_create(search_tokens, batch_size=5000, ignore_conflicts=True)
@@ -6,8 +6,11 @@ import typing
 from django.conf import settings
 from django.core.validators import MinLengthValidator
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
-from common.jinja_templater import apply_jinja_template
+from apps.alerts.routing import bump_routing_table_version, routing_tables_cache
+from common.jinja_templater import apply_jinja_template, compiled_template_cache
 from common.jinja_templater.apply_jinja_template import JinjaTemplateError, JinjaTemplateWarning
 from common.ordered_model.ordered_model import OrderedModel
 from common.public_primary_keys import generate_public_primary_key, increase_public_primary_key_length
@@ -99,6 +102,19 @@ class ChannelFilter(OrderedModel):
     def __str__(self):
         return f"{self.pk}: {self.filtering_term or 'default'}"
 
+    # ordering changes are made with queryset updates which don't send post_save, invalidate routing tables explicitly
+    def to(self, order: int) -> None:
+        super().to(order)
+        bump_routing_table_version(self.alert_receive_channel_id)
+
+    def to_index(self, index: int) -> None:
+        super().to_index(index)
+        bump_routing_table_version(self.alert_receive_channel_id)
+
+    def swap(self, order: int) -> None:
+        super().swap(order)
+        bump_routing_table_version(self.alert_receive_channel_id)
+
     @classmethod
     def select_filter(cls, alert_receive_channel, raw_request_data, force_route_id=None):
         # Try to find force route first if force_route_id is given
@@ -124,14 +140,18 @@ class ChannelFilter(OrderedModel):
                 )
                 pass
 
-        filters = cls.objects.filter(alert_receive_channel=alert_receive_channel)
-
-        satisfied_filter = None
-        for _filter in filters:
-            if satisfied_filter is None and _filter.is_satisfying(raw_request_data):
-                satisfied_filter = _filter
+        routing_table = routing_tables_cache.get(alert_receive_channel.pk)
+        satisfied_filter_id = routing_table.select_route_id(raw_request_data)
+        if satisfied_filter_id is None:
+            return None
 
-        return satisfied_filter
+        try:
+            return cls.objects.get(alert_receive_channel=alert_receive_channel.pk, pk=satisfied_filter_id)
+        except cls.DoesNotExist:
+            # routing table is outdated (e.g. the route was just deleted), rebuild it and select again
+            routing_tables_cache.discard(alert_receive_channel.pk)
+            satisfied_filter_id = routing_tables_cache.get(alert_receive_channel.pk).select_route_id(raw_request_data)
+            return cls.objects.filter(alert_receive_channel=alert_receive_channel.pk, pk=satisfied_filter_id).first()
 
     def is_satisfying(self, raw_request_data):
         return self.is_default or self.check_filter(raw_request_data)
@@ -221,3 +241,16 @@ class ChannelFilter(OrderedModel):
             "integration": self.alert_receive_channel.insight_logs_verbal,
             "integration_id": self.alert_receive_channel.public_primary_key,
         }
+
+
+@receiver(post_save, sender=ChannelFilter)
+def listen_for_channelfilter_model_save(sender: ChannelFilter, instance: ChannelFilter, created: bool, *args, **kwargs):
+    bump_routing_table_version(instance.alert_receive_channel_id)
+    if not created:
+        # drop compiled templates of this process, so replaced routing templates don't occupy the cache
+        compiled_template_cache.clear()
+
+
+@receiver(post_delete, sender=ChannelFilter)
+def listen_for_channelfilter_model_delete(sender: ChannelFilter, instance: ChannelFilter, *args, **kwargs):
+    bump_routing_table_version(instance.alert_receive_channel_id)
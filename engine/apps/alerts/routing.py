@@ -0,0 +1,164 @@
+import json
+import logging
+import re
+import threading
+import typing
+from collections import OrderedDict
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from common.jinja_templater import apply_jinja_template
+from common.jinja_templater.apply_jinja_template import JinjaTemplateError, JinjaTemplateWarning
+
+logger = logging.getLogger(__name__)
+
+ROUTING_TABLE_VERSION_CACHE_KEY = "routing_table_version_{alert_receive_channel_id}"
+ROUTING_TABLE_VERSION_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+
+def get_routing_table_version_cache_key(alert_receive_channel_id: int) -> str:
+    return ROUTING_TABLE_VERSION_CACHE_KEY.format(alert_receive_channel_id=alert_receive_channel_id)
+
+
+def get_routing_table_version(alert_receive_channel_id: int) -> str:
+    key = get_routing_table_version_cache_key(alert_receive_channel_id)
+    version = cache.get(key)
+    if version is None:
+        # no version in cache (first use or evicted), start a new one so every process rebuilds its table
+        cache.add(key, uuid4().hex, timeout=ROUTING_TABLE_VERSION_CACHE_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump_routing_table_version(alert_receive_channel_id: int) -> None:
+    """
+    Invalidate routing tables of the integration in all processes.
+    The version is bumped right away and once again on commit, so a table rebuilt by another process
+    before the transaction is committed doesn't survive with the new version.
+    """
+
+    def _bump():
+        cache.set(
+            get_routing_table_version_cache_key(alert_receive_channel_id),
+            uuid4().hex,
+            timeout=ROUTING_TABLE_VERSION_CACHE_TIMEOUT,
+        )
+
+    _bump()
+    transaction.on_commit(_bump)
+
+
+class CompiledRoute:
+    def __init__(self, channel_filter_id: int, is_default: bool, filtering_term: str | None, filtering_term_type: int):
+        from apps.alerts.models import ChannelFilter
+
+        self.channel_filter_id = channel_filter_id
+        self.is_default = is_default
+        self.filtering_term = filtering_term
+        self.filtering_term_type = filtering_term_type
+
+        self.regex: re.Pattern | None = None
+        self.is_jinja2 = filtering_term_type == ChannelFilter.FILTERING_TERM_TYPE_JINJA2
+        is_regex = filtering_term_type == ChannelFilter.FILTERING_TERM_TYPE_REGEX
+        if not is_default and filtering_term is not None and is_regex:
+            try:
+                self.regex = re.compile(filtering_term)
+            except re.error:
+                logger.error(f"channel_filter={channel_filter_id} failed to parse regex={filtering_term}")
+
+    def is_satisfying(self, raw_request_data: typing.Any, serialized_payload: typing.Callable[[], str]) -> bool:
+        """
+        Same semantics as ChannelFilter.is_satisfying, serialized_payload lazily returns json.dumps(raw_request_data)
+        """
+        if self.is_default:
+            return True
+        if self.is_jinja2:
+            if self.filtering_term is None:
+                return False
+            try:
+                is_matching = apply_jinja_template(self.filtering_term, payload=raw_request_data)
+                return is_matching.strip().lower() in ["1", "true", "ok"]
+            except (JinjaTemplateError, JinjaTemplateWarning):
+                logger.error(f"channel_filter={self.channel_filter_id} failed to parse jinja2={self.filtering_term}")
+                return False
+        if self.regex is not None:
+            return self.regex.search(serialized_payload()) is not None
+        return False
+
+
+class RoutingTable:
+    """
+    Ordered routes of an integration with precompiled filtering terms.
+    """
+
+    def __init__(self, alert_receive_channel_id: int, version: str, routes: list[CompiledRoute]):
+        self.alert_receive_channel_id = alert_receive_channel_id
+        self.version = version
+        self.routes = routes
+
+    @classmethod
+    def build(cls, alert_receive_channel_id: int, version: str) -> "RoutingTable":
+        from apps.alerts.models import ChannelFilter
+
+        channel_filters = ChannelFilter.objects.filter(alert_receive_channel_id=alert_receive_channel_id).values_list(
+            "pk", "is_default", "filtering_term", "filtering_term_type"
+        )
+        routes = [CompiledRoute(*channel_filter) for channel_filter in channel_filters]
+        return cls(alert_receive_channel_id, version, routes)
+
+    def select_route_id(self, raw_request_data: typing.Any) -> int | None:
+        serialized_payload = None
+
+        def get_serialized_payload() -> str:
+            # serialize payload only once and only if there is a regex route to check
+            nonlocal serialized_payload
+            if serialized_payload is None:
+                serialized_payload = json.dumps(raw_request_data)
+            return serialized_payload
+
+        for route in self.routes:
+            if route.is_satisfying(raw_request_data, get_serialized_payload):
+                return route.channel_filter_id
+        return None
+
+
+class RoutingTablesCache:
+    """
+    In-process LRU of routing tables, validated against the version stored in the cache on every lookup.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._tables: OrderedDict[int, RoutingTable] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, alert_receive_channel_id: int) -> RoutingTable:
+        version = get_routing_table_version(alert_receive_channel_id)
+        with self._lock:
+            table = self._tables.get(alert_receive_channel_id)
+            if table is not None and table.version == version:
+                self._tables.move_to_end(alert_receive_channel_id)
+                return table
+
+        table = RoutingTable.build(alert_receive_channel_id, version)
+        if self.maxsize > 0:
+            with self._lock:
+                self._tables[alert_receive_channel_id] = table
+                self._tables.move_to_end(alert_receive_channel_id)
+                while len(self._tables) > self.maxsize:
+                    self._tables.popitem(last=False)
+        return table
+
+    def discard(self, alert_receive_channel_id: int) -> None:
+        with self._lock:
+            self._tables.pop(alert_receive_channel_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+
+
+routing_tables_cache = RoutingTablesCache(maxsize=settings.ROUTING_TABLES_CACHE_SIZE)
@@ -1,8 +1,10 @@
 from .acknowledge_reminder import acknowledge_reminder_task  # noqa: F401
+from .alert_group_alerts_info import backfill_alert_group_alerts_info  # noqa: F401
 from .alert_group_web_title_cache import (  # noqa:F401
     update_web_title_cache,
     update_web_title_cache_for_alert_receive_channel,
 )
+from .alert_search_tokens import backfill_alert_group_search_tokens, backfill_alert_search_tokens  # noqa: F401
 from .check_escalation_finished import check_escalation_finished_task  # noqa: F401
 from .custom_button_result import custom_button_result  # noqa: F401
 from .custom_webhook_result import custom_webhook_result  # noqa: F401
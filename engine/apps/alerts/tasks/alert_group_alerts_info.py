@@ -0,0 +1,35 @@
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from apps.alerts.tasks.task_logger import task_logger
+from common.custom_celery_tasks import shared_dedicated_queue_retry_task
+
+BATCH_SIZE = 1000
+
+
+@shared_dedicated_queue_retry_task
+def backfill_alert_group_alerts_info(cursor=0):
+    """
+    Set alerts_count and last_alert_id for alert groups created before these fields were added, one batch
+    of alert groups with pk > cursor per task run.
+    Start it with backfill_alert_group_alerts_info.delay(), it's safe to re-run.
+    """
+    from apps.alerts.models import Alert, AlertGroup
+
+    ids = list(AlertGroup.objects.filter(id__gt=cursor).order_by("id").values_list("id", flat=True)[:BATCH_SIZE])
+    if not ids:
+        task_logger.info(f"backfill_alert_group_alerts_info: finished, cursor={cursor}")
+        return
+
+    # count alerts in the same UPDATE statement, so alerts created concurrently are counted either by the backfill
+    # or by Alert.save once alerts_count is not NULL anymore
+    alerts = Alert.objects.filter(group_id=OuterRef("pk"))
+    updated = AlertGroup.objects.filter(pk__in=ids, alerts_count__isnull=True).update(
+        alerts_count=Coalesce(
+            Subquery(alerts.order_by().values("group_id").annotate(count=Count("pk")).values("count")), Value(0)
+        ),
+        last_alert_id=Subquery(alerts.order_by("-pk").values("pk")[:1]),
+    )
+
+    task_logger.debug(f"backfill_alert_group_alerts_info: updated {updated} alert groups {ids[0]}-{ids[-1]}")
+    backfill_alert_group_alerts_info.apply_async((ids[-1],), countdown=1)
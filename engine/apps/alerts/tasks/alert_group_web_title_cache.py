@@ -49,7 +49,7 @@ def update_web_title_cache(alert_receive_channel_pk, alert_group_pks):
         f"first alert_group_pk: {alert_group_pks[0]}, last alert_group_pk: {alert_group_pks[-1]}"
     )
 
-    from apps.alerts.models import Alert, AlertGroup, AlertReceiveChannel
+    from apps.alerts.models import Alert, AlertGroup, AlertGroupSearchToken, AlertReceiveChannel
 
     try:
         alert_receive_channel = AlertReceiveChannel.objects_with_deleted.get(pk=alert_receive_channel_pk)
@@ -57,7 +57,9 @@ def update_web_title_cache(alert_receive_channel_pk, alert_group_pks):
         task_logger.warning(f"AlertReceiveChannel {alert_receive_channel_pk} doesn't exist")
         return
 
-    alert_groups = AlertGroup.objects.filter(pk__in=alert_group_pks).only("pk")
+    alert_groups = AlertGroup.objects.filter(pk__in=alert_group_pks).only(
+        "pk", "public_primary_key", "inside_organization_number", "channel_id"
+    )
 
     # get first alerts in 2 SQL queries
     alerts_info = (
@@ -85,3 +87,4 @@ def update_web_title_cache(alert_receive_channel_pk, alert_group_pks):
         alert_group.web_title_cache = web_title_cache
 
     AlertGroup.objects.bulk_update(alert_groups, ["web_title_cache"])
+    AlertGroupSearchToken.update_for_alert_groups(alert_groups)
@@ -0,0 +1,48 @@
+from apps.alerts.tasks.task_logger import task_logger
+from common.custom_celery_tasks import shared_dedicated_queue_retry_task
+
+BATCH_SIZE = 1000
+
+
+@shared_dedicated_queue_retry_task
+def backfill_alert_search_tokens(cursor=0):
+    """
+    Create search tokens for alerts created before alert payloads were indexed, one batch of alerts with pk > cursor
+    per task run. Start it with backfill_alert_search_tokens.delay(), it's safe to re-run.
+    """
+    from apps.alerts.models import Alert, AlertSearchToken
+
+    ids = list(Alert.objects.filter(id__gt=cursor).order_by("id").values_list("id", flat=True)[:BATCH_SIZE])
+    if not ids:
+        task_logger.info(f"backfill_alert_search_tokens: finished, cursor={cursor}")
+        return
+
+    alerts = (
+        Alert.objects.filter(pk__in=ids).select_related("group").only("pk", "raw_request_data", "group__channel_id")
+    )
+    AlertSearchToken.create_for_alerts(alerts)
+
+    task_logger.debug(f"backfill_alert_search_tokens: indexed alerts {ids[0]}-{ids[-1]}")
+    backfill_alert_search_tokens.apply_async((ids[-1],), countdown=1)
+
+
+@shared_dedicated_queue_retry_task
+def backfill_alert_group_search_tokens(cursor=0):
+    """
+    Create search tokens for alert groups created before alert groups were indexed, one batch of alert groups
+    with pk > cursor per task run. Start it with backfill_alert_group_search_tokens.delay(), it's safe to re-run.
+    """
+    from apps.alerts.models import AlertGroup, AlertGroupSearchToken
+
+    ids = list(AlertGroup.objects.filter(id__gt=cursor).order_by("id").values_list("id", flat=True)[:BATCH_SIZE])
+    if not ids:
+        task_logger.info(f"backfill_alert_group_search_tokens: finished, cursor={cursor}")
+        return
+
+    alert_groups = AlertGroup.objects.filter(pk__in=ids).only(
+        "pk", "public_primary_key", "inside_organization_number", "channel_id", "web_title_cache"
+    )
+    AlertGroupSearchToken.update_for_alert_groups(alert_groups)
+
+    task_logger.debug(f"backfill_alert_group_search_tokens: indexed alert groups {ids[0]}-{ids[-1]}")
+    backfill_alert_group_search_tokens.apply_async((ids[-1],), countdown=1)
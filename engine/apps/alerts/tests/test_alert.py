@@ -1,9 +1,12 @@
 from unittest.mock import PropertyMock, patch
 
 import pytest
+from django.test import override_settings
+from django.utils import timezone
 
-from apps.alerts.models import Alert, EscalationPolicy
-from apps.alerts.tasks import distribute_alert, escalate_alert_group
+from apps.alerts.models import Alert, AlertSearchToken, EscalationPolicy
+from apps.alerts.models.alert_search_token import get_search_tokens
+from apps.alerts.tasks import backfill_alert_search_tokens, distribute_alert, escalate_alert_group
 
 
 @pytest.mark.django_db
@@ -137,3 +140,71 @@ def test_distribute_alert_escalate_alert_group_when_escalation_paused(
         with patch.object(escalate_alert_group, "apply_async") as mock_escalate_alert_group_2:
             distribute_alert(alert_2.pk)
     mock_escalate_alert_group_2.assert_called_once()
+
+
+def test_get_search_tokens():
+    payload = {
+        "evalMatches": [{"value": 100, "metric": "High value", "tags": None}],
+        "state": "alerting",
+        "isTest": True,
+        "title": "[Alerting] Test notification",
+    }
+    assert get_search_tokens(payload) == ["100", "high", "value", "alerting", "test", "notification"]
+    assert get_search_tokens(payload, limit=3) == ["100", "high", "value"]
+    assert get_search_tokens({"key": "a" * 101}) == []
+    assert get_search_tokens({"url": "https://www.example.com/?enabled=true"}) == ["example", "enabled"]
+
+
+@pytest.mark.django_db
+@override_settings(FEATURE_ALERT_SEARCH_TOKENS_ENABLED=True)
+def test_alert_create_search_tokens(make_organization, make_alert_receive_channel, make_user_for_organization):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+
+    alert = Alert.create(
+        title="the title",
+        message="the message",
+        alert_receive_channel=alert_receive_channel,
+        raw_request_data={"labels": {"severity": "critical"}},
+        integration_unique_data={},
+        image_url=None,
+        link_to_upstream_details=None,
+    )
+
+    search_tokens = AlertSearchToken.objects.filter(alert=alert)
+    assert sorted(search_tokens.values_list("token", flat=True)) == ["critical"]
+    assert all(search_token.channel_id == alert_receive_channel.pk for search_token in search_tokens)
+
+    alert.wipe(wiped_by=make_user_for_organization(organization), wiped_at=timezone.now())
+    assert not AlertSearchToken.objects.filter(alert=alert).exists()
+
+
+@pytest.mark.django_db
+def test_alert_create_search_tokens_disabled(
+    make_organization, make_alert_receive_channel, make_alert_group, make_alert
+):
+    alert_receive_channel = make_alert_receive_channel(make_organization())
+    alert = make_alert(make_alert_group(alert_receive_channel), {"labels": {"severity": "critical"}})
+
+    assert not AlertSearchToken.objects.filter(alert=alert).exists()
+
+
+@pytest.mark.django_db
+def test_backfill_alert_search_tokens(make_organization, make_alert_receive_channel, make_alert_group, make_alert):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    alert_group = make_alert_group(alert_receive_channel)
+    alerts = [make_alert(alert_group, {"host": f"host-{i}"}) for i in range(3)]
+    AlertSearchToken.objects.all().delete()
+
+    with patch("apps.alerts.tasks.alert_search_tokens.BATCH_SIZE", 2):
+        with patch.object(backfill_alert_search_tokens, "apply_async") as mock_apply_async:
+            backfill_alert_search_tokens()
+            assert mock_apply_async.call_args.args == ((alerts[1].pk,),)
+            backfill_alert_search_tokens(alerts[1].pk)
+            assert mock_apply_async.call_args.args == ((alerts[2].pk,),)
+            backfill_alert_search_tokens(alerts[2].pk)
+            assert mock_apply_async.call_count == 2
+
+    for i, alert in enumerate(alerts):
+        assert set(alert.search_tokens.values_list("token", flat=True)) == {"host", str(i)}
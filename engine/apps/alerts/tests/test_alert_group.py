@@ -4,8 +4,8 @@ import pytest
 
 from apps.alerts.constants import ActionSource
 from apps.alerts.incident_appearance.renderers.phone_call_renderer import AlertGroupPhoneCallRenderer
-from apps.alerts.models import AlertGroup, AlertGroupLogRecord
-from apps.alerts.tasks import wipe
+from apps.alerts.models import AlertGroup, AlertGroupLogRecord, AlertGroupSearchToken
+from apps.alerts.tasks import backfill_alert_group_alerts_info, backfill_alert_group_search_tokens, wipe
 from apps.alerts.tasks.delete_alert_group import delete_alert_group
 from apps.slack.client import SlackClient
 from apps.slack.errors import SlackAPIMessageNotFoundError, SlackAPIRatelimitError
@@ -72,6 +72,62 @@ def test_wipe(
     assert alert.raw_request_data == {}
 
 
+@pytest.mark.django_db
+def test_search_tokens(make_organization_and_user, make_alert_receive_channel, make_alert_group):
+    organization, user = make_organization_and_user()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    alert_group = make_alert_group(alert_receive_channel, web_title_cache="Disk usage high")
+    pk_and_number_tokens = {alert_group.public_primary_key.lower(), str(alert_group.inside_organization_number)}
+
+    def _tokens():
+        return set(AlertGroupSearchToken.objects.filter(alert_group=alert_group).values_list("token", flat=True))
+
+    assert _tokens() == {*pk_and_number_tokens, "disk", "usage", "high"}
+
+    # backfill re-creates tokens
+    AlertGroupSearchToken.objects.all().delete()
+    with patch.object(backfill_alert_group_search_tokens, "apply_async") as mock_apply_async:
+        backfill_alert_group_search_tokens()
+    mock_apply_async.assert_called_once_with((alert_group.pk,), countdown=1)
+    assert _tokens() == {*pk_and_number_tokens, "disk", "usage", "high"}
+
+    # web title is not searchable anymore once wiped
+    wipe(alert_group.pk, user.pk)
+    assert _tokens() == pk_and_number_tokens
+
+
+@pytest.mark.django_db
+def test_backfill_alert_group_alerts_info(make_organization, make_alert_receive_channel, make_alert_group, make_alert):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    alert_groups = [make_alert_group(alert_receive_channel) for _ in range(3)]
+    alerts = [make_alert(alert_groups[0], {}), make_alert(alert_groups[0], {}), make_alert(alert_groups[1], {})]
+    # alert groups created before alerts_count was added
+    AlertGroup.objects.filter(pk__in=[alert_groups[0].pk, alert_groups[2].pk]).update(
+        alerts_count=None, last_alert_id=None
+    )
+
+    with patch("apps.alerts.tasks.alert_group_alerts_info.BATCH_SIZE", 2):
+        with patch.object(backfill_alert_group_alerts_info, "apply_async") as mock_apply_async:
+            backfill_alert_group_alerts_info()
+            assert mock_apply_async.call_args.args == ((alert_groups[1].pk,),)
+            backfill_alert_group_alerts_info(alert_groups[1].pk)
+            assert mock_apply_async.call_args.args == ((alert_groups[2].pk,),)
+            backfill_alert_group_alerts_info(alert_groups[2].pk)
+            assert mock_apply_async.call_count == 2
+
+    assert list(
+        AlertGroup.objects.filter(pk__in=[ag.pk for ag in alert_groups])
+        .order_by("pk")
+        .values_list("alerts_count", "last_alert_id")
+    ) == [(2, alerts[1].pk), (1, alerts[2].pk), (0, None)]
+
+    # new alerts are counted once alerts_count is set
+    make_alert(alert_groups[2], {})
+    alert_groups[2].refresh_from_db()
+    assert alert_groups[2].alerts_count == 1
+
+
 @patch.object(SlackClient, "reactions_remove")
 @patch.object(SlackClient, "chat_delete")
 @pytest.mark.django_db
@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+from django.conf import settings
+from django.db import connection
+
+from apps.alerts.models import AlertGroupCounter
+from settings.base import DatabaseTypes
+
+
+@pytest.mark.django_db
+def test_get_value(make_organization):
+    organization = make_organization()
+    other_organization = make_organization()
+
+    assert [AlertGroupCounter.objects.get_value(organization) for _ in range(3)] == [0, 1, 2]
+    assert AlertGroupCounter.objects.get_value(other_organization) == 0
+    assert AlertGroupCounter.objects.get(organization=organization).value == 3
+
+
+@pytest.mark.django_db
+def test_alert_group_inside_organization_number(make_organization, make_alert_receive_channel, make_alert_group):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+
+    alert_groups = [make_alert_group(alert_receive_channel) for _ in range(3)]
+    assert [alert_group.inside_organization_number for alert_group in alert_groups] == [1, 2, 3]
+
+
+# SQLite doesn't support concurrent writes to an in-memory test database, run it against PostgreSQL/MySQL
+@pytest.mark.skipif(
+    settings.DATABASES["default"]["ENGINE"] == f"django.db.backends.{DatabaseTypes.SQLITE3}",
+    reason="concurrent writes are not supported by SQLite test database",
+)
+@pytest.mark.django_db(transaction=True)
+def test_get_value_concurrent(make_organization):
+    LOOPS = 30
+    THREADS = 10
+    organization = make_organization()
+    values = []
+    exceptions = []
+
+    def get_values():
+        for _ in range(LOOPS):
+            try:
+                values.append(AlertGroupCounter.objects.get_value(organization))
+            except Exception as e:
+                exceptions.append(e)
+        connection.close()
+
+    threads = [threading.Thread(target=get_values) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # no conflicts to retry, every value is allocated exactly once
+    assert not exceptions
+    assert sorted(values) == list(range(LOOPS * THREADS))
+    assert AlertGroupCounter.objects.get(organization=organization).value == LOOPS * THREADS
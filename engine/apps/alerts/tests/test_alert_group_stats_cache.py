@@ -0,0 +1,39 @@
+import pytest
+
+from apps.alerts.alert_group_stats_cache import get_alert_groups_count_by_states, update_alert_group_stats_cache
+from apps.alerts.constants import AlertGroupState
+from apps.metrics_exporter.metrics_cache_manager import MetricsCacheManager
+
+
+@pytest.mark.django_db
+def test_alert_groups_count_by_states(make_organization, make_alert_receive_channel, make_alert_group):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    other_alert_receive_channel = make_alert_receive_channel(organization)
+    make_alert_group(alert_receive_channel)
+    make_alert_group(alert_receive_channel, resolved=True)
+    # maintenance incidents are not counted
+    make_alert_group(alert_receive_channel, maintenance_uuid="maintenance_uuid")
+
+    def _count(integration_ids, states):
+        return get_alert_groups_count_by_states(organization.id, integration_ids, states)
+
+    def _update(integration_id, old_state, new_state):
+        update_alert_group_stats_cache(
+            organization.id,
+            MetricsCacheManager.update_integration_states_diff(
+                {}, integration_id, previous_state=old_state, new_state=new_state
+            ),
+        )
+
+    assert _count([alert_receive_channel.id], [AlertGroupState.FIRING]) == 1
+    assert _count([alert_receive_channel.id], [AlertGroupState.FIRING, AlertGroupState.RESOLVED]) == 2
+    assert _count([other_alert_receive_channel.id], list(AlertGroupState)) == 0
+
+    # counters are incremented per (integration, state), including integrations without alert groups
+    _update(alert_receive_channel.id, AlertGroupState.FIRING, AlertGroupState.ACKNOWLEDGED)
+    _update(other_alert_receive_channel.id, None, AlertGroupState.FIRING)
+    _update(other_alert_receive_channel.id, None, AlertGroupState.FIRING)
+    assert _count([alert_receive_channel.id], [AlertGroupState.FIRING]) == 0
+    assert _count([alert_receive_channel.id], [AlertGroupState.ACKNOWLEDGED]) == 1
+    assert _count([alert_receive_channel.id, other_alert_receive_channel.id], [AlertGroupState.FIRING]) == 2
@@ -1,6 +1,10 @@
+import json
+from unittest.mock import patch
+
 import pytest
 
 from apps.alerts.models import ChannelFilter
+from common.jinja_templater import apply_jinja_template
 
 
 @pytest.mark.django_db
@@ -91,3 +95,72 @@ def test_channel_filter_select_filter_jinja2(make_organization, make_alert_recei
         alert_receive_channel, raw_request_data, force_route_id=channel_filter.pk
     )
     assert satisfied_filter == channel_filter
+
+
+@pytest.mark.django_db
+def test_channel_filter_select_filter_route_edits(make_organization, make_alert_receive_channel, make_channel_filter):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    default_channel_filter = make_channel_filter(alert_receive_channel, is_default=True)
+    channel_filter = make_channel_filter(alert_receive_channel, filtering_term="foo", is_default=False)
+    other_channel_filter = make_channel_filter(alert_receive_channel, filtering_term="fo", is_default=False)
+
+    raw_request_data = {"title": "foo"}
+    assert ChannelFilter.select_filter(alert_receive_channel, raw_request_data) == channel_filter
+
+    # changing filtering term invalidates routing table
+    channel_filter.filtering_term = "bar"
+    channel_filter.save(update_fields=["filtering_term"])
+    assert ChannelFilter.select_filter(alert_receive_channel, raw_request_data) == other_channel_filter
+
+    # so does changing routes order
+    channel_filter.filtering_term = "foo"
+    channel_filter.save(update_fields=["filtering_term"])
+    other_channel_filter.to_index(0)
+    assert ChannelFilter.select_filter(alert_receive_channel, raw_request_data) == other_channel_filter
+
+    # and deleting a route
+    other_channel_filter.delete()
+    assert ChannelFilter.select_filter(alert_receive_channel, raw_request_data) == channel_filter
+    channel_filter.delete()
+    assert ChannelFilter.select_filter(alert_receive_channel, raw_request_data) == default_channel_filter
+
+
+@pytest.mark.django_db
+def test_channel_filter_select_filter_50_routes(
+    make_organization, make_alert_receive_channel, make_channel_filter, django_assert_num_queries
+):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    make_channel_filter(alert_receive_channel, is_default=True)
+    channel_filters = []
+    for i in range(50):
+        filtering_term_type = (
+            ChannelFilter.FILTERING_TERM_TYPE_REGEX if i % 2 else ChannelFilter.FILTERING_TERM_TYPE_JINJA2
+        )
+        filtering_term = f"service-{i}\\b" if i % 2 else f'{{{{ payload.service == "service-{i}" }}}}'
+        channel_filters.append(
+            make_channel_filter(
+                alert_receive_channel,
+                filtering_term=filtering_term,
+                filtering_term_type=filtering_term_type,
+                is_default=False,
+            )
+        )
+
+    # routes are loaded from the db once
+    ChannelFilter.select_filter(alert_receive_channel, {"service": "service-0"})
+
+    with patch("apps.alerts.routing.json.dumps", wraps=json.dumps) as mock_json_dumps:
+        # only the selected route is fetched, payload is serialized once for all regex routes
+        with django_assert_num_queries(1):
+            assert ChannelFilter.select_filter(alert_receive_channel, {"service": "service-49"}) == channel_filters[49]
+        assert mock_json_dumps.call_count == 1
+
+        # routes after the first matching one are not evaluated
+        with patch("apps.alerts.routing.apply_jinja_template", wraps=apply_jinja_template) as mock_apply_template:
+            with django_assert_num_queries(1):
+                assert (
+                    ChannelFilter.select_filter(alert_receive_channel, {"service": "service-2"}) == channel_filters[2]
+                )
+        assert mock_apply_template.call_count == 2
@@ -1,6 +1,8 @@
 from unittest.mock import patch
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from apps.alerts.constants import NEXT_ESCALATION_DELAY
@@ -157,6 +159,40 @@ def test_escalation_step_notify_multiple_users(
     assert mocked_execute_tasks.called
 
 
+@patch("apps.alerts.models.alert_group_log_record.tasks.send_update_log_report_signal.apply_async")
+@patch("apps.alerts.escalation_snapshot.snapshot_classes.EscalationPolicySnapshot._execute_tasks", return_value=None)
+@pytest.mark.django_db
+def test_escalation_step_notify_multiple_users_bulk_log_records(
+    mocked_execute_tasks,
+    mocked_send_update_log_report_signal,
+    escalation_step_test_setup,
+    make_user_for_organization,
+    make_escalation_policy,
+):
+    organization, user, _, channel_filter, alert_group, reason = escalation_step_test_setup
+    users = [user] + [make_user_for_organization(organization) for _ in range(4)]
+
+    notify_users_step = make_escalation_policy(
+        escalation_chain=channel_filter.escalation_chain,
+        escalation_policy_step=EscalationPolicy.STEP_NOTIFY_MULTIPLE_USERS,
+    )
+    notify_users_step.notify_to_users_queue.set(users)
+    escalation_policy_snapshot = get_escalation_policy_snapshot_from_model(notify_users_step)
+    # load users queue before counting queries
+    escalation_policy_snapshot.notify_to_users_queue = list(escalation_policy_snapshot.notify_to_users_queue)
+
+    with CaptureQueriesContext(connection) as ctx:
+        escalation_policy_snapshot.execute(alert_group, reason)
+
+    inserts = [q for q in ctx.captured_queries if q["sql"].startswith("INSERT")]
+    assert len(inserts) == 1
+    log_records = notify_users_step.log_records.filter(type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED)
+    assert log_records.count() == len(users) + 1
+    assert set(log_records.filter(author__isnull=False).values_list("author_id", flat=True)) == {u.pk for u in users}
+    # log report update is scheduled once for the whole step
+    mocked_send_update_log_report_signal.assert_called_once_with(kwargs={"alert_group_pk": alert_group.pk}, countdown=8)
+
+
 @patch("apps.alerts.escalation_snapshot.snapshot_classes.EscalationPolicySnapshot._execute_tasks", return_value=None)
 @pytest.mark.django_db
 def test_escalation_step_notify_on_call_schedule(
@@ -3,6 +3,8 @@ from unittest.mock import patch
 
 import pytest
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
@@ -16,6 +18,7 @@ from apps.api.errors import AlertGroupAPIError
 from apps.api.permissions import LegacyAccessControlRole
 from apps.api.serializers.alert import AlertFieldsCacheSerializerMixin
 from apps.api.serializers.alert_group import AlertGroupFieldsCacheSerializerMixin
+from apps.api.views.alert_group import AlertGroupView
 from apps.base.models import UserNotificationPolicyLogRecord
 
 alert_raw_request_data = {
@@ -75,6 +78,89 @@ def test_get_filter_by_integration(
     assert len(response.data["results"]) == 4
 
 
+@pytest.mark.django_db
+def test_get_search(
+    make_organization_and_user_with_plugin_token,
+    make_alert_receive_channel,
+    make_alert_group,
+    make_user_auth_headers,
+):
+    organization, user, token = make_organization_and_user_with_plugin_token()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    alert_group_1 = make_alert_group(alert_receive_channel, web_title_cache="[Alerting] Disk usage high")
+    alert_group_2 = make_alert_group(alert_receive_channel, web_title_cache="Memory usage high")
+    # same title in another organization
+    other_organization, _, _ = make_organization_and_user_with_plugin_token()
+    make_alert_group(make_alert_receive_channel(other_organization), web_title_cache="Disk usage high")
+
+    client = APIClient()
+    url = reverse("api-internal:alertgroup-list")
+
+    def _search(search):
+        response = client.get(url, {"search": search}, format="json", **make_user_auth_headers(user, token))
+        assert response.status_code == status.HTTP_200_OK
+        return {ag["pk"] for ag in response.json()["results"]}
+
+    assert _search("usage HIGH") == {alert_group_1.public_primary_key, alert_group_2.public_primary_key}
+    assert _search("disk usage") == {alert_group_1.public_primary_key}
+    assert _search("disk memory") == set()
+    assert _search(alert_group_2.public_primary_key) == {alert_group_2.public_primary_key}
+    assert _search(f"#{alert_group_1.inside_organization_number}") == {alert_group_1.public_primary_key}
+    assert _search("!!!") == set()
+
+    # search tokens follow web title updates
+    alert_group_2.web_title_cache = "Disk usage low"
+    alert_group_2.save(update_fields=["web_title_cache"])
+    assert _search("disk usage") == {alert_group_1.public_primary_key, alert_group_2.public_primary_key}
+
+
+@pytest.mark.django_db
+def test_enrich_query_count(
+    make_organization_and_user_with_plugin_token,
+    make_alert_receive_channel,
+    make_alert_group,
+    make_alert,
+):
+    organization, user, _ = make_organization_and_user_with_plugin_token()
+    alert_receive_channel = make_alert_receive_channel(organization)
+
+    view = AlertGroupView()
+    view.action = "list"
+    view.format_kwarg = None
+
+    def _enrich(alert_groups):
+        with CaptureQueriesContext(connection) as ctx:
+            enriched = view.enrich(AlertGroup.objects.filter(pk__in=[ag.pk for ag in alert_groups]).only("id"))
+        return enriched, len(ctx.captured_queries)
+
+    alert_groups = []
+    for i in range(5):
+        alert_group = make_alert_group(alert_receive_channel)
+        for _ in range(i):
+            make_alert(alert_group, alert_raw_request_data)
+        alert_groups.append(alert_group)
+
+    enriched, queries_count = _enrich(alert_groups[:2])
+    # alert groups + prefetch_related lookups + last alerts, regardless of the number of alerts
+    assert queries_count == 5
+    assert _enrich(alert_groups)[1] == queries_count
+
+    enriched, _ = _enrich(alert_groups)
+    for i, alert_group in enumerate(reversed(enriched)):
+        assert alert_group.alerts_count == i
+        if i == 0:
+            assert alert_group.last_alert is None
+        else:
+            assert alert_group.last_alert == alert_group.alerts.order_by("-id").first()
+            assert alert_group.last_alert.group is alert_group
+
+    # alert groups created before alerts_count was added
+    AlertGroup.objects.filter(pk__in=[ag.pk for ag in alert_groups]).update(alerts_count=None, last_alert_id=None)
+    enriched, _ = _enrich(alert_groups)
+    assert [alert_group.alerts_count for alert_group in reversed(enriched)] == [0, 1, 2, 3, 4]
+    assert enriched[0].last_alert == alert_groups[4].alerts.order_by("-id").first()
+
+
 @pytest.mark.django_db
 def test_get_filter_started_at(alert_group_internal_api_setup, make_user_auth_headers):
     user, token, _ = alert_group_internal_api_setup
@@ -1182,6 +1268,46 @@ def test_alert_group_stats_permissions(
     assert response.status_code == expected_status
 
 
+@pytest.mark.django_db
+def test_alert_group_stats(
+    alert_group_internal_api_setup, make_alert_receive_channel, make_alert_group, make_user_auth_headers
+):
+    user, token, alert_groups = alert_group_internal_api_setup
+    _, _, new_alert_group, _ = alert_groups
+    other_alert_receive_channel = make_alert_receive_channel(user.organization)
+    other_alert_group = make_alert_group(other_alert_receive_channel)
+
+    client = APIClient()
+    url = reverse("api-internal:alertgroup-stats")
+
+    def _get_stats(query):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(f"{url}?{query}", format="json", **make_user_auth_headers(user, token))
+        assert response.status_code == status.HTTP_200_OK
+        alert_groups_counted = any("COUNT(" in query["sql"] for query in ctx.captured_queries)
+        return response.json()["count"], alert_groups_counted
+
+    # counts by state are calculated once and then used for any status filter
+    assert _get_stats(f"status={AlertGroup.NEW}") == ("2", True)
+    assert _get_stats(f"status={AlertGroup.NEW}") == ("2", False)
+    assert _get_stats(f"status={AlertGroup.RESOLVED}&status={AlertGroup.SILENCED}") == ("2", False)
+    assert _get_stats("") == ("5", False)
+
+    # counts by state are updated on state changes
+    new_alert_group.acknowledge_by_user(user)
+    other_alert_group.resolve_by_user(user)
+    assert _get_stats(f"status={AlertGroup.NEW}") == ("0", False)
+    assert _get_stats(f"status={AlertGroup.ACKNOWLEDGED}") == ("2", False)
+    assert _get_stats(f"status={AlertGroup.RESOLVED}") == ("2", False)
+
+    # counts for other filters are cached until alert groups change state
+    integration_query = f"status={AlertGroup.ACKNOWLEDGED}&integration={new_alert_group.channel.public_primary_key}"
+    assert _get_stats(integration_query) == ("2", True)
+    assert _get_stats(integration_query) == ("2", False)
+    new_alert_group.resolve_by_user(user)
+    assert _get_stats(integration_query) == ("1", True)
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     "role,expected_status",
@@ -1,3 +1,5 @@
+import hashlib
+import json
 from datetime import timedelta
 
 from django.core.exceptions import ObjectDoesNotExist
@@ -13,8 +15,17 @@ from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from apps.alerts.constants import ActionSource
-from apps.alerts.models import Alert, AlertGroup, AlertReceiveChannel, EscalationChain, ResolutionNote
+from apps.alerts.alert_group_stats_cache import get_alert_groups_count_by_states, get_cached_alert_groups_count
+from apps.alerts.constants import ActionSource, AlertGroupState
+from apps.alerts.models import (
+    Alert,
+    AlertGroup,
+    AlertGroupSearchToken,
+    AlertReceiveChannel,
+    EscalationChain,
+    ResolutionNote,
+)
+from apps.alerts.models.alert_search_token import get_search_tokens
 from apps.alerts.paging import unpage_user
 from apps.alerts.tasks import send_update_resolution_note_signal
 from apps.api.errors import AlertGroupAPIError
@@ -57,6 +68,31 @@ def get_user_queryset(request):
     return User.objects.filter(organization=request.user.organization).distinct()
 
 
+class AlertGroupSearchFilter(SearchFilter):
+    """
+    Search alert groups by public primary key, number inside the organization and words of the web title.
+    All the words of the search must match, they are looked up in the AlertGroupSearchToken index.
+    """
+
+    max_search_tokens = 10
+
+    def filter_queryset(self, request, queryset, view):
+        search = request.query_params.get(self.search_param, "")
+        if not search.strip():
+            return queryset
+
+        search_tokens = get_search_tokens(search, limit=self.max_search_tokens)
+        if not search_tokens:
+            return queryset.none()
+        for token in search_tokens:
+            queryset = queryset.filter(
+                id__in=AlertGroupSearchToken.objects.filter(
+                    channel__organization=request.auth.organization, token=token
+                ).values("alert_group_id")
+            )
+        return queryset
+
+
 class AlertGroupFilterBackend(filters.DjangoFilterBackend):
     """
     See here for more context on how this works
@@ -310,11 +346,18 @@ class AlertGroupView(
 
     pagination_class = TwentyFiveCursorPaginator
 
-    filter_backends = [SearchFilter, AlertGroupFilterBackend]
-    # search_fields = ["=public_primary_key", "=inside_organization_number", "web_title_cache"]
+    filter_backends = [AlertGroupSearchFilter, AlertGroupFilterBackend]
 
     filterset_class = AlertGroupFilter
 
+    # values of the status filter, stats for them are calculated from alert groups counts by state
+    STATUS_TO_STATE = {
+        str(AlertGroup.NEW): AlertGroupState.FIRING,
+        str(AlertGroup.ACKNOWLEDGED): AlertGroupState.ACKNOWLEDGED,
+        str(AlertGroup.RESOLVED): AlertGroupState.RESOLVED,
+        str(AlertGroup.SILENCED): AlertGroupState.SILENCED,
+    }
+
     def get_serializer_class(self):
         if self.action == "list":
             return AlertGroupListSerializer
@@ -324,13 +367,7 @@ class AlertGroupView(
     def get_queryset(self, ignore_filtering_by_available_teams=False):
         # no select_related or prefetch_related is used at this point, it will be done on paginate_queryset.
 
-        alert_receive_channels_qs = AlertReceiveChannel.objects.filter(
-            organization_id=self.request.auth.organization.id
-        )
-        if not ignore_filtering_by_available_teams:
-            alert_receive_channels_qs = alert_receive_channels_qs.filter(*self.available_teams_lookup_args)
-
-        alert_receive_channels_ids = list(alert_receive_channels_qs.values_list("id", flat=True))
+        alert_receive_channels_ids = self._get_alert_receive_channels_ids(ignore_filtering_by_available_teams)
 
         queryset = AlertGroup.objects.filter(
             channel__in=alert_receive_channels_ids,
@@ -340,6 +377,15 @@ class AlertGroupView(
 
         return queryset
 
+    def _get_alert_receive_channels_ids(self, ignore_filtering_by_available_teams=False):
+        alert_receive_channels_qs = AlertReceiveChannel.objects.filter(
+            organization_id=self.request.auth.organization.id
+        )
+        if not ignore_filtering_by_available_teams:
+            alert_receive_channels_qs = alert_receive_channels_qs.filter(*self.available_teams_lookup_args)
+
+        return list(alert_receive_channels_qs.values_list("id", flat=True))
+
     def paginate_queryset(self, queryset):
         """
         All SQL joins (select_related and prefetch_related) will be performed AFTER pagination, so it only joins tables
@@ -428,42 +474,77 @@ class AlertGroupView(
         queryset = self.get_serializer_class().setup_eager_loading(queryset)
         alert_groups = list(queryset)
 
-        # get info on alerts count and last alert ID for every alert group
-        alerts_info = (
-            Alert.objects.values("group_id")
-            .filter(group_id__in=alert_group_pks)
-            .annotate(alerts_count=Count("group_id"), last_alert_id=Max("id"))
-        )
-        alerts_info_map = {info["group_id"]: info for info in alerts_info}
+        # alerts_count and last_alert_id are not populated for alert groups created before these fields were added,
+        # get info on alerts count and last alert ID from alerts for such alert groups only
+        legacy_alert_group_pks = [alert_group.pk for alert_group in alert_groups if alert_group.alerts_count is None]
+        if legacy_alert_group_pks:
+            alerts_info = (
+                Alert.objects.values("group_id")
+                .filter(group_id__in=legacy_alert_group_pks)
+                .annotate(alerts_count=Count("group_id"), last_alert_id=Max("id"))
+            )
+            alerts_info_map = {info["group_id"]: info for info in alerts_info}
+            for alert_group in alert_groups:
+                if alert_group.alerts_count is None:
+                    alerts_info = alerts_info_map.get(alert_group.pk)
+                    alert_group.alerts_count = alerts_info["alerts_count"] if alerts_info else 0
+                    alert_group.last_alert_id = alerts_info["last_alert_id"] if alerts_info else None
 
         # fetch last alerts for every alert group
-        last_alert_ids = [info["last_alert_id"] for info in alerts_info_map.values()]
-        last_alerts = Alert.objects.filter(pk__in=last_alert_ids)
-        for alert in last_alerts:
-            # link group back to alert
-            alert.group = [alert_group for alert_group in alert_groups if alert_group.pk == alert.group_id][0]
-            alerts_info_map[alert.group_id].update({"last_alert": alert})
-
-        # add additional "alerts_count" and "last_alert" fields to every alert group
+        last_alerts = Alert.objects.in_bulk(
+            [alert_group.last_alert_id for alert_group in alert_groups if alert_group.last_alert_id is not None]
+        )
         for alert_group in alert_groups:
-            try:
-                alert_group.last_alert = alerts_info_map[alert_group.pk]["last_alert"]
-                alert_group.alerts_count = alerts_info_map[alert_group.pk]["alerts_count"]
-            except KeyError:
-                # alert group has no alerts
-                alert_group.last_alert = None
-                alert_group.alerts_count = 0
+            alert_group.last_alert = last_alerts.get(alert_group.last_alert_id)
+            if alert_group.last_alert is not None:
+                # link group back to alert
+                alert_group.last_alert.group = alert_group
 
         return alert_groups
 
+    def _get_stats_filters(self):
+        """Return filters of the request normalized to be used in the stats cache key"""
+        filter_names = set(self.filterset_class.base_filters) | {AlertGroupSearchFilter.search_param}
+        stats_filters = {
+            name: sorted(self.request.query_params.getlist(name))
+            for name in sorted(filter_names)
+            if name in self.request.query_params
+        }
+        if "mine" in stats_filters:
+            # the result of "mine" filter depends on the user
+            stats_filters["mine"].append(self.request.user.pk)
+        return stats_filters
+
     @extend_schema(responses=inline_serializer(name="AlertGroupStats", fields={"count": serializers.IntegerField()}))
     @action(detail=False)
     def stats(self, *args, **kwargs):
-        """Return number of alert groups capped at 100001"""
+        """
+        Return number of alert groups capped at 100001.
+        Counts are cached per organization, available integrations and filters until alert groups change state.
+        Requests filtering only by status are answered from alert groups counts by state, without counting alert groups.
+        """
         MAX_COUNT = 100001
-        alert_groups = self.filter_queryset(self.get_queryset())[:MAX_COUNT]
-        count = alert_groups.count()
-        count = f"{MAX_COUNT-1}+" if count == MAX_COUNT else str(count)
+        organization_id = self.request.auth.organization.id
+        alert_receive_channels_ids = self._get_alert_receive_channels_ids()
+        stats_filters = self._get_stats_filters()
+
+        statuses = stats_filters.get("status") or list(self.STATUS_TO_STATE)
+        if stats_filters.keys() <= {"status"} and all(status in self.STATUS_TO_STATE for status in statuses):
+            count = get_alert_groups_count_by_states(
+                organization_id,
+                alert_receive_channels_ids,
+                {self.STATUS_TO_STATE[status] for status in statuses},
+            )
+        else:
+            filters_key = hashlib.md5(
+                json.dumps([sorted(alert_receive_channels_ids), stats_filters]).encode()
+            ).hexdigest()
+            count = get_cached_alert_groups_count(
+                organization_id,
+                filters_key,
+                lambda: self.filter_queryset(self.get_queryset())[:MAX_COUNT].count(),
+            )
+        count = f"{MAX_COUNT-1}+" if count >= MAX_COUNT else str(count)
         return Response(
             {
                 "count": count,
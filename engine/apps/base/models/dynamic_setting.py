@@ -1,8 +1,37 @@
-from django.db import models
+import typing
+
+from django.core.cache import cache
+from django.db import models, transaction
 from django.db.models import JSONField
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+DYNAMIC_SETTING_CACHE_KEY = "dynamic_setting_{name}"
+# settings are deleted from the cache on save, timeout only limits how long a missed invalidation lasts
+DYNAMIC_SETTING_CACHE_TIMEOUT = 60
+
+
+def get_dynamic_setting_cache_key(name: str) -> str:
+    return DYNAMIC_SETTING_CACHE_KEY.format(name=name)
+
+
+class DynamicSettingManager(models.Manager):
+    def get_cached(self, name: str, defaults: typing.Optional[dict] = None) -> "DynamicSetting":
+        """
+        Same as get_or_create(name=name, defaults=defaults)[0], but the setting is cached,
+        so it can be used on hot paths like alert ingestion without a DB query per request.
+        """
+        cache_key = get_dynamic_setting_cache_key(name)
+        dynamic_setting = cache.get(cache_key)
+        if dynamic_setting is None:
+            dynamic_setting = self.get_or_create(name=name, defaults=defaults)[0]
+            cache.set(cache_key, dynamic_setting, timeout=DYNAMIC_SETTING_CACHE_TIMEOUT)
+        return dynamic_setting
 
 
 class DynamicSetting(models.Model):
+    objects = DynamicSettingManager()
+
     name = models.CharField(max_length=100)
     boolean_value = models.BooleanField(null=True, default=None)
     numeric_value = models.IntegerField(null=True, default=None)
@@ -13,3 +42,12 @@ class DynamicSetting(models.Model):
 
     def __str__(self):
         return self.name
+
+
+@receiver(post_save, sender=DynamicSetting)
+@receiver(post_delete, sender=DynamicSetting)
+def listen_for_dynamicsetting_model_save(sender: DynamicSetting, instance: DynamicSetting, **kwargs) -> None:
+    cache_key = get_dynamic_setting_cache_key(instance.name)
+    cache.delete(cache_key)
+    # delete once again on commit, so the old value cached by another process before the commit doesn't survive
+    transaction.on_commit(lambda: cache.delete(cache_key))
@@ -0,0 +1,42 @@
+import pytest
+from django.core.cache import cache
+
+from apps.base.models import DynamicSetting
+from apps.base.models.dynamic_setting import get_dynamic_setting_cache_key
+
+
+@pytest.fixture(autouse=True)
+def clear_dynamic_setting_cache():
+    cache.delete(get_dynamic_setting_cache_key("test_setting"))
+
+
+@pytest.mark.django_db
+def test_get_cached_creates_setting_with_defaults(django_assert_num_queries):
+    dynamic_setting = DynamicSetting.objects.get_cached(name="test_setting", defaults={"json_value": ["a"]})
+    assert dynamic_setting.json_value == ["a"]
+    assert DynamicSetting.objects.get(name="test_setting").json_value == ["a"]
+
+    # subsequent lookups don't hit the DB
+    with django_assert_num_queries(0):
+        assert DynamicSetting.objects.get_cached(name="test_setting").json_value == ["a"]
+
+
+@pytest.mark.django_db
+def test_get_cached_invalidated_on_save(django_capture_on_commit_callbacks):
+    dynamic_setting = DynamicSetting.objects.get_cached(name="test_setting", defaults={"json_value": ["a"]})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        dynamic_setting.json_value = ["a", "b"]
+        dynamic_setting.save()
+
+    assert DynamicSetting.objects.get_cached(name="test_setting").json_value == ["a", "b"]
+
+
+@pytest.mark.django_db
+def test_get_cached_invalidated_on_delete(django_capture_on_commit_callbacks):
+    dynamic_setting = DynamicSetting.objects.get_cached(name="test_setting", defaults={"json_value": ["a"]})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        dynamic_setting.delete()
+
+    assert DynamicSetting.objects.get_cached(name="test_setting", defaults={"json_value": []}).json_value == []
@@ -0,0 +1,121 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from apps.heartbeat.models import IntegrationHeartBeat
+
+HEARTBEAT_LAST_SEEN_CACHE_KEY = "heartbeat_last_seen_{alert_receive_channel_id}"
+# must be way longer than the flush interval, so a heartbeat is not lost if flushing is delayed
+HEARTBEAT_LAST_SEEN_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+HEARTBEAT_FLUSH_BATCH_SIZE = 1000
+
+# Integrations with recorded heartbeats are queued for flushing in cache slots numbered by an atomic counter,
+# so flush_heartbeats reads only the integrations that got heartbeats since the last flush.
+HEARTBEAT_PENDING_COUNTER_CACHE_KEY = "heartbeat_pending_counter"
+HEARTBEAT_PENDING_SLOT_CACHE_KEY = "heartbeat_pending_slot_{slot}"
+HEARTBEAT_FLUSHED_SLOT_CACHE_KEY = "heartbeat_flushed_slot"
+# integration is queued once until it's flushed, the marker expires in case its slot is lost
+HEARTBEAT_PENDING_CACHE_KEY = "heartbeat_pending_{alert_receive_channel_id}"
+# limits the number of slots read by a single flush, e.g. if the flushed slot number is evicted from the cache
+HEARTBEAT_FLUSH_MAX_SLOTS = 100000
+
+# (pk, alert_receive_channel_id, last_heartbeat_time, timeout_seconds)
+HeartbeatRow = tuple[int, int, datetime.datetime | None, int]
+
+
+def get_heartbeat_last_seen_cache_key(alert_receive_channel_id: int) -> str:
+    return HEARTBEAT_LAST_SEEN_CACHE_KEY.format(alert_receive_channel_id=alert_receive_channel_id)
+
+
+def get_heartbeat_pending_cache_key(alert_receive_channel_id: int) -> str:
+    return HEARTBEAT_PENDING_CACHE_KEY.format(alert_receive_channel_id=alert_receive_channel_id)
+
+
+def get_heartbeat_pending_slot_cache_key(slot: int) -> str:
+    return HEARTBEAT_PENDING_SLOT_CACHE_KEY.format(slot=slot)
+
+
+def record_heartbeat(alert_receive_channel_id: int) -> None:
+    """
+    Store the heartbeat time in the cache, it's saved to the DB by flush_heartbeats.
+    """
+    cache.set(
+        get_heartbeat_last_seen_cache_key(alert_receive_channel_id),
+        timezone.now(),
+        timeout=HEARTBEAT_LAST_SEEN_CACHE_TIMEOUT,
+    )
+    if cache.add(
+        get_heartbeat_pending_cache_key(alert_receive_channel_id), True, timeout=settings.HEARTBEAT_FLUSH_INTERVAL * 2
+    ):
+        cache.add(HEARTBEAT_PENDING_COUNTER_CACHE_KEY, 0, timeout=None)
+        slot = cache.incr(HEARTBEAT_PENDING_COUNTER_CACHE_KEY)
+        cache.set(
+            get_heartbeat_pending_slot_cache_key(slot),
+            alert_receive_channel_id,
+            timeout=HEARTBEAT_LAST_SEEN_CACHE_TIMEOUT,
+        )
+
+
+def flush_heartbeats() -> int:
+    """
+    Save heartbeat times recorded in the cache since the last flush to the DB, with a single UPDATE statement per batch
+    of heartbeats. Only heartbeats with a newer time than the one in the DB are updated.
+    Returns the number of updated heartbeats.
+    """
+    last_slot = cache.get(HEARTBEAT_PENDING_COUNTER_CACHE_KEY, 0)
+    flushed_slot = max(cache.get(HEARTBEAT_FLUSHED_SLOT_CACHE_KEY, 0), last_slot - HEARTBEAT_FLUSH_MAX_SLOTS)
+
+    updated_count = 0
+    for batch_start in range(flushed_slot + 1, last_slot + 1, HEARTBEAT_FLUSH_BATCH_SIZE):
+        slot_cache_keys = [
+            get_heartbeat_pending_slot_cache_key(slot)
+            for slot in range(batch_start, min(batch_start + HEARTBEAT_FLUSH_BATCH_SIZE, last_slot + 1))
+        ]
+        alert_receive_channel_ids = set(cache.get_many(slot_cache_keys).values())
+        # new heartbeats of these integrations are queued again, so they are flushed next time
+        cache.delete_many(
+            [
+                get_heartbeat_pending_cache_key(alert_receive_channel_id)
+                for alert_receive_channel_id in alert_receive_channel_ids
+            ]
+            + slot_cache_keys
+        )
+        if alert_receive_channel_ids:
+            heartbeats = IntegrationHeartBeat.objects.filter(
+                alert_receive_channel_id__in=alert_receive_channel_ids
+            ).values_list("pk", "alert_receive_channel_id", "last_heartbeat_time", "timeout_seconds")
+            updated_count += _flush_heartbeats_batch(list(heartbeats))
+    cache.set(HEARTBEAT_FLUSHED_SLOT_CACHE_KEY, last_slot, timeout=None)
+    return updated_count
+
+
+def _flush_heartbeats_batch(batch: list[HeartbeatRow]) -> int:
+    cache_keys = {
+        get_heartbeat_last_seen_cache_key(alert_receive_channel_id): (pk, last_heartbeat_time, timeout_seconds)
+        for pk, alert_receive_channel_id, last_heartbeat_time, timeout_seconds in batch
+    }
+    last_seen = cache.get_many(cache_keys.keys())
+
+    last_heartbeat_times = {}
+    expires_at = {}
+    for cache_key, last_seen_time in last_seen.items():
+        pk, last_heartbeat_time, timeout_seconds = cache_keys[cache_key]
+        if last_heartbeat_time is None or last_seen_time > last_heartbeat_time:
+            last_heartbeat_times[pk] = last_seen_time
+            expires_at[pk] = IntegrationHeartBeat.get_expires_at(last_seen_time, timeout_seconds)
+
+    if not last_heartbeat_times:
+        return 0
+    return IntegrationHeartBeat.objects.filter(pk__in=last_heartbeat_times.keys()).update(
+        last_heartbeat_time=Case(
+            *[When(pk=pk, then=Value(time)) for pk, time in last_heartbeat_times.items()],
+            output_field=DateTimeField(),
+        ),
+        expires_at=Case(
+            *[When(pk=pk, then=Value(time)) for pk, time in expires_at.items()],
+            output_field=DateTimeField(),
+        ),
+    )
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.20 on 2026-10-17 07:25
+
+import datetime
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def populate_expires_at(apps, schema_editor):
+    IntegrationHeartBeat = apps.get_model('heartbeat', 'IntegrationHeartBeat')
+
+    # only enabled heartbeats have expires_at set
+    heartbeats = IntegrationHeartBeat.objects.filter(last_heartbeat_time__isnull=False).exclude(timeout_seconds=0)
+    batch = []
+    for heartbeat in heartbeats.only("pk", "last_heartbeat_time", "timeout_seconds").iterator(chunk_size=BATCH_SIZE):
+        heartbeat.expires_at = heartbeat.last_heartbeat_time + datetime.timedelta(seconds=heartbeat.timeout_seconds)
+        batch.append(heartbeat)
+        if len(batch) == BATCH_SIZE:
+            IntegrationHeartBeat.objects.bulk_update(batch, fields=["expires_at"])
+            batch = []
+    if batch:
+        IntegrationHeartBeat.objects.bulk_update(batch, fields=["expires_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('heartbeat', '0002_delete_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='integrationheartbeat',
+            name='expires_at',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='integrationheartbeat',
+            index=models.Index(fields=['previous_alerted_state_was_life', 'expires_at'], name='heartbeat_i_previou_11b2eb_idx'),
+        ),
+        migrations.RunPython(populate_expires_at, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+import datetime
 import logging
 import typing
 from urllib.parse import urljoin
@@ -5,9 +6,11 @@ from urllib.parse import urljoin
 from django.conf import settings
 from django.core.validators import MinLengthValidator
 from django.db import models
+from django.db.models import Case, DateTimeField, DurationField, ExpressionWrapper, F, Value, When
 from django.utils import timezone
 
 from common.public_primary_keys import generate_public_primary_key, increase_public_primary_key_length
+from settings.base import DatabaseTypes
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +29,36 @@ def generate_public_primary_key_for_integration_heart_beat():
     return new_public_primary_key
 
 
+def get_timeout_expression() -> ExpressionWrapper:
+    if settings.DATABASES["default"]["ENGINE"] == f"django.db.backends.{DatabaseTypes.POSTGRESQL}":
+        # DurationField: When used on PostgreSQL, the data type used is an interval
+        # https://docs.djangoproject.com/en/3.2/ref/models/fields/#durationfield
+        return ExpressionWrapper(timezone.timedelta(seconds=1) * F("timeout_seconds"), output_field=DurationField())
+    else:
+        # DurationField: ...Otherwise a bigint of microseconds is used...
+        # microseconds = seconds * 10**6
+        # https://docs.djangoproject.com/en/3.2/ref/models/fields/#durationfield
+        return ExpressionWrapper(F("timeout_seconds") * 10**6, output_field=DurationField())
+
+
+class IntegrationHeartBeatQuerySet(models.QuerySet):
+    def update_last_heartbeat_time(self, last_heartbeat_time: datetime.datetime) -> int:
+        """
+        Set last_heartbeat_time and recalculate expires_at with a single UPDATE statement
+        """
+        return self.update(
+            last_heartbeat_time=last_heartbeat_time,
+            expires_at=Case(
+                When(timeout_seconds=0, then=None),
+                default=ExpressionWrapper(
+                    Value(last_heartbeat_time, output_field=DateTimeField()) + get_timeout_expression(),
+                    output_field=DateTimeField(),
+                ),
+                output_field=DateTimeField(),
+            ),
+        )
+
+
 class IntegrationHeartBeat(models.Model):
     TIMEOUT_CHOICES = (
         (60, "1 minute"),
@@ -40,6 +73,8 @@ class IntegrationHeartBeat(models.Model):
         (86400, "1 day"),
     )
 
+    objects = models.Manager.from_queryset(IntegrationHeartBeatQuerySet)()
+
     created_at = models.DateTimeField(auto_now_add=True)
     timeout_seconds = models.IntegerField(default=0)
 
@@ -48,6 +83,12 @@ class IntegrationHeartBeat(models.Model):
     Stores the latest received heartbeat signal time
     """
 
+    expires_at = models.DateTimeField(default=None, null=True)
+    """
+    Stores last_heartbeat_time + timeout_seconds, null if the heartbeat is not enabled.
+    Indexed together with previous_alerted_state_was_life, so check_heartbeats selects only due heartbeats.
+    """
+
     last_checkup_task_time = models.DateTimeField(default=None, null=True)
     """
     Deprecated. This field is not used. TODO: remove it
@@ -74,6 +115,27 @@ class IntegrationHeartBeat(models.Model):
         "alerts.AlertReceiveChannel", on_delete=models.CASCADE, related_name="integration_heartbeat"
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["previous_alerted_state_was_life", "expires_at"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.expires_at = self.get_expires_at(self.last_heartbeat_time, self.timeout_seconds)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"last_heartbeat_time", "timeout_seconds"} & set(update_fields):
+            kwargs["update_fields"] = list(update_fields) + ["expires_at"]
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def get_expires_at(
+        last_heartbeat_time: typing.Optional[datetime.datetime], timeout_seconds: int
+    ) -> typing.Optional[datetime.datetime]:
+        if last_heartbeat_time is None or timeout_seconds == 0:
+            # heartbeat is enabled only if it has non-zero timeout and at least one heartbeat signal was received
+            return None
+        return last_heartbeat_time + timezone.timedelta(seconds=timeout_seconds)
+
     @property
     def is_expired(self) -> bool:
         if self.last_heartbeat_time is None:
@@ -1,16 +1,12 @@
-import datetime
-
 from celery.utils.log import get_task_logger
 from django.conf import settings
 from django.db import transaction
-from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F
-from django.db.models.functions import Cast
 from django.utils import timezone
 
+from apps.heartbeat.coalescing import flush_heartbeats
 from apps.heartbeat.models import IntegrationHeartBeat
 from apps.integrations.tasks import create_alert
 from common.custom_celery_tasks import shared_dedicated_queue_retry_task
-from settings.base import DatabaseTypes
 
 logger = get_task_logger(__name__)
 
@@ -20,78 +16,85 @@ def check_heartbeats() -> str:
     """
     Periodic task to check heartbeats status change and create alerts (or auto-resolve alerts) if needed
     """
+    if settings.HEARTBEAT_COALESCING_ENABLED:
+        # save heartbeats recorded in the cache, so recently alive heartbeats are not considered expired.
+        # Only heartbeats recorded since the last flush are read, so it's cheap to run on every check.
+        flush_heartbeats()
+
     # Heartbeat is considered enabled if it
     # * has timeout_seconds set to non-zero (non-default) value,
-    # * received at least one checkup (last_heartbeat_time set to non-null value)\
-
-    def _get_timeout_expression() -> ExpressionWrapper:
-        if settings.DATABASES["default"]["ENGINE"] == f"django.db.backends.{DatabaseTypes.POSTGRESQL}":
-            # DurationField: When used on PostgreSQL, the data type used is an interval
-            # https://docs.djangoproject.com/en/3.2/ref/models/fields/#durationfield
-            return ExpressionWrapper(datetime.timedelta(seconds=1) * F("timeout_seconds"), output_field=DurationField())
-        else:
-            # DurationField: ...Otherwise a bigint of microseconds is used...
-            # microseconds = seconds * 10**6
-            # https://docs.djangoproject.com/en/3.2/ref/models/fields/#durationfield
-            return ExpressionWrapper(F("timeout_seconds") * 10**6, output_field=DurationField())
-
-    enabled_heartbeats = (
-        IntegrationHeartBeat.objects.filter(last_heartbeat_time__isnull=False)
-        .exclude(timeout_seconds=0)
-        .annotate(period_start=(Cast(timezone.now() - _get_timeout_expression(), DateTimeField())))
-    )
+    # * received at least one checkup (last_heartbeat_time set to non-null value)
+    # expires_at is set only for enabled heartbeats, so both queries use the (previous_alerted_state_was_life,
+    # expires_at) index and select only heartbeats changing their state, not all of them.
+    now = timezone.now()
     with transaction.atomic():
         # Heartbeat is considered expired if it
         # * is enabled,
         # * is not already expired,
         # * last check in was before the timeout period start
-        expired_heartbeats = enabled_heartbeats.select_for_update().filter(
-            last_heartbeat_time__lte=F("period_start"), previous_alerted_state_was_life=True
+        expired_heartbeats = IntegrationHeartBeat.objects.select_for_update().filter(
+            expires_at__lte=now, previous_alerted_state_was_life=True
         )
-        # Schedule alert creation for each expired heartbeat after transaction commit
-        for heartbeat in expired_heartbeats:
-            transaction.on_commit(
-                lambda: create_alert.apply_async(
-                    kwargs={
-                        "title": heartbeat.alert_receive_channel.heartbeat_expired_title,
-                        "message": heartbeat.alert_receive_channel.heartbeat_expired_message,
-                        "image_url": None,
-                        "link_to_upstream_details": None,
-                        "alert_receive_channel_pk": heartbeat.alert_receive_channel.pk,
-                        "integration_unique_data": {},
-                        "raw_request_data": heartbeat.alert_receive_channel.heartbeat_expired_payload,
-                    },
-                )
-            )
-        # Update previous_alerted_state_was_life to False
-        expired_count = expired_heartbeats.update(previous_alerted_state_was_life=False)
+        expired_count = _update_heartbeats_and_create_alerts(expired_heartbeats, is_expired=True)
     with transaction.atomic():
         # Heartbeat is considered restored if it
         # * is enabled,
         # * last check in was after the timeout period start,
         # * was is alerted state (previous_alerted_state_was_life is False), i.e. was expired
-        restored_heartbeats = enabled_heartbeats.select_for_update().filter(
-            last_heartbeat_time__gte=F("period_start"), previous_alerted_state_was_life=False
+        restored_heartbeats = IntegrationHeartBeat.objects.select_for_update().filter(
+            expires_at__gte=now, previous_alerted_state_was_life=False
         )
-        # Schedule auto-resolve alert creation for each expired heartbeat after transaction commit
-        for heartbeat in restored_heartbeats:
-            transaction.on_commit(
-                lambda: create_alert.apply_async(
-                    kwargs={
-                        "title": heartbeat.alert_receive_channel.heartbeat_restored_title,
-                        "message": heartbeat.alert_receive_channel.heartbeat_restored_message,
-                        "image_url": None,
-                        "link_to_upstream_details": None,
-                        "alert_receive_channel_pk": heartbeat.alert_receive_channel.pk,
-                        "integration_unique_data": {},
-                        "raw_request_data": heartbeat.alert_receive_channel.heartbeat_restored_payload,
-                    },
-                )
-            )
-        restored_count = restored_heartbeats.update(previous_alerted_state_was_life=True)
+        restored_count = _update_heartbeats_and_create_alerts(restored_heartbeats, is_expired=False)
     return f"Found {expired_count} expired and {restored_count} restored heartbeats"
 
 
+def _update_heartbeats_and_create_alerts(heartbeats, is_expired: bool) -> int:
+    """
+    Lock heartbeats, flip their previous_alerted_state_was_life and schedule alert creation for all of them
+    after transaction commit. The number of queries doesn't depend on the number of heartbeats.
+    """
+    from apps.alerts.models import AlertReceiveChannel
+
+    heartbeat_ids_by_channel_id = dict(heartbeats.values_list("alert_receive_channel_id", "pk"))
+    if not heartbeat_ids_by_channel_id:
+        return 0
+
+    alert_receive_channels = AlertReceiveChannel.objects_with_deleted.filter(pk__in=heartbeat_ids_by_channel_id)
+    alerts_kwargs = [
+        {
+            "title": (
+                alert_receive_channel.heartbeat_expired_title
+                if is_expired
+                else alert_receive_channel.heartbeat_restored_title
+            ),
+            "message": (
+                alert_receive_channel.heartbeat_expired_message
+                if is_expired
+                else alert_receive_channel.heartbeat_restored_message
+            ),
+            "image_url": None,
+            "link_to_upstream_details": None,
+            "alert_receive_channel_pk": alert_receive_channel.pk,
+            "integration_unique_data": {},
+            "raw_request_data": (
+                alert_receive_channel.heartbeat_expired_payload
+                if is_expired
+                else alert_receive_channel.heartbeat_restored_payload
+            ),
+        }
+        for alert_receive_channel in alert_receive_channels
+    ]
+
+    def _create_alerts():
+        for kwargs in alerts_kwargs:
+            create_alert.apply_async(kwargs=kwargs)
+
+    transaction.on_commit(_create_alerts)
+    return IntegrationHeartBeat.objects.filter(pk__in=heartbeat_ids_by_channel_id.values()).update(
+        previous_alerted_state_was_life=not is_expired
+    )
+
+
 @shared_dedicated_queue_retry_task()
 def integration_heartbeat_checkup(heartbeat_id: int) -> None:
     """Deprecated. TODO: Remove this task after this task cleared from queue"""
@@ -102,4 +105,13 @@ def integration_heartbeat_checkup(heartbeat_id: int) -> None:
 def process_heartbeat_task(alert_receive_channel_pk):
     IntegrationHeartBeat.objects.filter(
         alert_receive_channel__pk=alert_receive_channel_pk,
-    ).update(last_heartbeat_time=timezone.now())
+    ).update_last_heartbeat_time(timezone.now())
+
+
+@shared_dedicated_queue_retry_task()
+def flush_heartbeats_task() -> str:
+    """
+    Periodic task to save heartbeats recorded in the cache to the DB, used when HEARTBEAT_COALESCING_ENABLED is set
+    """
+    updated_count = flush_heartbeats()
+    return f"Updated {updated_count} heartbeats"
@@ -0,0 +1,143 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.alerts.models import AlertReceiveChannel
+from apps.heartbeat.coalescing import HEARTBEAT_PENDING_COUNTER_CACHE_KEY, flush_heartbeats, record_heartbeat
+from apps.heartbeat.tasks import check_heartbeats, process_heartbeat_task
+from apps.integrations.tasks import create_alert
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # heartbeat times are stored in cache by integration id, clean it to not get them from previous tests
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_flush_heartbeats(
+    make_organization, make_alert_receive_channel, make_integration_heartbeat, django_assert_num_queries
+):
+    organization = make_organization()
+    now = timezone.now()
+    heartbeats = [
+        make_integration_heartbeat(make_alert_receive_channel(organization), last_heartbeat_time=last_heartbeat_time)
+        for last_heartbeat_time in (None, now - timezone.timedelta(minutes=10), now - timezone.timedelta(minutes=10))
+    ]
+    for heartbeat in heartbeats[:2]:
+        record_heartbeat(heartbeat.alert_receive_channel_id)
+
+    # select heartbeats and update the recorded ones with a single statement
+    with django_assert_num_queries(2):
+        assert flush_heartbeats() == 2
+
+    for heartbeat in heartbeats:
+        heartbeat.refresh_from_db()
+    assert heartbeats[0].last_heartbeat_time >= now
+    assert heartbeats[1].last_heartbeat_time >= now
+    assert heartbeats[2].last_heartbeat_time == now - timezone.timedelta(minutes=10)
+
+    # heartbeats are queued for flushing again only when they are recorded again
+    with django_assert_num_queries(0):
+        assert flush_heartbeats() == 0
+    record_heartbeat(heartbeats[2].alert_receive_channel_id)
+    record_heartbeat(heartbeats[2].alert_receive_channel_id)
+    assert cache.get(HEARTBEAT_PENDING_COUNTER_CACHE_KEY) == 3
+    with django_assert_num_queries(2):
+        assert flush_heartbeats() == 1
+    heartbeats[2].refresh_from_db()
+    assert heartbeats[2].last_heartbeat_time >= now
+
+
+@pytest.mark.django_db
+def test_flush_heartbeats_keeps_newer_time(make_organization, make_alert_receive_channel, make_integration_heartbeat):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    record_heartbeat(alert_receive_channel.pk)
+    last_heartbeat_time = timezone.now() + timezone.timedelta(seconds=1)
+    heartbeat = make_integration_heartbeat(alert_receive_channel, last_heartbeat_time=last_heartbeat_time)
+
+    assert flush_heartbeats() == 0
+    heartbeat.refresh_from_db()
+    assert heartbeat.last_heartbeat_time == last_heartbeat_time
+
+
+@pytest.mark.django_db
+def test_heartbeat_view_records_heartbeat(
+    settings, make_organization, make_alert_receive_channel, make_integration_heartbeat
+):
+    settings.HEARTBEAT_COALESCING_ENABLED = True
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(
+        organization, integration=AlertReceiveChannel.INTEGRATION_FORMATTED_WEBHOOK
+    )
+    heartbeat = make_integration_heartbeat(alert_receive_channel)
+    url = reverse("integrations:webhook_heartbeat", kwargs={"alert_channel_key": alert_receive_channel.token})
+
+    with patch.object(process_heartbeat_task, "apply_async") as mock_process_heartbeat_task:
+        response = Client().post(url)
+    assert response.status_code == 200
+    assert mock_process_heartbeat_task.call_count == 0
+
+    heartbeat.refresh_from_db()
+    assert heartbeat.last_heartbeat_time is None
+    flush_heartbeats()
+    heartbeat.refresh_from_db()
+    assert heartbeat.last_heartbeat_time is not None
+
+
+@pytest.mark.django_db
+def test_check_heartbeats_flushes_recorded_heartbeats(
+    settings,
+    make_organization,
+    make_alert_receive_channel,
+    make_integration_heartbeat,
+    django_capture_on_commit_callbacks,
+):
+    settings.HEARTBEAT_COALESCING_ENABLED = True
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    make_integration_heartbeat(
+        alert_receive_channel, timeout_seconds=60, last_heartbeat_time=timezone.now() - timezone.timedelta(minutes=10)
+    )
+    # heartbeat is alive, but it's not saved to the DB yet
+    record_heartbeat(alert_receive_channel.pk)
+
+    with patch.object(create_alert, "apply_async") as mock_create_alert_apply_async:
+        with django_capture_on_commit_callbacks(execute=True):
+            result = check_heartbeats()
+    assert result == "Found 0 expired and 0 restored heartbeats"
+    assert mock_create_alert_apply_async.call_count == 0
+
+
+@pytest.mark.django_db
+def test_check_heartbeats_flush_reads_only_recorded_heartbeats(
+    settings, make_organization, make_alert_receive_channel, make_integration_heartbeat, django_assert_num_queries
+):
+    settings.HEARTBEAT_COALESCING_ENABLED = True
+    organization = make_organization()
+    last_heartbeat_time = timezone.now() - timezone.timedelta(minutes=1)
+    for _ in range(5):
+        make_integration_heartbeat(
+            make_alert_receive_channel(organization), timeout_seconds=3600, last_heartbeat_time=last_heartbeat_time
+        )
+
+    # no heartbeats recorded since the last flush, heartbeats are not read for flushing,
+    # only expired and restored heartbeats are selected (in transactions, with savepoints in tests)
+    with django_assert_num_queries(6):
+        check_heartbeats()
+
+    alert_receive_channel = make_alert_receive_channel(organization)
+    heartbeat = make_integration_heartbeat(
+        alert_receive_channel, timeout_seconds=3600, last_heartbeat_time=last_heartbeat_time
+    )
+    record_heartbeat(alert_receive_channel.pk)
+    # select and update the recorded heartbeat
+    with django_assert_num_queries(8):
+        check_heartbeats()
+    heartbeat.refresh_from_db()
+    assert heartbeat.last_heartbeat_time > last_heartbeat_time
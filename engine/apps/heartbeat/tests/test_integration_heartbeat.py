@@ -1,10 +1,12 @@
 from unittest.mock import patch
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from apps.alerts.models import AlertReceiveChannel
-from apps.heartbeat.tasks import check_heartbeats
+from apps.heartbeat.tasks import check_heartbeats, process_heartbeat_task
 from apps.integrations.tasks import create_alert
 
 
@@ -78,3 +80,52 @@ def test_check_heartbeats(
             result = check_heartbeats()
     assert result == "Found 0 expired and 0 restored heartbeats"
     assert mock_create_alert_apply_async.call_count == 0
+
+
+@pytest.mark.django_db
+def test_check_heartbeats_query_count(
+    make_organization,
+    make_alert_receive_channel,
+    make_integration_heartbeat,
+    django_capture_on_commit_callbacks,
+):
+    organization = make_organization()
+    last_heartbeat_time = timezone.now() - timezone.timedelta(minutes=10)
+    alert_receive_channels = [make_alert_receive_channel(organization) for _ in range(5)]
+    for alert_receive_channel in alert_receive_channels:
+        make_integration_heartbeat(alert_receive_channel, 60, last_heartbeat_time=last_heartbeat_time)
+    # not enabled heartbeats are never selected
+    make_integration_heartbeat(make_alert_receive_channel(organization), 0, last_heartbeat_time=last_heartbeat_time)
+    make_integration_heartbeat(make_alert_receive_channel(organization), 60, last_heartbeat_time=None)
+
+    with patch.object(create_alert, "apply_async") as mock_create_alert_apply_async:
+        with django_capture_on_commit_callbacks(execute=True):
+            with CaptureQueriesContext(connection) as context:
+                result = check_heartbeats()
+    # select expired heartbeats, their integrations, update them and select restored heartbeats (+ savepoints)
+    queries = [q["sql"] for q in context.captured_queries if "SAVEPOINT" not in q["sql"]]
+    assert len(queries) == 4
+    assert result == "Found 5 expired and 0 restored heartbeats"
+    assert sorted(
+        call.kwargs["kwargs"]["alert_receive_channel_pk"] for call in mock_create_alert_apply_async.call_args_list
+    ) == sorted(alert_receive_channel.pk for alert_receive_channel in alert_receive_channels)
+
+
+@pytest.mark.django_db
+def test_process_heartbeat_task_sets_expires_at(
+    make_organization, make_alert_receive_channel, make_integration_heartbeat
+):
+    organization = make_organization()
+    integration_heartbeat = make_integration_heartbeat(make_alert_receive_channel(organization), 60)
+    disabled_integration_heartbeat = make_integration_heartbeat(make_alert_receive_channel(organization), 0)
+    assert integration_heartbeat.expires_at is None
+
+    for heartbeat in (integration_heartbeat, disabled_integration_heartbeat):
+        process_heartbeat_task(heartbeat.alert_receive_channel_id)
+        heartbeat.refresh_from_db()
+        assert heartbeat.last_heartbeat_time is not None
+
+    assert integration_heartbeat.expires_at == integration_heartbeat.last_heartbeat_time + timezone.timedelta(
+        seconds=60
+    )
+    assert disabled_integration_heartbeat.expires_at is None
@@ -0,0 +1,286 @@
+import threading
+import time
+import typing
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.db.models import DEFERRED
+
+if typing.TYPE_CHECKING:
+    from apps.alerts.models import AlertReceiveChannel
+    from apps.user_management.models import Organization
+
+ALERT_RECEIVE_CHANNEL_CACHE_KEY = "integration_token_{token}"
+ORGANIZATION_FLAGS_CACHE_KEY = "integration_organization_flags_{organization_id}"
+# entries are deleted on integration/organization save, timeout only limits the size of the cache
+SHARED_CACHE_TIMEOUT = 60 * 60  # 1 hour
+
+# Copies of the entries used to consume alerts when the database is not available. They are never expired,
+# they are cached once by the populate_integration_tokens_db_fallback task and then updated on integration/organization
+# save and delete (and on database lookups).
+ALERT_RECEIVE_CHANNEL_DB_FALLBACK_CACHE_KEY = "integration_token_db_fallback_{token}"
+ORGANIZATION_FLAGS_DB_FALLBACK_CACHE_KEY = "integration_organization_flags_db_fallback_{organization_id}"
+# set once all the integrations are cached, after that tokens missing in the fallback are considered unknown
+DB_FALLBACK_POPULATED_CACHE_KEY = "integration_tokens_db_fallback_populated"
+DB_FALLBACK_POPULATE_BATCH_SIZE = 1000
+# entries of other processes can't be deleted on save, so they are kept in memory only for a short time
+LOCAL_CACHE_TIMEOUT = 5
+
+
+class OrganizationFlags(typing.TypedDict):
+    is_moved: bool
+    is_deleted: bool
+    # used to forward requests of moved organizations without loading the region when the DB is not available
+    migration_destination_backend_url: str | None
+
+
+class ResolvedAlertReceiveChannel(typing.NamedTuple):
+    alert_receive_channel: "AlertReceiveChannel"
+    organization_flags: OrganizationFlags
+
+
+def get_alert_receive_channel_cache_key(token: str) -> str:
+    return ALERT_RECEIVE_CHANNEL_CACHE_KEY.format(token=token)
+
+
+def get_organization_flags_cache_key(organization_id: int) -> str:
+    return ORGANIZATION_FLAGS_CACHE_KEY.format(organization_id=organization_id)
+
+
+def get_alert_receive_channel_db_fallback_cache_key(token: str) -> str:
+    return ALERT_RECEIVE_CHANNEL_DB_FALLBACK_CACHE_KEY.format(token=token)
+
+
+def get_organization_flags_db_fallback_cache_key(organization_id: int) -> str:
+    return ORGANIZATION_FLAGS_DB_FALLBACK_CACHE_KEY.format(organization_id=organization_id)
+
+
+def get_alert_receive_channel_field_names() -> typing.List[str]:
+    """
+    All the concrete fields of integration are cached, so alert creation doesn't load deferred fields one by one
+    (templates, maintenance fields, etc.)
+    """
+    from apps.alerts.models import AlertReceiveChannel
+
+    return [field.attname for field in AlertReceiveChannel._meta.concrete_fields]
+
+
+def get_alert_receive_channel_fields(alert_receive_channel: "AlertReceiveChannel") -> dict[str, typing.Any]:
+    return {field: getattr(alert_receive_channel, field) for field in get_alert_receive_channel_field_names()}
+
+
+def get_organization_flags(organization: "Organization") -> OrganizationFlags:
+    return {
+        "is_moved": organization.is_moved,
+        "is_deleted": organization.deleted_at is not None,
+        "migration_destination_backend_url": (
+            organization.migration_destination.oncall_backend_url if organization.is_moved else None
+        ),
+    }
+
+
+def build_moved_organization(organization_id: int, organization_flags: OrganizationFlags) -> "Organization":
+    """
+    Build organization instance for OrganizationMovedException without database queries.
+    """
+    from apps.user_management.models import Organization, Region
+
+    return Organization(
+        pk=organization_id,
+        migration_destination=Region(oncall_backend_url=organization_flags.get("migration_destination_backend_url")),
+    )
+
+
+def build_alert_receive_channel(fields: dict[str, typing.Any]) -> "AlertReceiveChannel":
+    """
+    Build integration instance from the cached fields.
+    Fields missing in the cache entry (e.g. added after the entry was cached) are deferred.
+    """
+    from apps.alerts.models import AlertReceiveChannel
+
+    concrete_fields = AlertReceiveChannel._meta.concrete_fields
+    return AlertReceiveChannel.from_db(
+        router.db_for_read(AlertReceiveChannel),
+        [field.attname for field in concrete_fields],
+        [fields.get(field.attname, DEFERRED) for field in concrete_fields],
+    )
+
+
+class AlertReceiveChannelResolver:
+    """
+    Resolves integration tokens of inbound requests to integrations.
+    Lookups go through an in-process LRU with a short TTL, then through a cache entry with the integration fields,
+    and only then to the database. Both cache tiers are invalidated on integration/organization save.
+    """
+
+    def __init__(self, maxsize: int, ttl: int) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # token -> (expires at, integration fields, organization flags)
+        self._entries: OrderedDict[str, typing.Tuple[float, dict[str, typing.Any], OrganizationFlags]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, token: str) -> ResolvedAlertReceiveChannel:
+        """
+        Raises AlertReceiveChannel.DoesNotExist if there is no integration with the token.
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(token)
+                _, fields, organization_flags = entry
+                return ResolvedAlertReceiveChannel(build_alert_receive_channel(fields), organization_flags)
+
+        fields = cache.get(get_alert_receive_channel_cache_key(token))
+        organization_flags = None
+        if fields is not None:
+            organization_flags = cache.get(get_organization_flags_cache_key(fields["organization_id"]))
+        if fields is None or organization_flags is None:
+            fields, organization_flags = self._load_from_db(token)
+
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[token] = (time.monotonic() + self.ttl, fields, organization_flags)
+                self._entries.move_to_end(token)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return ResolvedAlertReceiveChannel(build_alert_receive_channel(fields), organization_flags)
+
+    @staticmethod
+    def resolve_from_db_fallback(token: str) -> ResolvedAlertReceiveChannel | None:
+        """
+        Resolve token when the database is not available, returns None if the token is unknown.
+        """
+        fields = cache.get(get_alert_receive_channel_db_fallback_cache_key(token))
+        if fields is None:
+            return None
+        organization_flags = cache.get(
+            get_organization_flags_db_fallback_cache_key(fields["organization_id"]),
+            {"is_moved": False, "is_deleted": False, "migration_destination_backend_url": None},
+        )
+        return ResolvedAlertReceiveChannel(build_alert_receive_channel(fields), organization_flags)
+
+    @staticmethod
+    def is_db_fallback_populated() -> bool:
+        return bool(cache.get(DB_FALLBACK_POPULATED_CACHE_KEY))
+
+    @staticmethod
+    def _load_from_db(token: str) -> typing.Tuple[dict[str, typing.Any], OrganizationFlags]:
+        from apps.alerts.models import AlertReceiveChannel
+
+        fields = AlertReceiveChannelResolver._values_with_organization_flags(
+            AlertReceiveChannel.objects.filter(token=token)
+        ).get()
+        organization_flags = AlertReceiveChannelResolver._pop_organization_flags(fields)
+        cache.set_many(
+            {
+                get_alert_receive_channel_cache_key(token): fields,
+                get_organization_flags_cache_key(fields["organization_id"]): organization_flags,
+            },
+            timeout=SHARED_CACHE_TIMEOUT,
+        )
+        cache.set_many(
+            {
+                get_alert_receive_channel_db_fallback_cache_key(token): fields,
+                get_organization_flags_db_fallback_cache_key(fields["organization_id"]): organization_flags,
+            },
+            timeout=None,
+        )
+        return fields, organization_flags
+
+    @staticmethod
+    def _values_with_organization_flags(queryset):
+        return queryset.values(
+            *get_alert_receive_channel_field_names(),
+            "organization__migration_destination_id",
+            "organization__migration_destination__oncall_backend_url",
+            "organization__deleted_at",
+        )
+
+    @staticmethod
+    def _pop_organization_flags(fields: dict[str, typing.Any]) -> OrganizationFlags:
+        return {
+            "is_moved": fields.pop("organization__migration_destination_id") is not None,
+            "is_deleted": fields.pop("organization__deleted_at") is not None,
+            "migration_destination_backend_url": fields.pop("organization__migration_destination__oncall_backend_url"),
+        }
+
+    @staticmethod
+    def populate_db_fallback() -> None:
+        """
+        Cache all integrations for the DB outage fallback, if they were not cached yet.
+        Runs once in the populate_integration_tokens_db_fallback task, after that the entries are only updated
+        on integration/organization save and delete. Entries already cached on save are not overwritten.
+        """
+        from apps.alerts.models import AlertReceiveChannel
+
+        if AlertReceiveChannelResolver.is_db_fallback_populated():
+            return
+
+        queryset = AlertReceiveChannelResolver._values_with_organization_flags(AlertReceiveChannel.objects.all())
+        for fields in queryset.iterator(chunk_size=DB_FALLBACK_POPULATE_BATCH_SIZE):
+            organization_flags = AlertReceiveChannelResolver._pop_organization_flags(fields)
+            cache.add(get_alert_receive_channel_db_fallback_cache_key(fields["token"]), fields, timeout=None)
+            cache.add(
+                get_organization_flags_db_fallback_cache_key(fields["organization_id"]),
+                organization_flags,
+                timeout=None,
+            )
+        cache.set(DB_FALLBACK_POPULATED_CACHE_KEY, True, timeout=None)
+
+    def invalidate_alert_receive_channel(self, token: str) -> None:
+        cache.delete(get_alert_receive_channel_cache_key(token))
+        with self._lock:
+            self._entries.pop(token, None)
+
+    @staticmethod
+    def update_alert_receive_channel_db_fallback(alert_receive_channel: "AlertReceiveChannel") -> None:
+        from apps.alerts.models import AlertReceiveChannel
+
+        # keep the same integrations as AlertReceiveChannel.objects
+        if (
+            alert_receive_channel.deleted_at is None
+            and alert_receive_channel.integration != AlertReceiveChannel.INTEGRATION_MAINTENANCE
+        ):
+            cache.set(
+                get_alert_receive_channel_db_fallback_cache_key(alert_receive_channel.token),
+                get_alert_receive_channel_fields(alert_receive_channel),
+                timeout=None,
+            )
+        else:
+            AlertReceiveChannelResolver.delete_alert_receive_channel_db_fallback(alert_receive_channel.token)
+
+    @staticmethod
+    def delete_alert_receive_channel_db_fallback(token: str) -> None:
+        cache.delete(get_alert_receive_channel_db_fallback_cache_key(token))
+
+    def invalidate_organization(self, organization_id: int) -> None:
+        cache.delete(get_organization_flags_cache_key(organization_id))
+        with self._lock:
+            for token in [
+                token for token, entry in self._entries.items() if entry[1]["organization_id"] == organization_id
+            ]:
+                del self._entries[token]
+
+    @staticmethod
+    def update_organization_db_fallback(organization: "Organization") -> None:
+        cache.set(
+            get_organization_flags_db_fallback_cache_key(organization.pk),
+            get_organization_flags(organization),
+            timeout=None,
+        )
+
+    @staticmethod
+    def delete_organization_db_fallback(organization_id: int) -> None:
+        cache.delete(get_organization_flags_db_fallback_cache_key(organization_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+alert_receive_channel_resolver = AlertReceiveChannelResolver(
+    maxsize=settings.INTEGRATION_TOKENS_CACHE_SIZE, ttl=LOCAL_CACHE_TIMEOUT
+)
@@ -10,6 +10,7 @@ from ratelimit.exceptions import Ratelimited
 from ratelimit.utils import is_ratelimited
 
 from apps.integrations.tasks import start_notify_about_integration_ratelimit
+from common.utils import timed_lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -84,18 +85,23 @@ def ratelimit(group=None, key=None, rate=None, method=ALL, block=False, reason=N
     return decorator
 
 
-def is_ratelimit_ignored(alert_receive_channel):
+@timed_lru_cache(timeout=5)
+def get_integration_tokens_to_ignore_ratelimit() -> frozenset[str]:
     from apps.base.models import DynamicSetting
 
-    integration_token_to_ignore_ratelimit = DynamicSetting.objects.get_or_create(
+    integration_token_to_ignore_ratelimit = DynamicSetting.objects.get_cached(
         name="integration_tokens_to_ignore_ratelimit",
         defaults={
             "json_value": [
                 "dummytoken_uniq_1213kj1h3",
             ]
         },
-    )[0]
-    return alert_receive_channel.token in integration_token_to_ignore_ratelimit.json_value
+    )
+    return frozenset(integration_token_to_ignore_ratelimit.json_value)
+
+
+def is_ratelimit_ignored(alert_receive_channel):
+    return alert_receive_channel.token in get_integration_tokens_to_ignore_ratelimit()
 
 
 class RateLimitMixin(ABC, View):
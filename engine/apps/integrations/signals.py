@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.alerts.models import AlertReceiveChannel
+from apps.user_management.models import Organization
+
+from .alert_receive_channel_resolver import alert_receive_channel_resolver
+
+# Cache entries are invalidated once again on commit, so an entry cached by another process before the commit
+# doesn't survive. DB fallback entries are updated on commit only, so they never have uncommitted changes.
+
+
+@receiver(post_save, sender=AlertReceiveChannel)
+def update_resolved_alert_receive_channel(sender, instance: AlertReceiveChannel, **kwargs) -> None:
+    token = instance.token
+    alert_receive_channel_resolver.invalidate_alert_receive_channel(token)
+
+    def _on_commit():
+        alert_receive_channel_resolver.invalidate_alert_receive_channel(token)
+        alert_receive_channel_resolver.update_alert_receive_channel_db_fallback(instance)
+
+    transaction.on_commit(_on_commit)
+
+
+@receiver(post_delete, sender=AlertReceiveChannel)
+def delete_resolved_alert_receive_channel(sender, instance: AlertReceiveChannel, **kwargs) -> None:
+    token = instance.token
+    alert_receive_channel_resolver.invalidate_alert_receive_channel(token)
+
+    def _on_commit():
+        alert_receive_channel_resolver.invalidate_alert_receive_channel(token)
+        alert_receive_channel_resolver.delete_alert_receive_channel_db_fallback(token)
+
+    transaction.on_commit(_on_commit)
+
+
+@receiver(post_save, sender=Organization)
+def update_resolved_organization_flags(sender, instance: Organization, **kwargs) -> None:
+    organization_id = instance.pk
+    alert_receive_channel_resolver.invalidate_organization(organization_id)
+
+    def _on_commit():
+        alert_receive_channel_resolver.invalidate_organization(organization_id)
+        alert_receive_channel_resolver.update_organization_db_fallback(instance)
+
+    transaction.on_commit(_on_commit)
+
+
+@receiver(post_delete, sender=Organization)
+def delete_resolved_organization_flags(sender, instance: Organization, **kwargs) -> None:
+    organization_id = instance.pk
+    alert_receive_channel_resolver.invalidate_organization(organization_id)
+
+    def _on_commit():
+        alert_receive_channel_resolver.invalidate_organization(organization_id)
+        alert_receive_channel_resolver.delete_organization_db_fallback(organization_id)
+
+    transaction.on_commit(_on_commit)
@@ -1,12 +1,11 @@
 import logging
-import random
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
+from celery.utils.time import get_exponential_backoff_interval
 from django.conf import settings
 from django.core.cache import cache
 
-from apps.alerts.models.alert_group_counter import ConcurrentUpdateError
 from apps.alerts.tasks import resolve_alert_group_by_source_if_needed
 from apps.slack.client import SlackClient
 from apps.slack.errors import SlackAPIError
@@ -16,6 +15,9 @@ from common.custom_celery_tasks.create_alert_base_task import CreateAlertBaseTas
 logger = get_task_logger(__name__)
 logger.setLevel(logging.DEBUG)
 
+POPULATE_DB_FALLBACK_LOCK_CACHE_KEY = "populate_integration_tokens_db_fallback_lock"
+POPULATE_DB_FALLBACK_LOCK_TIMEOUT = 60 * 30
+
 
 @shared_task(
     base=CreateAlertBaseTask,
@@ -34,26 +36,18 @@ def create_alertmanager_alerts(alert_receive_channel_pk, alert, is_demo=False, f
         logger.info("AlertReceiveChannel alert ignored if deleted/maintenance")
         return
 
-    try:
-        alert = Alert.create(
-            title=None,
-            message=None,
-            image_url=None,
-            link_to_upstream_details=None,
-            alert_receive_channel=alert_receive_channel,
-            integration_unique_data=None,
-            raw_request_data=alert,
-            enable_autoresolve=False,
-            is_demo=is_demo,
-            force_route_id=force_route_id,
-        )
-    except ConcurrentUpdateError:
-        # This error is raised when there are concurrent updates on AlertGroupCounter due to optimistic lock on it.
-        # The idea is to not block the worker with a database lock and retry the task in case of concurrent updates.
-        countdown = random.randint(1, 10)
-        create_alertmanager_alerts.apply_async((alert_receive_channel_pk, alert), countdown=countdown)
-        logger.warning(f"Retrying the task gracefully in {countdown} seconds due to ConcurrentUpdateError")
-        return
+    alert = Alert.create(
+        title=None,
+        message=None,
+        image_url=None,
+        link_to_upstream_details=None,
+        alert_receive_channel=alert_receive_channel,
+        integration_unique_data=None,
+        raw_request_data=alert,
+        enable_autoresolve=False,
+        is_demo=is_demo,
+        force_route_id=force_route_id,
+    )
 
     if alert_receive_channel.allow_source_based_resolving:
         alert_group = alert.group
@@ -65,6 +59,96 @@ def create_alertmanager_alerts(alert_receive_channel_pk, alert, is_demo=False, f
     logger.info(f"Created alert {alert.pk} for alert group {alert.group.pk}")
 
 
+@shared_task(
+    base=CreateAlertBaseTask,
+    bind=True,
+    max_retries=1 if settings.DEBUG else None,
+)
+def create_alertmanager_alerts_batch(self, alert_receive_channel_pk, alerts, is_demo=False):
+    """
+    Batch version of create_alertmanager_alerts, creates alerts for all the alerts of one AlertManager payload.
+    Group data is rendered and routes are selected for the whole batch before creating alerts,
+    channel filters and open alert groups are fetched with one query each.
+    """
+    from apps.alerts.models import Alert, AlertGroup, AlertReceiveChannel, ChannelFilter
+    from apps.alerts.routing import routing_tables_cache
+
+    alert_receive_channel = AlertReceiveChannel.objects_with_deleted.get(pk=alert_receive_channel_pk)
+    if (
+        alert_receive_channel.deleted_at is not None
+        or alert_receive_channel.integration == AlertReceiveChannel.INTEGRATION_MAINTENANCE
+    ):
+        logger.info("AlertReceiveChannel alerts batch ignored if deleted/maintenance")
+        return
+
+    routing_table = routing_tables_cache.get(alert_receive_channel.pk)
+    prepared_alerts = [
+        (
+            alert,
+            Alert.render_group_data(alert_receive_channel, alert, is_demo),
+            routing_table.select_route_id(alert),
+        )
+        for alert in alerts
+    ]
+
+    channel_filters = ChannelFilter.objects.filter(alert_receive_channel=alert_receive_channel).in_bulk(
+        {channel_filter_id for _, _, channel_filter_id in prepared_alerts if channel_filter_id is not None}
+    )
+    open_alert_groups = {
+        (alert_group.channel_filter_id, alert_group.distinction): alert_group
+        for alert_group in AlertGroup.objects.filter(
+            channel=alert_receive_channel,
+            is_open_for_grouping__isnull=False,
+            distinction__in={group_data.group_distinction for _, group_data, _ in prepared_alerts},
+        )
+    }
+
+    alert_groups = {}
+    for i, (alert, group_data, channel_filter_id) in enumerate(prepared_alerts):
+        channel_filter = channel_filters.get(channel_filter_id)
+        grouping_key = (channel_filter_id, group_data.group_distinction)
+        open_alert_group = open_alert_groups.get(grouping_key)
+        if open_alert_group is not None and not open_alert_group.is_open_for_grouping:
+            # the group was resolved by a previous alert in the batch
+            open_alert_group = None
+
+        try:
+            created_alert = Alert.create(
+                title=None,
+                message=None,
+                image_url=None,
+                link_to_upstream_details=None,
+                alert_receive_channel=alert_receive_channel,
+                integration_unique_data=None,
+                raw_request_data=alert,
+                enable_autoresolve=False,
+                is_demo=is_demo,
+                channel_filter=channel_filter,
+                group_data=group_data,
+                open_alert_group=open_alert_group,
+            )
+        except Exception as e:
+            # retry only alerts which are not created yet to not duplicate them
+            countdown = get_exponential_backoff_interval(
+                factor=1, retries=self.request.retries, maximum=600, full_jitter=True
+            )
+            raise self.retry(
+                args=(alert_receive_channel_pk, alerts[i:]), kwargs={"is_demo": is_demo}, exc=e, countdown=countdown
+            )
+
+        alert_group = created_alert.group
+        open_alert_groups[grouping_key] = alert_group
+        alert_groups[alert_group.pk] = alert_group
+        logger.info(f"Created alert {created_alert.pk} for alert group {alert_group.pk}")
+
+    if alert_receive_channel.allow_source_based_resolving:
+        for alert_group in alert_groups.values():
+            if alert_group.resolved_by != alert_group.NOT_YET_STOP_AUTORESOLVE:
+                task = resolve_alert_group_by_source_if_needed.apply_async((alert_group.pk,), countdown=5)
+                alert_group.active_resolve_calculation_id = task.id
+                alert_group.save(update_fields=["active_resolve_calculation_id"])
+
+
 @shared_task(
     base=CreateAlertBaseTask,
     autoretry_for=(Exception,),
@@ -92,36 +176,18 @@ def create_alert(
     if image_url is not None:
         image_url = str(image_url)[:299]
 
-    try:
-        alert = Alert.create(
-            title=title,
-            message=message,
-            image_url=image_url,
-            link_to_upstream_details=link_to_upstream_details,
-            alert_receive_channel=alert_receive_channel,
-            integration_unique_data=integration_unique_data,
-            raw_request_data=raw_request_data,
-            force_route_id=force_route_id,
-            is_demo=is_demo,
-        )
-        logger.info(f"Created alert {alert.pk} for alert group {alert.group.pk}")
-    except ConcurrentUpdateError:
-        # This error is raised when there are concurrent updates on AlertGroupCounter due to optimistic lock on it.
-        # The idea is to not block the worker with a database lock and retry the task in case of concurrent updates.
-        countdown = random.randint(1, 10)
-        create_alert.apply_async(
-            (
-                title,
-                message,
-                image_url,
-                link_to_upstream_details,
-                alert_receive_channel_pk,
-                integration_unique_data,
-                raw_request_data,
-            ),
-            countdown=countdown,
-        )
-        logger.warning(f"Retrying the task gracefully in {countdown} seconds due to ConcurrentUpdateError")
+    alert = Alert.create(
+        title=title,
+        message=message,
+        image_url=image_url,
+        link_to_upstream_details=link_to_upstream_details,
+        alert_receive_channel=alert_receive_channel,
+        integration_unique_data=integration_unique_data,
+        raw_request_data=raw_request_data,
+        force_route_id=force_route_id,
+        is_demo=is_demo,
+    )
+    logger.info(f"Created alert {alert.pk} for alert group {alert.group.pk}")
 
 
 @shared_dedicated_queue_retry_task()
@@ -162,3 +228,20 @@ def notify_about_integration_ratelimit_in_slack(organization_id, text, **kwargs)
                 sc.chat_postMessage(channel=organization.general_log_channel_id, text=text, team=slack_team_identity)
             except SlackAPIError as e:
                 logger.warning(f"Slack exception {e} while sending message for organization {organization_id}")
+
+
+@shared_dedicated_queue_retry_task()
+def populate_integration_tokens_db_fallback():
+    """
+    Cache all integrations for the DB outage fallback, started by the startup probe if they were not cached yet.
+    """
+    from apps.integrations.alert_receive_channel_resolver import alert_receive_channel_resolver
+
+    # startup probes of all the pods start the task, only one of them does the work
+    if not cache.add(POPULATE_DB_FALLBACK_LOCK_CACHE_KEY, True, timeout=POPULATE_DB_FALLBACK_LOCK_TIMEOUT):
+        logger.info("populate_integration_tokens_db_fallback: already running")
+        return
+    try:
+        alert_receive_channel_resolver.populate_db_fallback()
+    finally:
+        cache.delete(POPULATE_DB_FALLBACK_LOCK_CACHE_KEY)
@@ -0,0 +1,229 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.alerts.models import AlertReceiveChannel
+from apps.integrations.alert_receive_channel_resolver import (
+    AlertReceiveChannelResolver,
+    alert_receive_channel_resolver,
+    get_alert_receive_channel_db_fallback_cache_key,
+)
+from apps.integrations.tasks import populate_integration_tokens_db_fallback
+from apps.user_management.models import Organization
+
+
+@pytest.mark.django_db
+def test_resolve_alert_receive_channel_from_cache(
+    make_organization, make_alert_receive_channel, django_assert_num_queries
+):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    resolver = AlertReceiveChannelResolver(maxsize=10, ttl=60)
+
+    with django_assert_num_queries(1):
+        resolved = resolver.resolve(alert_receive_channel.token)
+    assert resolved.alert_receive_channel.pk == alert_receive_channel.pk
+    assert resolved.organization_flags == {
+        "is_moved": False,
+        "is_deleted": False,
+        "migration_destination_backend_url": None,
+    }
+
+    # another process resolves the token from the shared cache
+    other_process_resolver = AlertReceiveChannelResolver(maxsize=10, ttl=60)
+    with django_assert_num_queries(0):
+        resolved = other_process_resolver.resolve(alert_receive_channel.token)
+        assert resolved.alert_receive_channel.pk == alert_receive_channel.pk
+        assert resolved.alert_receive_channel.organization_id == organization.pk
+        assert resolved.alert_receive_channel.integration == alert_receive_channel.integration
+        assert resolved.alert_receive_channel.verbal_name == alert_receive_channel.verbal_name
+
+    # the same process resolves the token from memory
+    with patch("apps.integrations.alert_receive_channel_resolver.cache.get") as mock_cache_get:
+        with django_assert_num_queries(0):
+            resolved = resolver.resolve(alert_receive_channel.token)
+    assert not mock_cache_get.called
+    assert resolved.alert_receive_channel.token == alert_receive_channel.token
+
+    # all the fields are cached, so accessing them doesn't make queries
+    with django_assert_num_queries(0):
+        for field in AlertReceiveChannel._meta.concrete_fields:
+            assert getattr(resolved.alert_receive_channel, field.attname) == getattr(
+                alert_receive_channel, field.attname
+            )
+
+
+@pytest.mark.django_db
+def test_resolve_alert_receive_channel_invalidated_on_save(
+    make_organization, make_alert_receive_channel, django_assert_num_queries
+):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization, verbal_name="old name")
+    token = alert_receive_channel.token
+
+    assert alert_receive_channel_resolver.resolve(token).alert_receive_channel.verbal_name == "old name"
+
+    alert_receive_channel.verbal_name = "new name"
+    alert_receive_channel.save()
+    with django_assert_num_queries(1):
+        resolved = alert_receive_channel_resolver.resolve(token)
+    assert resolved.alert_receive_channel.verbal_name == "new name"
+
+    organization.deleted_at = timezone.now()
+    organization.save()
+    assert alert_receive_channel_resolver.resolve(token).organization_flags["is_deleted"]
+
+    alert_receive_channel.delete()
+    with pytest.raises(AlertReceiveChannel.DoesNotExist):
+        alert_receive_channel_resolver.resolve(token)
+
+
+@patch("apps.integrations.views.create_alert")
+@pytest.mark.django_db
+def test_integration_endpoint_resolves_token_from_cache(
+    mock_create_alert, make_organization, make_alert_receive_channel
+):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(
+        organization, integration=AlertReceiveChannel.INTEGRATION_WEBHOOK
+    )
+    url = reverse(
+        "integrations:universal",
+        kwargs={"integration_type": "webhook", "alert_channel_key": alert_receive_channel.token},
+    )
+    client = APIClient()
+
+    response = client.post(url, {"foo": "bar"}, format="json")
+    assert response.status_code == status.HTTP_200_OK
+
+    # token is resolved without integration and organization queries
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(url, {"foo": "bar"}, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    tables = (AlertReceiveChannel._meta.db_table, Organization._meta.db_table)
+    assert not [query for query in queries.captured_queries if any(table in query["sql"] for table in tables)]
+    assert mock_create_alert.apply_async.call_count == 2
+
+    organization.deleted_at = timezone.now()
+    organization.save()
+    response = client.post(url, {"foo": "bar"}, format="json")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@patch("apps.integrations.views.create_alert")
+@pytest.mark.django_db
+def test_integration_endpoint_db_fallback(
+    mock_create_alert,
+    make_organization,
+    make_alert_receive_channel,
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        organization = make_organization()
+        alert_receive_channel = make_alert_receive_channel(
+            organization, integration=AlertReceiveChannel.INTEGRATION_WEBHOOK
+        )
+    url = reverse(
+        "integrations:universal",
+        kwargs={"integration_type": "webhook", "alert_channel_key": alert_receive_channel.token},
+    )
+    client = APIClient()
+
+    with patch.object(alert_receive_channel_resolver, "resolve", side_effect=OperationalError):
+        response = client.post(url, {"foo": "bar"}, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_create_alert.apply_async.call_args.args[1]["alert_receive_channel_pk"] == alert_receive_channel.pk
+
+        with django_capture_on_commit_callbacks(execute=True):
+            organization.deleted_at = timezone.now()
+            organization.save()
+        response = client.post(url, {"foo": "bar"}, format="json")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        with django_capture_on_commit_callbacks(execute=True):
+            alert_receive_channel.delete()
+        # integrations have never been cached, the sender should retry
+        with pytest.raises(OperationalError):
+            client.post(url, {"foo": "bar"}, format="json")
+
+        # unknown token after all the integrations are cached
+        alert_receive_channel_resolver.populate_db_fallback()
+        response = client.post(url, {"foo": "bar"}, format="json")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@patch("apps.user_management.middlewares.OrganizationMovedMiddleware.make_request")
+@pytest.mark.django_db
+def test_integration_endpoint_db_fallback_organization_moved(
+    mocked_make_request,
+    make_organization_and_region,
+    make_alert_receive_channel,
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        organization, region = make_organization_and_region()
+        organization.save()
+        alert_receive_channel = make_alert_receive_channel(
+            organization, integration=AlertReceiveChannel.INTEGRATION_WEBHOOK
+        )
+    url = reverse(
+        "integrations:universal",
+        kwargs={"integration_type": "webhook", "alert_channel_key": alert_receive_channel.token},
+    )
+    mocked_make_request.return_value = HttpResponse("Redirected", status=status.HTTP_200_OK)
+
+    with patch.object(alert_receive_channel_resolver, "resolve", side_effect=OperationalError):
+        response = APIClient().post(url, {"foo": "bar"}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert mocked_make_request.call_args.args[1].startswith(region.oncall_backend_url)
+
+
+@pytest.mark.django_db
+def test_populate_db_fallback(
+    make_organization, make_alert_receive_channel, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    organization = make_organization()
+    alert_receive_channels = [make_alert_receive_channel(organization) for _ in range(3)]
+
+    # entries cached on save are not overwritten
+    cache.set(get_alert_receive_channel_db_fallback_cache_key(alert_receive_channels[0].token), {"id": -1})
+    # the startup probe caches integrations in a background task
+    with patch.object(populate_integration_tokens_db_fallback, "delay") as mock_delay:
+        response = APIClient().get("/startupprobe/")
+    assert response.status_code == status.HTTP_200_OK
+    mock_delay.assert_called_once_with()
+
+    assert not alert_receive_channel_resolver.is_db_fallback_populated()
+    with django_assert_num_queries(1):
+        populate_integration_tokens_db_fallback()
+    assert alert_receive_channel_resolver.is_db_fallback_populated()
+    assert cache.get(get_alert_receive_channel_db_fallback_cache_key(alert_receive_channels[0].token)) == {"id": -1}
+    cache.delete(get_alert_receive_channel_db_fallback_cache_key(alert_receive_channels[0].token))
+
+    # integrations are cached once, after that they are updated on save
+    with django_assert_num_queries(0):
+        populate_integration_tokens_db_fallback()
+    with django_capture_on_commit_callbacks(execute=True):
+        alert_receive_channels[0].save()
+    with patch.object(populate_integration_tokens_db_fallback, "delay") as mock_delay:
+        APIClient().get("/startupprobe/")
+    mock_delay.assert_not_called()
+
+    for alert_receive_channel in alert_receive_channels:
+        resolved = alert_receive_channel_resolver.resolve_from_db_fallback(alert_receive_channel.token)
+        assert resolved.alert_receive_channel.pk == alert_receive_channel.pk
+        assert resolved.organization_flags == {
+            "is_moved": False,
+            "is_deleted": False,
+            "migration_destination_backend_url": None,
+        }
+    assert alert_receive_channel_resolver.resolve_from_db_fallback("unknown-token") is None
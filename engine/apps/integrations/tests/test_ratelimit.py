@@ -6,6 +6,8 @@ from django.test import Client
 from django.urls import reverse
 
 from apps.alerts.models import AlertReceiveChannel
+from apps.base.models import DynamicSetting
+from apps.integrations.mixins.ratelimit_mixin import get_integration_tokens_to_ignore_ratelimit
 
 
 @pytest.fixture(autouse=True)
@@ -96,3 +98,32 @@ def test_ratelimit_integration_heartbeats(
 
     response = c.get(url)
     assert response.status_code == 429
+
+
+@mock.patch("ratelimit.utils._split_rate", return_value=(1, 60))
+@mock.patch("apps.integrations.tasks.create_alert.apply_async", return_value=None)
+@pytest.mark.django_db
+def test_ratelimit_ignored_integration(
+    mocked_task,
+    mocked_rate,
+    make_organization,
+    make_alert_receive_channel,
+):
+    organization = make_organization()
+    integration = make_alert_receive_channel(organization, integration=AlertReceiveChannel.INTEGRATION_WEBHOOK)
+    DynamicSetting.objects.create(name="integration_tokens_to_ignore_ratelimit", json_value=[integration.token])
+    get_integration_tokens_to_ignore_ratelimit.cache_clear()
+
+    url = reverse(
+        "integrations:universal",
+        kwargs={"integration_type": AlertReceiveChannel.INTEGRATION_WEBHOOK, "alert_channel_key": integration.token},
+    )
+
+    c = Client()
+
+    for _ in range(3):
+        response = c.post(url, data={"message": "This is the test alert from amixr"})
+        assert response.status_code == 200
+
+    assert mocked_task.call_count == 3
+    get_integration_tokens_to_ignore_ratelimit.cache_clear()
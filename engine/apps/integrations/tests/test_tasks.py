@@ -1,7 +1,9 @@
+from unittest.mock import patch
+
 import pytest
 
 from apps.alerts.models import Alert, AlertReceiveChannel
-from apps.integrations.tasks import create_alertmanager_alerts
+from apps.integrations.tasks import create_alertmanager_alerts, create_alertmanager_alerts_batch
 
 
 @pytest.mark.django_db
@@ -29,3 +31,71 @@ def test_create_alertmanager_alert_maintanance_task_no_alert_no_retry(
     create_alertmanager_alerts(integration.pk, {})
 
     assert Alert.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_create_alertmanager_alerts_batch_matches_per_alert_processing(
+    make_organization, make_alert_receive_channel, make_channel_filter
+):
+    organization = make_organization()
+
+    def _make_integration():
+        integration = make_alert_receive_channel(
+            organization, integration=AlertReceiveChannel.INTEGRATION_LEGACY_ALERTMANAGER
+        )
+        default_channel_filter = make_channel_filter(integration, is_default=True)
+        channel_filter = make_channel_filter(integration, filtering_term="production", is_default=False)
+        return integration, [default_channel_filter, channel_filter]
+
+    def _alert(instance, group, status):
+        return {"labels": {"instance": instance, "group": group}, "status": status}
+
+    alerts = [
+        _alert("localhost:8081", "production", "firing"),
+        _alert("localhost:8082", "canary", "firing"),
+        _alert("localhost:8081", "production", "firing"),
+        _alert("localhost:8081", "production", "resolved"),
+        _alert("localhost:8081", "production", "firing"),
+        _alert("localhost:8082", "canary", "resolved"),
+    ]
+
+    def _alert_groups_summary(integration, channel_filters):
+        return [
+            (
+                channel_filters.index(alert_group.channel_filter),
+                alert_group.resolved,
+                [alert.raw_request_data["status"] for alert in alert_group.alerts.order_by("pk")],
+            )
+            for alert_group in integration.alert_groups.order_by("pk")
+        ]
+
+    with patch("apps.integrations.tasks.resolve_alert_group_by_source_if_needed") as mock_resolve_task:
+        mock_resolve_task.apply_async.return_value.id = "task-id"
+        integration, channel_filters = _make_integration()
+        for alert in alerts:
+            create_alertmanager_alerts(integration.pk, alert)
+        assert mock_resolve_task.apply_async.call_count == len(alerts)
+
+        mock_resolve_task.reset_mock()
+        batch_integration, batch_channel_filters = _make_integration()
+        create_alertmanager_alerts_batch(batch_integration.pk, alerts)
+        # resolve calculation is started once per alert group
+        assert mock_resolve_task.apply_async.call_count == 2
+
+    expected_summary = _alert_groups_summary(integration, channel_filters)
+    assert _alert_groups_summary(batch_integration, batch_channel_filters) == expected_summary
+    assert expected_summary == [
+        (1, False, ["firing", "firing", "resolved", "firing"]),
+        (0, False, ["firing", "resolved"]),
+    ]
+
+
+@pytest.mark.django_db
+def test_create_alertmanager_alerts_batch_deleted_integration(make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    integration = make_alert_receive_channel(organization, integration=AlertReceiveChannel.INTEGRATION_ALERTMANAGER)
+    integration.delete()
+
+    create_alertmanager_alerts_batch(integration.pk, [{}, {}])
+
+    assert Alert.objects.count() == 0
@@ -152,6 +152,49 @@ def test_integration_grafana_endpoint_has_alerts(
     )
 
 
+@patch("apps.integrations.views.create_alertmanager_alerts")
+@patch("apps.integrations.views.create_alertmanager_alerts_batch")
+@pytest.mark.parametrize(
+    "integration_type,url_name",
+    [
+        (AlertReceiveChannel.INTEGRATION_GRAFANA, "integrations:grafana"),
+        (AlertReceiveChannel.INTEGRATION_LEGACY_ALERTMANAGER, "integrations:alertmanager"),
+        (AlertReceiveChannel.INTEGRATION_LEGACY_GRAFANA_ALERTING, "integrations:grafana_alerting"),
+    ],
+)
+@pytest.mark.django_db
+def test_integration_alertmanager_endpoint_batch_ingestion(
+    mock_create_alertmanager_alerts_batch,
+    mock_create_alertmanager_alerts,
+    settings,
+    make_organization_and_user,
+    make_alert_receive_channel,
+    integration_type,
+    url_name,
+):
+    settings.DEBUG = False
+    settings.FEATURE_ALERTMANAGER_BATCH_INGESTION_ENABLED = True
+
+    organization, user = make_organization_and_user()
+    alert_receive_channel = make_alert_receive_channel(
+        organization=organization,
+        author=user,
+        integration=integration_type,
+    )
+
+    client = APIClient()
+    url = reverse(url_name, kwargs={"alert_channel_key": alert_receive_channel.token})
+
+    data = {"alerts": [{"foo": i} for i in range(10)]}
+    response = client.post(url, data, format="json")
+    assert response.status_code == status.HTTP_200_OK
+
+    mock_create_alertmanager_alerts_batch.apply_async.assert_called_once_with(
+        (alert_receive_channel.pk, data["alerts"])
+    )
+    mock_create_alertmanager_alerts.apply_async.assert_not_called()
+
+
 @patch("apps.integrations.views.create_alert")
 @pytest.mark.parametrize(
     "integration_type",
@@ -11,6 +11,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from apps.alerts.models import AlertReceiveChannel
+from apps.heartbeat.coalescing import record_heartbeat
 from apps.heartbeat.tasks import process_heartbeat_task
 from apps.integrations.legacy_prefix import has_legacy_prefix
 from apps.integrations.mixins import (
@@ -20,12 +21,25 @@ from apps.integrations.mixins import (
     IntegrationRateLimitMixin,
     is_ratelimit_ignored,
 )
-from apps.integrations.tasks import create_alert, create_alertmanager_alerts
+from apps.integrations.tasks import create_alert, create_alertmanager_alerts, create_alertmanager_alerts_batch
 from common.api_helpers.utils import create_engine_url
 
 logger = logging.getLogger(__name__)
 
 
+def create_alertmanager_alerts_in_batch(alert_receive_channel, alerts):
+    """
+    Enqueue one task for all the alerts of AlertManager payload.
+    The request is rate limited once in dispatch, not for every alert in the payload.
+    """
+    if not alerts:
+        return
+    if settings.DEBUG:
+        create_alertmanager_alerts_batch(alert_receive_channel.pk, alerts)
+    else:
+        create_alertmanager_alerts_batch.apply_async((alert_receive_channel.pk, alerts))
+
+
 class AmazonSNS(BrowsableInstructionMixin, AlertChannelDefiningMixin, IntegrationRateLimitMixin, SNSEndpoint):
     @method_decorator(csrf_exempt)
     def dispatch(self, *args, **kwargs):
@@ -116,6 +130,10 @@ class AlertManagerAPIView(
         """
         process_v1 creates alerts from each alert in incoming AlertManager payload.
         """
+        if settings.FEATURE_ALERTMANAGER_BATCH_INGESTION_ENABLED:
+            create_alertmanager_alerts_in_batch(alert_receive_channel, request.data.get("alerts", []))
+            return
+
         for alert in request.data.get("alerts", []):
             if settings.DEBUG:
                 create_alertmanager_alerts(alert_receive_channel.pk, alert)
@@ -188,6 +206,10 @@ class GrafanaAPIView(
 
         # Grafana Alerting 9 has the same payload structure as AlertManager
         if "alerts" in request.data:
+            if settings.FEATURE_ALERTMANAGER_BATCH_INGESTION_ENABLED:
+                create_alertmanager_alerts_in_batch(alert_receive_channel, request.data.get("alerts", []))
+                return Response("Ok.")
+
             for alert in request.data.get("alerts", []):
                 if settings.DEBUG:
                     create_alertmanager_alerts(alert_receive_channel.pk, alert)
@@ -327,6 +349,9 @@ class IntegrationHeartBeatAPIView(AlertChannelDefiningMixin, IntegrationHeartBea
         return Response(status=200)
 
     def _process_heartbeat_signal(self, request, alert_receive_channel):
+        if settings.HEARTBEAT_COALESCING_ENABLED:
+            record_heartbeat(alert_receive_channel.pk)
+            return
         process_heartbeat_task.apply_async(
             (alert_receive_channel.pk,),
         )
@@ -17,6 +17,11 @@ class AlertGroupsTotalMetricsDict(typing.TypedDict):
     resolved: int
 
 
+class ResponseTimeHistogramDict(typing.TypedDict):
+    buckets: typing.Dict[str, int]  # cumulative, number of values less than or equal to the bucket upper bound
+    sum: int
+
+
 class AlertGroupsResponseTimeMetricsDict(typing.TypedDict):
     integration_name: str
     team_name: str
@@ -24,7 +29,7 @@ class AlertGroupsResponseTimeMetricsDict(typing.TypedDict):
     org_id: int
     slug: str
     id: int
-    response_time: list
+    response_time: ResponseTimeHistogramDict
 
 
 class UserWasNotifiedOfAlertGroupsMetricsDict(typing.TypedDict):
@@ -52,6 +57,7 @@ ALERT_GROUPS_TOTAL = "oncall_alert_groups_total"
 ALERT_GROUPS_RESPONSE_TIME = "oncall_alert_groups_response_time_seconds"
 
 METRICS_RESPONSE_TIME_CALCULATION_PERIOD = datetime.timedelta(days=7)
+METRICS_RESPONSE_TIME_BUCKETS = (60, 300, 600, 3600, "+Inf")  # seconds
 
 METRICS_CACHE_LIFETIME = 93600  # 26 hours. Should be higher than METRICS_RECALCULATE_CACHE_TIMEOUT
 
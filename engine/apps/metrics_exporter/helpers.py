@@ -1,3 +1,4 @@
+import bisect
 import datetime
 import random
 import typing
@@ -15,17 +16,21 @@ from apps.metrics_exporter.constants import (
     METRICS_ORGANIZATIONS_IDS_CACHE_TIMEOUT,
     METRICS_RECALCULATION_CACHE_TIMEOUT,
     METRICS_RECALCULATION_CACHE_TIMEOUT_DISPERSE,
+    METRICS_RESPONSE_TIME_BUCKETS,
     METRICS_RESPONSE_TIME_CALCULATION_PERIOD,
     USER_WAS_NOTIFIED_OF_ALERT_GROUPS,
     AlertGroupsResponseTimeMetricsDict,
     AlertGroupsTotalMetricsDict,
     RecalculateMetricsTimer,
+    ResponseTimeHistogramDict,
     UserWasNotifiedOfAlertGroupsMetricsDict,
 )
 
 if typing.TYPE_CHECKING:
     from apps.alerts.models import AlertReceiveChannel
 
+RESPONSE_TIME_BUCKETS_UPPER_BOUNDS = [float(bucket) for bucket in METRICS_RESPONSE_TIME_BUCKETS]
+
 
 def get_organization_ids_from_db():
     from apps.alerts.models import AlertReceiveChannel
@@ -77,6 +82,43 @@ def get_response_time_period() -> datetime.datetime:
     return timezone.now() - METRICS_RESPONSE_TIME_CALCULATION_PERIOD
 
 
+def get_default_response_time_histogram() -> ResponseTimeHistogramDict:
+    return {
+        "buckets": {str(bucket): 0 for bucket in METRICS_RESPONSE_TIME_BUCKETS},
+        "sum": 0,
+    }
+
+
+def update_response_time_histogram(
+    histogram: ResponseTimeHistogramDict, response_time_seconds_values: typing.Iterable[int]
+) -> ResponseTimeHistogramDict:
+    """
+    Add response time values to the histogram.
+    Values are not stored, so the size of the histogram doesn't depend on the number of alert groups.
+    """
+    # count values per bucket with a binary search, then add counts to the cumulative buckets once
+    bucket_counts = [0] * len(METRICS_RESPONSE_TIME_BUCKETS)
+    for value in response_time_seconds_values:
+        bucket_counts[bisect.bisect_left(RESPONSE_TIME_BUCKETS_UPPER_BOUNDS, value)] += 1
+        histogram["sum"] += value
+
+    cumulative_count = 0
+    for bucket, count in zip(METRICS_RESPONSE_TIME_BUCKETS, bucket_counts):
+        cumulative_count += count
+        histogram["buckets"][str(bucket)] += cumulative_count
+    return histogram
+
+
+def get_response_time_histogram(response_time) -> ResponseTimeHistogramDict:
+    """
+    Returns response time histogram from metrics cache.
+    Response time used to be cached as a list of values, convert it if the cache hasn't been recalculated yet.
+    """
+    if isinstance(response_time, list):
+        return update_response_time_histogram(get_default_response_time_histogram(), response_time)
+    return response_time
+
+
 def get_metrics_recalculation_timeout() -> int:
     """
     Returns timeout when metrics should be recalculated.
@@ -197,7 +239,7 @@ def metrics_add_integration_to_cache(integration: "AlertReceiveChannel"):
             "org_id": grafana_org_id,
             "slug": instance_slug,
             "id": instance_id,
-            "response_time": [],
+            "response_time": get_default_response_time_histogram(),
         },
     )
     cache.set(metric_alert_groups_response_time_key, metric_alert_groups_response_time, timeout=metrics_cache_timeout)
@@ -271,7 +313,9 @@ def metrics_update_alert_groups_response_time_cache(integrations_response_time,
         integration_response_time_metrics = metric_alert_groups_response_time.get(int(integration_id))
         if not integration_response_time_metrics:
             continue
-        integration_response_time_metrics["response_time"].extend(integration_response_time)
+        integration_response_time_metrics["response_time"] = update_response_time_histogram(
+            get_response_time_histogram(integration_response_time_metrics["response_time"]), integration_response_time
+        )
     cache.set(metric_alert_groups_response_time_key, metric_alert_groups_response_time, timeout=metrics_cache_timeout)
 
 
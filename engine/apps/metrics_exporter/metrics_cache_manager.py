@@ -1,5 +1,6 @@
 import typing
 
+from apps.alerts.alert_group_stats_cache import update_alert_group_stats_cache
 from apps.alerts.constants import AlertGroupState
 from apps.metrics_exporter.helpers import (
     get_response_time_period,
@@ -66,6 +67,7 @@ class MetricsCacheManager:
             {}, integration_id, previous_state=old_state, new_state=new_state
         )
         metrics_update_alert_groups_state_cache(metrics_state_diff, organization_id)
+        update_alert_group_stats_cache(organization_id, metrics_state_diff)
 
     @staticmethod
     def metrics_update_response_time_cache_for_alert_group(integration_id, organization_id, response_time_seconds):
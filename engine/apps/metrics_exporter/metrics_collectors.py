@@ -9,6 +9,7 @@ from apps.alerts.constants import AlertGroupState
 from apps.metrics_exporter.constants import (
     ALERT_GROUPS_RESPONSE_TIME,
     ALERT_GROUPS_TOTAL,
+    METRICS_RESPONSE_TIME_BUCKETS,
     USER_WAS_NOTIFIED_OF_ALERT_GROUPS,
     AlertGroupsResponseTimeMetricsDict,
     AlertGroupsTotalMetricsDict,
@@ -16,12 +17,14 @@ from apps.metrics_exporter.constants import (
     UserWasNotifiedOfAlertGroupsMetricsDict,
 )
 from apps.metrics_exporter.helpers import (
+    get_default_response_time_histogram,
     get_metric_alert_groups_response_time_key,
     get_metric_alert_groups_total_key,
     get_metric_calculation_started_key,
     get_metric_user_was_notified_of_alert_groups_key,
     get_metrics_cache_timer_key,
     get_organization_ids,
+    update_response_time_histogram,
 )
 from apps.metrics_exporter.tasks import start_calculate_and_cache_metrics, start_recalculation_for_new_metric
 
@@ -36,7 +39,8 @@ RE_USER_WAS_NOTIFIED_OF_ALERT_GROUPS = re.compile(r"{}_(\d+)".format(USER_WAS_NO
 # https://github.com/prometheus/client_python#custom-collectors
 class ApplicationMetricsCollector:
     def __init__(self):
-        self._buckets = (60, 300, 600, 3600, "+Inf")
+        self._buckets = METRICS_RESPONSE_TIME_BUCKETS
+        self._bucket_keys = [str(bucket) for bucket in self._buckets]
         self._stack_labels = [
             "org_id",
             "slug",
@@ -122,11 +126,18 @@ class ApplicationMetricsCollector:
                 ]
                 labels_values = list(map(str, labels_values))
 
-                response_time_values = integration_data["response_time"]
-                if not response_time_values:
-                    continue
-                buckets, sum_value = self.get_buckets_with_sum(response_time_values)
-                buckets = sorted(list(buckets.items()), key=lambda x: float(x[0]))
+                response_time = integration_data["response_time"]
+                if isinstance(response_time, list):
+                    # response time values cached before switching to histograms
+                    if not response_time:
+                        continue
+                    buckets, sum_value = self.get_buckets_with_sum(response_time)
+                else:
+                    if not response_time["buckets"]["+Inf"]:
+                        continue
+                    buckets, sum_value = response_time["buckets"], response_time["sum"]
+                # buckets are cumulative already, only put them in the order of upper bounds
+                buckets = [(bucket_key, buckets[bucket_key]) for bucket_key in self._bucket_keys]
                 alert_groups_response_time_seconds.add_metric(labels_values, buckets=buckets, sum_value=sum_value)
             org_id_from_key = RE_ALERT_GROUPS_RESPONSE_TIME.match(org_key).groups()[0]
             processed_org_ids.add(int(org_id_from_key))
@@ -183,14 +194,8 @@ class ApplicationMetricsCollector:
 
     def get_buckets_with_sum(self, values):
         """Put values in correct buckets and count values sum"""
-        buckets_values = {str(key): 0 for key in self._buckets}
-        sum_value = 0
-        for value in values:
-            for bucket in self._buckets:
-                if value <= float(bucket):
-                    buckets_values[str(bucket)] += 1.0
-            sum_value += value
-        return buckets_values, sum_value
+        histogram = update_response_time_histogram(get_default_response_time_histogram(), values)
+        return histogram["buckets"], histogram["sum"]
 
 
 application_metrics_registry.register(ApplicationMetricsCollector())
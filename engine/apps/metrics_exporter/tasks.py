@@ -1,13 +1,15 @@
+import datetime
 import typing
 
 from django.conf import settings
 from django.core.cache import cache
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Sum
 
 from apps.alerts.constants import AlertGroupState
 from apps.metrics_exporter.constants import (
     METRICS_ORGANIZATIONS_IDS,
     METRICS_ORGANIZATIONS_IDS_CACHE_TIMEOUT,
+    METRICS_RESPONSE_TIME_BUCKETS,
     AlertGroupsResponseTimeMetricsDict,
     AlertGroupsTotalMetricsDict,
     RecalculateOrgMetricsDict,
@@ -76,6 +78,8 @@ def start_recalculation_for_new_metric(metric_name):
 def calculate_and_cache_metrics(organization_id, force=False):
     """
     Calculate integrations metrics for organization.
+    Metrics cache is kept up to date incrementally by MetricsCacheManager, full recalculation is done to reconcile it
+    with the database once in METRICS_RECALCULATION_CACHE_TIMEOUT or when the cache is missing.
     """
     from apps.alerts.models import AlertGroup, AlertReceiveChannel
     from apps.user_management.models import Organization
@@ -87,7 +91,7 @@ def calculate_and_cache_metrics(organization_id, force=False):
     if not organization:
         return
 
-    integrations = (
+    integrations = list(
         AlertReceiveChannel.objects.using(get_random_readonly_database_key_if_present_otherwise_default())
         .filter(~Q(integration=AlertReceiveChannel.INTEGRATION_MAINTENANCE) & Q(organization_id=organization_id))
         .select_related("team")
@@ -109,29 +113,42 @@ def calculate_and_cache_metrics(organization_id, force=False):
         AlertGroupState.RESOLVED.value: AlertGroup.get_resolved_state_filter(),
     }
 
-    for integration in integrations:
-        # calculate states
-        for state, alert_group_filter in states.items():
-            metric_alert_group_total.setdefault(
-                integration.id,
-                {
-                    "integration_name": integration.emojized_verbal_name,
-                    "team_name": integration.team_name,
-                    "team_id": integration.team_id_or_no_team,
-                    "org_id": instance_org_id,
-                    "slug": instance_slug,
-                    "id": instance_id,
-                },
-            )[state] = integration.alert_groups.filter(alert_group_filter).count()
+    # count alert groups by state and response time bucket for all integrations in one query
+    response_time_filter = Q(started_at__gte=response_time_period, response_time__isnull=False)
+    response_time_buckets = {}
+    for bucket in METRICS_RESPONSE_TIME_BUCKETS:
+        bucket_filter = response_time_filter
+        if bucket != "+Inf":
+            # response time is counted in whole seconds, so the value falls in the bucket if it is less than bucket + 1s
+            bucket_filter &= Q(response_time__lt=datetime.timedelta(seconds=bucket + 1))
+        response_time_buckets[f"response_time_bucket_{bucket}"] = Count("pk", filter=bucket_filter)
+
+    alert_groups_stats = {
+        stats["channel_id"]: stats
+        for stats in AlertGroup.objects.using(get_random_readonly_database_key_if_present_otherwise_default())
+        .filter(channel_id__in=[integration.id for integration in integrations])
+        .values("channel_id")
+        .annotate(
+            **{state: Count("pk", filter=alert_group_filter) for state, alert_group_filter in states.items()},
+            **response_time_buckets,
+            response_time_sum=Sum("response_time", filter=response_time_filter),
+        )
+    }
 
-        # get response time
-        all_response_time = integration.alert_groups.filter(
-            started_at__gte=response_time_period,
-            response_time__isnull=False,
-        ).values_list("response_time", flat=True)
+    for integration in integrations:
+        integration_stats = alert_groups_stats.get(integration.id, {})
 
-        all_response_time_seconds = [int(response_time.total_seconds()) for response_time in all_response_time]
+        metric_alert_group_total[integration.id] = {
+            "integration_name": integration.emojized_verbal_name,
+            "team_name": integration.team_name,
+            "team_id": integration.team_id_or_no_team,
+            "org_id": instance_org_id,
+            "slug": instance_slug,
+            "id": instance_id,
+            **{state: integration_stats.get(state, 0) for state in states},
+        }
 
+        response_time_sum = integration_stats.get("response_time_sum")
         metric_alert_group_response_time[integration.id] = {
             "integration_name": integration.emojized_verbal_name,
             "team_name": integration.team_name,
@@ -139,7 +156,13 @@ def calculate_and_cache_metrics(organization_id, force=False):
             "org_id": instance_org_id,
             "slug": instance_slug,
             "id": instance_id,
-            "response_time": all_response_time_seconds,
+            "response_time": {
+                "buckets": {
+                    str(bucket): integration_stats.get(f"response_time_bucket_{bucket}", 0)
+                    for bucket in METRICS_RESPONSE_TIME_BUCKETS
+                },
+                "sum": int(response_time_sum.total_seconds()) if response_time_sum else 0,
+            },
         }
 
     metric_alert_groups_total_key = get_metric_alert_groups_total_key(organization_id)
@@ -7,6 +7,7 @@ from apps.metrics_exporter.constants import (
     USER_WAS_NOTIFIED_OF_ALERT_GROUPS,
 )
 from apps.metrics_exporter.helpers import (
+    get_default_response_time_histogram,
     get_metric_alert_groups_response_time_key,
     get_metric_alert_groups_total_key,
     get_metric_user_was_notified_of_alert_groups_key,
@@ -51,7 +52,10 @@ def mock_cache_get_metrics_for_collector(monkeypatch):
                     "org_id": 1,
                     "slug": "Test stack",
                     "id": 1,
-                    "response_time": [2, 10, 200, 650],
+                    "response_time": {
+                        "buckets": {"60": 2, "300": 3, "600": 3, "3600": 4, "+Inf": 4},
+                        "sum": 862,
+                    },
                 }
             },
             USER_WAS_NOTIFIED_OF_ALERT_GROUPS: {
@@ -103,7 +107,7 @@ def make_metrics_cache_params(monkeypatch):
                         "org_id": METRICS_TEST_ORG_ID,
                         "slug": METRICS_TEST_INSTANCE_SLUG,
                         "id": METRICS_TEST_INSTANCE_ID,
-                        "response_time": [],
+                        "response_time": get_default_response_time_histogram(),
                     }
                 },
                 metric_alert_groups_total_key: {
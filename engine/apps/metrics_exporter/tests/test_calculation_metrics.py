@@ -1,7 +1,10 @@
+import datetime
 from unittest.mock import patch
 
 import pytest
+from django.utils import timezone
 
+from apps.alerts.models import AlertGroup
 from apps.base.models import UserNotificationPolicyLogRecord
 from apps.metrics_exporter.helpers import (
     get_metric_alert_groups_response_time_key,
@@ -82,7 +85,7 @@ def test_calculate_and_cache_metrics_task(
             "org_id": organization.org_id,
             "slug": organization.stack_slug,
             "id": organization.stack_id,
-            "response_time": [],
+            "response_time": {},
         },
         alert_receive_channel_2.id: {
             "integration_name": alert_receive_channel_2.verbal_name,
@@ -91,7 +94,7 @@ def test_calculate_and_cache_metrics_task(
             "org_id": organization.org_id,
             "slug": organization.stack_slug,
             "id": organization.stack_id,
-            "response_time": [],
+            "response_time": {},
         },
     }
 
@@ -108,12 +111,58 @@ def test_calculate_and_cache_metrics_task(
         metric_alert_groups_response_time_values = args[1].args
         assert metric_alert_groups_response_time_values[0] == metric_alert_groups_response_time_key
         for integration_id, values in metric_alert_groups_response_time_values[1].items():
-            assert len(values["response_time"]) == METRICS_RESPONSE_TIME_LEN
+            assert values["response_time"]["buckets"]["+Inf"] == METRICS_RESPONSE_TIME_LEN
             # set response time to expected result because it is calculated on fly
             expected_result_metric_alert_groups_response_time[integration_id]["response_time"] = values["response_time"]
         assert metric_alert_groups_response_time_values[1] == expected_result_metric_alert_groups_response_time
 
 
+@patch("apps.alerts.models.alert_group.MetricsCacheManager.metrics_update_state_cache_for_alert_group")
+@pytest.mark.django_db
+def test_calculate_and_cache_metrics_response_time_histogram(
+    mocked_update_state_cache,
+    make_organization,
+    make_alert_receive_channel,
+    make_alert_group,
+):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    now = timezone.now()
+    for response_time_seconds in [2, 60, 60.5, 200, 650, 5000]:
+        make_alert_group(alert_receive_channel, response_time=datetime.timedelta(seconds=response_time_seconds))
+    # response time out of the calculation period is not counted
+    old_alert_group = make_alert_group(alert_receive_channel, response_time=datetime.timedelta(seconds=10))
+    AlertGroup.objects.filter(pk=old_alert_group.pk).update(started_at=now - datetime.timedelta(days=8))
+
+    with patch("apps.metrics_exporter.tasks.cache.set") as mock_cache_set:
+        calculate_and_cache_metrics(organization.id)
+
+    metric_alert_groups_response_time = mock_cache_set.call_args_list[1].args[1]
+    assert metric_alert_groups_response_time[alert_receive_channel.id]["response_time"] == {
+        "buckets": {"60": 3, "300": 4, "600": 4, "3600": 5, "+Inf": 6},
+        "sum": 5972,
+    }
+
+
+@pytest.mark.django_db
+def test_calculate_and_cache_metrics_number_of_queries(
+    make_organization,
+    make_alert_receive_channel,
+    make_alert_group,
+    django_assert_num_queries,
+):
+    organization = make_organization()
+    for _ in range(5):
+        alert_receive_channel = make_alert_receive_channel(organization)
+        make_alert_group(alert_receive_channel)
+        make_alert_group(alert_receive_channel, resolved=True)
+
+    # organization, integrations and alert groups stats, regardless of the number of integrations
+    with patch("apps.metrics_exporter.tasks.cache.set"):
+        with django_assert_num_queries(3):
+            calculate_and_cache_metrics(organization.id)
+
+
 @patch("apps.alerts.models.alert_group.MetricsCacheManager.metrics_update_state_cache_for_alert_group")
 @pytest.mark.django_db
 def test_calculate_and_cache_user_was_notified_metric_task(
@@ -1,6 +1,7 @@
 from unittest.mock import patch
 
 import pytest
+from django.core.cache import cache
 from prometheus_client import CollectorRegistry, generate_latest
 
 from apps.alerts.constants import AlertGroupState
@@ -38,3 +39,70 @@ def test_application_metrics_collector(
     # Since there is no recalculation timer for test org in cache, start_calculate_and_cache_metrics must be called
     assert mocked_start_calculate_and_cache_metrics.called
     test_metrics_registry.unregister(collector)
+
+
+@pytest.mark.parametrize(
+    "values,expected_buckets,expected_sum",
+    [
+        ([], {"60": 0, "300": 0, "600": 0, "3600": 0, "+Inf": 0}, 0),
+        ([0, 60], {"60": 2, "300": 2, "600": 2, "3600": 2, "+Inf": 2}, 60),
+        ([61, 300, 301, 3600, 3601], {"60": 0, "300": 2, "600": 3, "3600": 4, "+Inf": 5}, 7863),
+    ],
+)
+def test_application_metrics_collector_get_buckets_with_sum(values, expected_buckets, expected_sum):
+    collector = ApplicationMetricsCollector()
+    buckets, sum_value = collector.get_buckets_with_sum(values)
+    assert buckets == expected_buckets
+    assert sum_value == expected_sum
+
+
+@patch("apps.metrics_exporter.metrics_collectors.get_organization_ids", return_value=[1])
+@patch("apps.metrics_exporter.metrics_collectors.start_calculate_and_cache_metrics.apply_async")
+@pytest.mark.django_db
+def test_application_metrics_collector_response_time_histograms(
+    mocked_org_ids, mocked_start_calculate_and_cache_metrics, monkeypatch
+):
+    """Test that cached response time histograms are exported as is, without bucketing values on scrape"""
+    integrations_count = 10000
+    response_time = {
+        integration_id: {
+            "integration_name": f"Integration {integration_id}",
+            "team_name": "No team",
+            "team_id": "no_team",
+            "org_id": 1,
+            "slug": "Test stack",
+            "id": 1,
+            "response_time": {
+                "buckets": {"60": 1, "300": 2, "600": 2, "3600": 3, "+Inf": 4},
+                "sum": 100,
+            },
+        }
+        for integration_id in range(1, integrations_count + 1)
+    }
+    monkeypatch.setattr(
+        cache,
+        "get_many",
+        lambda keys, *args, **kwargs: {
+            key: response_time for key in keys if key.startswith(ALERT_GROUPS_RESPONSE_TIME)
+        },
+    )
+
+    collector = ApplicationMetricsCollector()
+    with patch.object(collector, "get_buckets_with_sum") as mocked_get_buckets_with_sum:
+        metric, _ = collector._get_response_time_metric({1})
+    assert not mocked_get_buckets_with_sum.called
+
+    # buckets + _count and _sum for each integration
+    assert len(metric.samples) == integrations_count * (len(collector._buckets) + 2)
+    first_integration_samples = [
+        (sample.labels.get("le"), sample.value) for sample in metric.samples[: len(collector._buckets) + 2]
+    ]
+    assert first_integration_samples == [
+        ("60", 1),
+        ("300", 2),
+        ("600", 2),
+        ("3600", 3),
+        ("+Inf", 4),
+        (None, 4),
+        (None, 100),
+    ]
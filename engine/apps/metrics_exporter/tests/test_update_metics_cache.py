@@ -7,10 +7,12 @@ from django.test import override_settings
 from apps.alerts.tasks import notify_user_task
 from apps.base.models import UserNotificationPolicy, UserNotificationPolicyLogRecord
 from apps.metrics_exporter.helpers import (
+    get_default_response_time_histogram,
     get_metric_alert_groups_response_time_key,
     get_metric_alert_groups_total_key,
     get_metric_user_was_notified_of_alert_groups_key,
     metrics_bulk_update_team_label_cache,
+    metrics_update_alert_groups_response_time_cache,
 )
 from apps.metrics_exporter.metrics_cache_manager import MetricsCacheManager
 from apps.metrics_exporter.tests.conftest import (
@@ -163,7 +165,7 @@ def test_update_metric_alert_groups_response_time_cache_on_action(
             "org_id": organization.org_id,
             "slug": organization.stack_slug,
             "id": organization.stack_id,
-            "response_time": [],
+            "response_time": get_default_response_time_histogram(),
         }
     }
 
@@ -178,8 +180,8 @@ def test_update_metric_alert_groups_response_time_cache_on_action(
                 expected_result_metric_alert_groups_response_time[alert_receive_channel.id].update(
                     {"response_time": response_time_values}
                 )
-                # response time values len always will be 1 here since cache is mocked and refreshed on every call
-                assert len(response_time_values) == 1
+                # response time histogram always has 1 value here since cache is mocked and refreshed on every call
+                assert response_time_values["buckets"]["+Inf"] == 1
                 assert called_arg.args[1] == expected_result_metric_alert_groups_response_time
                 return idx + 1
         raise AssertionError
@@ -227,6 +229,26 @@ def test_update_metric_alert_groups_response_time_cache_on_action(
         get_called_arg_index_and_compare_results()
 
 
+@pytest.mark.django_db
+def test_update_metric_alert_groups_response_time_cache_histogram(make_organization):
+    organization = make_organization()
+    integration_id = 1
+    metric_alert_groups_response_time_key = get_metric_alert_groups_response_time_key(organization.id)
+    cache.set(
+        metric_alert_groups_response_time_key,
+        # response time cached as a list of values is converted to histogram
+        {integration_id: {"integration_name": METRICS_TEST_INTEGRATION_NAME, "response_time": [30, 400]}},
+    )
+
+    metrics_update_alert_groups_response_time_cache({integration_id: [100]}, organization.id)
+    metrics_update_alert_groups_response_time_cache({integration_id: [7200, 5]}, organization.id)
+
+    assert cache.get(metric_alert_groups_response_time_key)[integration_id]["response_time"] == {
+        "buckets": {"60": 2, "300": 3, "600": 4, "3600": 4, "+Inf": 5},
+        "sum": 7735,
+    }
+
+
 @pytest.mark.django_db
 def test_update_metrics_cache_on_update_integration(
     make_organization,
@@ -298,7 +320,7 @@ def test_update_metrics_cache_on_update_integration(
                 "org_id": organization.org_id,
                 "slug": organization.stack_slug,
                 "id": organization.stack_id,
-                "response_time": [],
+                "response_time": get_default_response_time_histogram(),
             }
         }
 
@@ -411,7 +433,7 @@ def test_update_metrics_cache_on_update_team(
             "org_id": organization.org_id,
             "slug": organization.stack_slug,
             "id": organization.stack_id,
-            "response_time": [],
+            "response_time": get_default_response_time_histogram(),
         }
     }
 
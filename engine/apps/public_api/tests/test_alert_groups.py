@@ -1,6 +1,8 @@
 from unittest.mock import patch
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -298,6 +300,31 @@ def test_pagination(settings, alert_group_public_api_setup):
     assert result["next"].startswith("https://test.com/test/prefixed/urls")
 
 
+@pytest.mark.django_db
+def test_cursor_pagination(alert_group_public_api_setup):
+    token, alert_groups, _, _ = alert_group_public_api_setup
+    client = APIClient()
+
+    url = reverse("api-public:alert_groups-list")
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url + "?cursor=&perpage=2", HTTP_AUTHORIZATION=token)
+
+    assert response.status_code == status.HTTP_200_OK
+    # total count is not computed in cursor mode
+    assert not any("COUNT(" in query["sql"] for query in ctx.captured_queries)
+    result = response.json()
+    assert "count" not in result
+    assert [ag["id"] for ag in result["results"]] == [ag.public_primary_key for ag in alert_groups[:0:-1]]
+
+    response = client.get(result["next"], HTTP_AUTHORIZATION=token)
+
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    assert [ag["id"] for ag in result["results"]] == [alert_groups[0].public_primary_key]
+    assert result["next"] is None
+
+
 @pytest.mark.parametrize(
     "acknowledged,resolved,attached,maintenance,status_code",
     [
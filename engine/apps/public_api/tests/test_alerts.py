@@ -1,4 +1,5 @@
 import pytest
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -170,6 +171,41 @@ def test_alerts_search(
     assert response.json()["count"] == 1
 
 
+@pytest.mark.django_db
+@override_settings(FEATURE_ALERT_SEARCH_TOKENS_ENABLED=True)
+def test_alerts_search_tokens(
+    alert_public_api_setup,
+    make_user_for_organization,
+    make_public_api_token,
+    make_alert_group,
+    make_alert,
+):
+    organization, alert_receive_channel, default_channel_filter = alert_public_api_setup
+    alert_group = make_alert_group(alert_receive_channel)
+    make_alert(alert_group, alert_raw_request_data)
+    admin = make_user_for_organization(organization)
+    _, token = make_public_api_token(admin, organization)
+
+    client = APIClient()
+
+    url = reverse("api-public:alerts-list")
+    response = client.get(url + "?search=Higher", format="json", HTTP_AUTHORIZATION=f"{token}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["count"] == 1
+
+    # payload keys are not indexed
+    response = client.get(url + "?search=evalMatches", format="json", HTTP_AUTHORIZATION=f"{token}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["count"] == 0
+
+    # searching only words found in almost every payload is rejected
+    response = client.get(url + "?search=http://www", format="json", HTTP_AUTHORIZATION=f"{token}")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.django_db
 def test_alerts_search_with_no_results(
     alert_public_api_setup,
@@ -191,3 +227,96 @@ def test_alerts_search_with_no_results(
 
     assert response.status_code == status.HTTP_200_OK
     assert response.json()["count"] == 0
+
+
+@pytest.mark.django_db
+def test_get_list_alerts_cursor_pagination(
+    alert_public_api_setup,
+    make_user_for_organization,
+    make_public_api_token,
+    make_alert_group,
+    make_alert,
+):
+    organization, alert_receive_channel, default_channel_filter = alert_public_api_setup
+    alert_group = make_alert_group(alert_receive_channel)
+    alerts = [make_alert(alert_group, alert_raw_request_data) for _ in range(3)]
+    admin = make_user_for_organization(organization)
+    _, token = make_public_api_token(admin, organization)
+
+    client = APIClient()
+
+    url = reverse("api-public:alerts-list")
+    response = client.get(url + "?cursor=&perpage=2", HTTP_AUTHORIZATION=f"{token}")
+
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    assert "count" not in result
+    assert result["page_size"] == 2
+    assert result["previous"] is None
+    assert [a["id"] for a in result["results"]] == [alerts[2].public_primary_key, alerts[1].public_primary_key]
+
+    response = client.get(result["next"], HTTP_AUTHORIZATION=f"{token}")
+
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    assert [a["id"] for a in result["results"]] == [alerts[0].public_primary_key]
+    assert result["next"] is None
+    assert result["previous"] is not None
+
+
+@pytest.mark.django_db
+@override_settings(FEATURE_ALERT_SEARCH_TOKENS_ENABLED=True)
+def test_alerts_search_all_words(
+    alert_public_api_setup,
+    make_organization,
+    make_alert_receive_channel,
+    make_user_for_organization,
+    make_public_api_token,
+    make_alert_group,
+    make_alert,
+):
+    organization, alert_receive_channel, default_channel_filter = alert_public_api_setup
+    alert_group = make_alert_group(alert_receive_channel)
+    alert = make_alert(alert_group, alert_raw_request_data)
+    make_alert(alert_group, {"title": "Test"})
+    # same payload in another organization
+    other_alert_receive_channel = make_alert_receive_channel(make_organization())
+    make_alert(make_alert_group(other_alert_receive_channel), alert_raw_request_data)
+    admin = make_user_for_organization(organization)
+    _, token = make_public_api_token(admin, organization)
+
+    client = APIClient()
+
+    url = reverse("api-public:alerts-list")
+    response = client.get(url + "?search=test NOTIFICATION", format="json", HTTP_AUTHORIZATION=f"{token}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [a["id"] for a in response.json()["results"]] == [alert.public_primary_key]
+
+
+@pytest.mark.django_db
+@override_settings(FEATURE_ALERT_SEARCH_TOKENS_ENABLED=True)
+def test_alerts_search_tokens_pagination(
+    alert_public_api_setup,
+    make_user_for_organization,
+    make_public_api_token,
+    make_alert_group,
+    make_alert,
+):
+    organization, alert_receive_channel, default_channel_filter = alert_public_api_setup
+    alert_group = make_alert_group(alert_receive_channel)
+    alerts = [make_alert(alert_group, {"title": "Disk usage high", "host": f"host-{i}"}) for i in range(5)]
+    make_alert(alert_group, {"title": "Disk usage low"})
+    admin = make_user_for_organization(organization)
+    _, token = make_public_api_token(admin, organization)
+
+    client = APIClient()
+
+    url = reverse("api-public:alerts-list")
+    response = client.get(url + "?search=high disk&perpage=2&page=2", format="json", HTTP_AUTHORIZATION=f"{token}")
+
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    # all matching alerts are counted, most recent first
+    assert result["count"] == 5
+    assert [a["id"] for a in result["results"]] == [alerts[2].public_primary_key, alerts[1].public_primary_key]
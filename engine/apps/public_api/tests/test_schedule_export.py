@@ -76,7 +76,7 @@ def test_export_calendar(make_organization_and_user_with_token, make_user_for_or
     assert response.status_code == status.HTTP_200_OK
     assert response.headers["content-type"] == "text/calendar; charset=utf-8"
 
-    cal = Calendar.from_ical(response.data)
+    cal = Calendar.from_ical(b"".join(response.streaming_content))
 
     assert type(cal) == Calendar
     # check there are events
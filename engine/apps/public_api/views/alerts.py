@@ -1,16 +1,21 @@
-from django.db.models import CharField
+from django.conf import settings
+from django.db.models import CharField, QuerySet
 from django.db.models.functions import Cast
 from django_filters import rest_framework as filters
 from rest_framework import mixins
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
 
-from apps.alerts.models import Alert
+from apps.alerts.models import Alert, AlertSearchToken
+from apps.alerts.models.alert_search_token import get_search_tokens
 from apps.auth_token.auth import ApiTokenAuthentication
 from apps.public_api.serializers.alerts import AlertSerializer
 from apps.public_api.throttlers.user_throttle import UserThrottle
+from common.api_helpers.exceptions import BadRequest
 from common.api_helpers.mixins import RateLimitHeadersMixin
-from common.api_helpers.paginators import FiftyPageSizePaginator
+from common.api_helpers.paginators import FiftyPageSizeOrCursorPaginator
+
+MAX_SEARCH_QUERY_TOKENS = 10
 
 
 class AlertFilter(filters.FilterSet):
@@ -25,7 +30,7 @@ class AlertView(RateLimitHeadersMixin, mixins.ListModelMixin, GenericViewSet):
 
     model = Alert
     serializer_class = AlertSerializer
-    pagination_class = FiftyPageSizePaginator
+    pagination_class = FiftyPageSizeOrCursorPaginator
 
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = AlertFilter
@@ -39,7 +44,9 @@ class AlertView(RateLimitHeadersMixin, mixins.ListModelMixin, GenericViewSet):
         if alert_group_id:
             queryset = queryset.filter(group__public_primary_key=alert_group_id)
 
-        if search:
+        if search and settings.FEATURE_ALERT_SEARCH_TOKENS_ENABLED:
+            queryset = self._filter_by_search_tokens(queryset, search)
+        elif search:
             queryset = queryset.annotate(
                 raw_request_data_str=Cast("raw_request_data", output_field=CharField())
             ).filter(raw_request_data_str__icontains=search)
@@ -47,3 +54,21 @@ class AlertView(RateLimitHeadersMixin, mixins.ListModelMixin, GenericViewSet):
         queryset = self.serializer_class.setup_eager_loading(queryset)
 
         return queryset.order_by("-id")
+
+    def _filter_by_search_tokens(self, queryset: QuerySet[Alert], search: str) -> QuerySet[Alert]:
+        """
+        Filter alerts with all the words of the search in their payload values, with a search tokens index lookup
+        per word. Words found in almost every payload (see SEARCH_TOKEN_STOP_WORDS) are not indexed.
+        """
+        search_tokens = get_search_tokens(search, limit=MAX_SEARCH_QUERY_TOKENS)
+        if not search_tokens:
+            raise BadRequest(detail={"search": "Search must contain words other than common ones like http or true"})
+
+        organization = self.request.auth.organization
+        for token in search_tokens:
+            queryset = queryset.filter(
+                id__in=AlertSearchToken.objects.filter(channel__organization=organization, token=token).values(
+                    "alert_id"
+                )
+            )
+        return queryset
@@ -18,7 +18,7 @@ from apps.public_api.throttlers.user_throttle import UserThrottle
 from common.api_helpers.exceptions import BadRequest
 from common.api_helpers.filters import ByTeamModelFieldFilterMixin, get_team_queryset
 from common.api_helpers.mixins import RateLimitHeadersMixin
-from common.api_helpers.paginators import FiftyPageSizePaginator
+from common.api_helpers.paginators import FiftyPageSizeOrCursorPaginator
 
 
 class IncidentByTeamFilter(ByTeamModelFieldFilterMixin, filters.FilterSet):
@@ -42,7 +42,7 @@ class IncidentView(RateLimitHeadersMixin, mixins.ListModelMixin, mixins.DestroyM
 
     model = AlertGroup
     serializer_class = IncidentSerializer
-    pagination_class = FiftyPageSizePaginator
+    pagination_class = FiftyPageSizeOrCursorPaginator
 
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = IncidentByTeamFilter
@@ -2,8 +2,8 @@ import datetime
 import logging
 
 import pytz
+from django.http import StreamingHttpResponse
 from django_filters import rest_framework as filters
-from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
@@ -130,7 +130,7 @@ class OnCallScheduleChannelView(RateLimitHeadersMixin, UpdateSerializerMixin, Mo
     def export(self, request, pk):
         # Not using existing get_object method because it requires access to the organization user attribute
         export = ical_export_from_schedule(self.request.auth.schedule)
-        return Response(export, status=status.HTTP_200_OK)
+        return StreamingHttpResponse(export, content_type=f"{CalendarRenderer.media_type}; charset=utf-8")
 
     @action(methods=["get"], detail=True)
     def final_shifts(self, request, pk):
@@ -21,8 +21,17 @@ RE_PRIORITY = re.compile(r"^\[L(\d+)\]")
 RE_EVENT_UID_EXPORT = re.compile(r"([\w\d]+)-(\d+)-([\w\d]+)")
 RE_EVENT_UID_V1 = re.compile(r"amixr-([\w\d-]+)-U(\d+)-E(\d+)-S(\d+)")
 RE_EVENT_UID_V2 = re.compile(r"oncall-([\w\d-]+)-PK([\w\d]+)-U(\d+)-E(\d+)-S(\d+)")
+RE_ICAL_FETCH_USERNAME = re.compile(r"SUMMARY:(?:\[L[0-9]+\] )?([^\s]+)")
+RE_ICAL_FETCH_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*")
+RE_ICAL_FOLDED_LINE = re.compile(r"\r?\n[ \t]")
 
 CALENDAR_TYPE_FINAL = "final"
 
 EXPORT_WINDOW_DAYS_AFTER = 180
 EXPORT_WINDOW_DAYS_BEFORE = 15
+# final schedule export is recomputed for the whole window at least this often, even if its sources didn't change
+EXPORT_FULL_REFRESH_DAYS = 7
+
+# on-call intervals are materialized from the day before the final schedule refresh
+ONCALL_INTERVALS_WINDOW_DAYS_BEFORE = 1
+ONCALL_INTERVALS_WINDOW_DAYS_AFTER = 30
@@ -4,7 +4,7 @@ import datetime
 import logging
 import re
 import typing
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from typing import TYPE_CHECKING
 
 import pytz
@@ -32,9 +32,13 @@ from apps.schedules.constants import (
     RE_EVENT_UID_EXPORT,
     RE_EVENT_UID_V1,
     RE_EVENT_UID_V2,
+    RE_ICAL_FETCH_EMAIL,
+    RE_ICAL_FETCH_USERNAME,
+    RE_ICAL_FOLDED_LINE,
     RE_PRIORITY,
 )
 from apps.schedules.ical_events import ical_events
+from apps.schedules.parsed_calendar_cache import parsed_calendar_cache
 from common.timezones import is_valid_timezone
 from common.utils import timed_lru_cache
 
@@ -135,7 +139,7 @@ def list_of_oncall_shifts_from_ical(
     calendars: typing.Tuple[typing.Optional[Calendar], ...]
 
     if from_cached_final:
-        calendars = (Calendar.from_ical(schedule.cached_ical_final_schedule),)
+        calendars = (parsed_calendar_cache.get_calendar(schedule.cached_ical_final_schedule),)
     else:
         calendars = schedule.get_icalendars()
 
@@ -202,6 +206,7 @@ def get_shifts_dict(
     with_empty_shifts: bool = False,
 ):
     events = ical_events.get_events_from_ical_between(calendar, datetime_start, datetime_end)
+    users_by_username = get_users_by_username_from_ical_events(events, schedule.organization)
     result_datetime = []
     result_date = []
     for event in events:
@@ -215,8 +220,8 @@ def get_shifts_dict(
             recurrence_id = recurrence_id.dt.isoformat()
         priority = parse_priority_from_string(event.get(ICAL_SUMMARY, "[L0]"))
         pk, source = parse_event_uid(event.get(ICAL_UID), sequence=sequence, recurrence_id=recurrence_id)
-        users = get_users_from_ical_event(event, schedule.organization)
-        missing_users = get_missing_users_from_ical_event(event, schedule.organization)
+        users = get_users_from_ical_event(event, schedule.organization, users_by_username)
+        missing_users = get_missing_users_from_ical_event(event, users)
         event_calendar_type = calendar_type
         if calendar_type == CALENDAR_TYPE_FINAL:
             event_calendar_type = (
@@ -296,11 +301,13 @@ def list_of_empty_shifts_in_schedule(
                 calendar, start_datetime_with_offset, end_datetime_with_offset
             )
 
+            users_by_username = get_users_by_username_from_ical_events(events, schedule.organization)
+
             # Keep hashes of checked events to include only first recurrent event into result
             checked_events = set()
             empty_shifts_per_calendar = []
             for event in events:
-                users = get_users_from_ical_event(event, schedule.organization)
+                users = get_users_from_ical_event(event, schedule.organization, users_by_username)
                 if len(users) == 0:
                     summary = event.get(ICAL_SUMMARY, "")
                     description = event.get(ICAL_DESCRIPTION, "")
@@ -344,6 +351,8 @@ def list_users_to_notify_from_ical(
     Retrieve on-call users for the current time
     """
     events_datetime = events_datetime if events_datetime else datetime.datetime.now(timezone.utc)
+    if schedule.has_oncall_intervals_for(events_datetime):
+        return get_oncall_users_from_intervals([schedule], events_datetime)[schedule.pk]
     return list_users_to_notify_from_ical_for_period(
         schedule,
         events_datetime,
@@ -366,6 +375,52 @@ def list_users_to_notify_from_ical_for_period(
     return users_found_in_ical
 
 
+def get_oncall_users_from_intervals(
+    schedules: typing.List["OnCallSchedule"], events_datetime: datetime.datetime
+) -> typing.Dict[int, typing.List["User"]]:
+    """
+    Retrieve on-call users from materialized OnCallInterval rows, with a single query for all schedules.
+    Schedules must have on-call intervals covering events_datetime, see OnCallSchedule.has_oncall_intervals_for.
+    """
+    from apps.schedules.models import OnCallInterval
+    from apps.user_management.models import User
+
+    required_permission = RBACPermission.Permissions.SCHEDULES_WRITE
+
+    # intervals are created in the order of final schedule events, keep users in the same order
+    intervals = (
+        OnCallInterval.objects.filter(
+            schedule_id__in=[schedule.pk for schedule in schedules],
+            start__lte=events_datetime,
+            end__gt=events_datetime,
+        )
+        .order_by("start", "pk")
+        .values_list("schedule_id", "user_id")
+    )
+    user_ids_by_schedule: typing.Dict[int, typing.Dict[int, None]] = defaultdict(dict)
+    for schedule_id, user_id in intervals:
+        user_ids_by_schedule[schedule_id][user_id] = None
+
+    all_user_ids = set().union(*user_ids_by_schedule.values())
+    users = {user.pk: user for user in User.objects.filter(pk__in=all_user_ids)} if all_user_ids else {}
+
+    oncall_users = {}
+    for schedule in schedules:
+        organization = schedule.organization
+        schedule_users = [
+            users[user_id]
+            for user_id in user_ids_by_schedule[schedule.pk]
+            if user_id in users and users[user_id].organization_id == organization.pk
+        ]
+        # same permission check as in users_in_ical, users could have lost it after the intervals were built
+        if organization.is_rbac_permissions_enabled:
+            schedule_users = [u for u in schedule_users if {"action": required_permission.value} in u.permissions]
+        else:
+            schedule_users = [u for u in schedule_users if u.role <= required_permission.fallback_role.value]
+        oncall_users[schedule.pk] = schedule_users
+    return oncall_users
+
+
 def get_oncall_users_for_multiple_schedules(
     schedules: typing.List["OnCallSchedule"], events_datetime=None
 ) -> typing.Dict["OnCallSchedule", UserQuerySet]:
@@ -376,11 +431,16 @@ def get_oncall_users_for_multiple_schedules(
     if not schedules:
         return {}
 
-    # Get on-call users
-    oncall_users = {}
+    # Get on-call users, from materialized on-call intervals if available
+    schedules_with_intervals = [s for s in schedules if s.has_oncall_intervals_for(events_datetime)]
+    oncall_users = (
+        get_oncall_users_from_intervals(schedules_with_intervals, events_datetime) if schedules_with_intervals else {}
+    )
     for schedule in schedules:
+        if schedule.pk in oncall_users:
+            continue
         # pass user list to list_users_to_notify_from_ical
-        schedule_oncall_users = list_users_to_notify_from_ical(schedule, events_datetime=events_datetime)
+        schedule_oncall_users = list_users_to_notify_from_ical_for_period(schedule, events_datetime, events_datetime)
         oncall_users.update({schedule.pk: schedule_oncall_users})
 
     return oncall_users
@@ -471,22 +531,74 @@ def get_usernames_from_ical_event(event):
     return usernames_found, priority
 
 
-def get_missing_users_from_ical_event(event, organization: "Organization"):
+def get_user_identifiers_from_ical(ical_file: str | bytes | None) -> typing.Set[str]:
+    """
+    Return usernames and e-mails referenced in the given iCal file: the first word of every event summary
+    (e.g. "[L1] alex" -> "alex") and every e-mail address (e.g. in event descriptions or attendees).
+    """
+    if not ical_file:
+        return set()
+    if isinstance(ical_file, bytes):
+        ical_file = ical_file.decode()
+    ical_file = RE_ICAL_FOLDED_LINE.sub("", ical_file)
+    return set(RE_ICAL_FETCH_USERNAME.findall(ical_file)) | set(RE_ICAL_FETCH_EMAIL.findall(ical_file))
+
+
+def get_missing_users_from_ical_event(event, users: typing.Sequence["User"]):
+    """Return usernames referenced in the event which don't match any of the given users found for the event."""
     all_usernames, _ = get_usernames_from_ical_event(event)
-    users = list(get_users_from_ical_event(event, organization))
     found_usernames = [u.username for u in users]
     found_emails = [u.email.lower() for u in users]
     return [u for u in all_usernames if u != "" and u not in found_usernames and u.lower() not in found_emails]
 
 
-def get_users_from_ical_event(event, organization: "Organization") -> typing.Sequence["User"]:
+def get_users_from_ical_event(
+    event,
+    organization: "Organization",
+    users_by_username: typing.Optional[typing.Dict[str, typing.List["User"]]] = None,
+) -> typing.Sequence["User"]:
+    """
+    Return users referenced in the event.
+    If `users_by_username` (see get_users_by_username_from_ical_events) is given, users are taken from it
+    instead of being queried.
+    """
     usernames_from_ical, _ = get_usernames_from_ical_event(event)
     users = []
     if len(usernames_from_ical) != 0:
-        users = memoized_users_in_ical(tuple(usernames_from_ical), organization)
+        if users_by_username is None:
+            users = memoized_users_in_ical(tuple(usernames_from_ical), organization)
+        else:
+            found_users = {}
+            for username in usernames_from_ical:
+                for user in users_by_username.get(username, []):
+                    found_users.setdefault(user.pk, user)
+            users = list(found_users.values())
     return users
 
 
+def get_users_by_username_from_ical_events(
+    events: IcalEvents, organization: "Organization"
+) -> typing.Dict[str, typing.List["User"]]:
+    """
+    Resolve the users referenced in all the given events with a single query.
+    Return a map from every username found in the events to the users matching it (see users_in_ical).
+    """
+    usernames_from_ical = {username for event in events for username in get_usernames_from_ical_event(event)[0]}
+    if not usernames_from_ical:
+        return {}
+
+    users_by_username = defaultdict(list)
+    users_by_email = defaultdict(list)
+    for user in users_in_ical(list(usernames_from_ical), organization):
+        users_by_username[user.username].append(user)
+        users_by_email[user.email.lower()].append(user)
+
+    return {
+        username: users_by_username.get(username, []) + users_by_email.get(username.lower(), [])
+        for username in usernames_from_ical
+    }
+
+
 def is_icals_equal_line_by_line(first, second):
     first = first.split("\n")
     second = second.split("\n")
@@ -572,27 +684,61 @@ def get_icalendar_tz_or_utc(icalendar):
     return pytz.timezone(converted_timezone)
 
 
+class IcalFileFetchResult(typing.NamedTuple):
+    ical_file: str | None
+    error: str | None
+    # validators of the downloaded file, to be sent back in the next conditional request
+    etag: str | None = None
+    last_modified: str | None = None
+    # the file didn't change since the request validators were returned
+    not_modified: bool = False
+
+
 def fetch_ical_file_or_get_error(ical_url: str) -> typing.Tuple[str | None, str | None]:
-    cached_ical_file: str | None = None
-    ical_file_error: str | None = None
+    result = fetch_ical_file_if_modified_or_get_error(ical_url)
+    return result.ical_file, result.error
+
+
+def fetch_ical_file_if_modified_or_get_error(
+    ical_url: str, etag: str | None = None, last_modified: str | None = None
+) -> IcalFileFetchResult:
+    """
+    Download the iCal file, using a conditional request if validators (ETag/Last-Modified) of the previously
+    downloaded file are given, so the file is not downloaded and parsed again if it didn't change.
+    """
     try:
-        new_ical_file = fetch_ical_file(ical_url)
+        response = fetch_ical_file(ical_url, etag=etag, last_modified=last_modified)
+        if response.status_code == 304:
+            return IcalFileFetchResult(None, None, etag=etag, last_modified=last_modified, not_modified=True)
+        new_ical_file = response.text
         Calendar.from_ical(new_ical_file)
-        cached_ical_file = new_ical_file
     except requests.exceptions.RequestException:
-        ical_file_error = "iCal download failed"
+        return IcalFileFetchResult(None, "iCal download failed")
     except ValueError:
-        ical_file_error = "wrong iCal"
+        return IcalFileFetchResult(None, "wrong iCal")
     # TODO: catch icalendar exceptions
-    return cached_ical_file, ical_file_error
+    return IcalFileFetchResult(
+        new_ical_file, None, etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified")
+    )
 
 
-def fetch_ical_file(ical_url: str) -> str:
+def fetch_ical_file(ical_url: str, etag: str | None = None, last_modified: str | None = None) -> requests.Response:
     # without user-agent header google calendar sometimes returns text/html instead of text/calendar
     headers = {"User-Agent": "Grafana OnCall"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
     r = requests.get(ical_url, headers=headers, timeout=10)
-    logger.info(f"fetch_ical_file: content-type={r.headers.get('Content-Type')}")
-    return r.text
+    logger.info(f"fetch_ical_file: content-type={r.headers.get('Content-Type')} status={r.status_code}")
+    return r
+
+
+def get_ical_file_hash(ical_file: str | bytes | None) -> str | None:
+    """Return a hash of the iCal file content, to check if a cached iCal file changed without parsing it."""
+    if ical_file is None:
+        return None
+    return parsed_calendar_cache.make_key(ical_file)
 
 
 def create_base_icalendar(name: str) -> Calendar:
@@ -608,42 +754,44 @@ def create_base_icalendar(name: str) -> Calendar:
     return cal
 
 
-def get_user_events_from_calendars(
-    ical_obj: Calendar, calendar: Calendar, user: User, name: typing.Optional[str] = None
-) -> None:
-    if calendar:
-        for component in calendar.walk():
-            if component.name == "VEVENT":
-                event_user = get_usernames_from_ical_event(component)
-                event_user_value = event_user[0][0]
-                if event_user_value == user.username or event_user_value.lower() == user.email.lower():
-                    if name:
-                        component["SUMMARY"] = "{}: {}".format(name, component["SUMMARY"])
-                    ical_obj.add_component(component)
+def _refresh_final_schedule_if_missing(schedule: "OnCallSchedule") -> None:
+    if schedule.final_schedule_events_end is None:
+        schedule.refresh_ical_final_schedule()
 
 
-def _get_ical_data_final_schedule(schedule: "OnCallSchedule") -> str | None:
-    ical_data = schedule.cached_ical_final_schedule
-    if ical_data is None:
-        schedule.refresh_ical_final_schedule()
-        # casting is safe here. cached_ical_final_schedule is updated inside of refresh_ical_final_schedule
-        return typing.cast(str, schedule.cached_ical_final_schedule)
-    return ical_data
+def ical_export_from_schedule(schedule: "OnCallSchedule") -> typing.Iterator[bytes]:
+    """Return the schedule final schedule iCal export, streamed from FinalScheduleEvent rows."""
+    _refresh_final_schedule_if_missing(schedule)
+    return _stream_final_schedule_events(schedule)
 
 
-def ical_export_from_schedule(schedule: "OnCallSchedule") -> bytes:
-    ical_data = _get_ical_data_final_schedule(schedule)
-    return ical_data.encode()
+def _stream_final_schedule_events(schedule: "OnCallSchedule") -> typing.Iterator[bytes]:
+    # base calendar serialized without its closing line, events are streamed in between
+    calendar_end = b"END:VCALENDAR\r\n"
+    yield create_base_icalendar(schedule.name).to_ical()[: -len(calendar_end)]
+    for final_schedule_event in schedule.final_schedule_events.order_by("start", "uid").iterator(chunk_size=1000):
+        yield final_schedule_event.to_ical_event().to_ical()
+    yield calendar_end
 
 
 def user_ical_export(user: "User", schedules: "OnCallScheduleQuerySet") -> bytes:
+    from apps.schedules.models import FinalScheduleEvent
+
     schedule_name = "On-Call Schedule for {0}".format(user.username)
     ical_obj = create_base_icalendar(schedule_name)
 
+    schedule_pks = []
     for schedule in schedules:
-        name = schedule.name
-        ical_data = _get_ical_data_final_schedule(schedule)
-        get_user_events_from_calendars(ical_obj, Calendar.from_ical(ical_data), user, name=name)
+        _refresh_final_schedule_if_missing(schedule)
+        schedule_pks.append(schedule.pk)
+
+    final_schedule_events = (
+        FinalScheduleEvent.objects.filter(schedule_id__in=schedule_pks, user=user)
+        .select_related("schedule")
+        .order_by("schedule_id", "start", "uid")
+    )
+    for final_schedule_event in final_schedule_events:
+        ical_obj.add_component(final_schedule_event.to_ical_event(summary_prefix=final_schedule_event.schedule.name))
 
     return ical_obj.to_ical()
 
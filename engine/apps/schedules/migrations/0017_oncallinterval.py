@@ -0,0 +1,44 @@
+# Generated by Django 3.2.20 on 2026-10-17 07:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0015_auto_20230926_2203'),
+        ('schedules', '0016_alter_shiftswaprequest_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='oncall_intervals_end',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='oncall_intervals_source_hash',
+            field=models.CharField(default=None, max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='oncall_intervals_start',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+        migrations.CreateModel(
+            name='OnCallInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='oncall_intervals', to='schedules.oncallschedule')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='oncall_intervals', to='user_management.user')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='oncallinterval',
+            index=models.Index(fields=['schedule', 'start', 'end'], name='schedules_o_schedul_7802ec_idx'),
+        ),
+    ]
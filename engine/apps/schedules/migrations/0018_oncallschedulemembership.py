@@ -0,0 +1,67 @@
+# Generated by Django 3.2.20 on 2026-10-17 08:17
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# copy of apps.schedules.ical_utils.get_user_identifiers_from_ical at the time of the migration
+RE_ICAL_FETCH_USERNAME = re.compile(r"SUMMARY:(?:\[L[0-9]+\] )?([^\s]+)")
+RE_ICAL_FETCH_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*")
+RE_ICAL_FOLDED_LINE = re.compile(r"\r?\n[ \t]")
+
+
+def get_user_identifiers_from_ical(ical_file):
+    if not ical_file:
+        return set()
+    if isinstance(ical_file, bytes):
+        ical_file = ical_file.decode()
+    ical_file = RE_ICAL_FOLDED_LINE.sub("", ical_file)
+    return set(RE_ICAL_FETCH_USERNAME.findall(ical_file)) | set(RE_ICAL_FETCH_EMAIL.findall(ical_file))
+
+
+def populate_memberships(apps, schema_editor):
+    OnCallSchedule = apps.get_model("schedules", "OnCallSchedule")
+    OnCallScheduleMembership = apps.get_model("schedules", "OnCallScheduleMembership")
+    User = apps.get_model("user_management", "User")
+
+    schedules = OnCallSchedule.objects.values_list(
+        "pk", "organization_id", "cached_ical_file_primary", "cached_ical_file_overrides"
+    )
+    for pk, organization_id, ical_file_primary, ical_file_overrides in schedules.iterator():
+        identifiers = get_user_identifiers_from_ical(ical_file_primary) | get_user_identifiers_from_ical(ical_file_overrides)
+        if not identifiers:
+            continue
+        emails = {identifier.lower() for identifier in identifiers}
+        users = User.objects.filter(organization_id=organization_id).values_list("pk", "username", "email")
+        OnCallScheduleMembership.objects.bulk_create(
+            [
+                OnCallScheduleMembership(schedule_id=pk, user_id=user_pk)
+                for user_pk, username, email in users
+                if username in identifiers or (email and email.lower() in emails)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0015_auto_20230926_2203'),
+        ('schedules', '0017_oncallinterval'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OnCallScheduleMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_memberships', to='schedules.oncallschedule')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_memberships', to='user_management.user')),
+            ],
+            options={
+                'unique_together': {('schedule', 'user')},
+            },
+        ),
+        migrations.RunPython(populate_memberships, migrations.RunPython.noop),
+    ]
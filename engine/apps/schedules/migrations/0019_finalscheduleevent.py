@@ -0,0 +1,55 @@
+# Generated by Django 3.2.20 on 2026-10-17 08:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_migration_linter as linter
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0015_auto_20230926_2203'),
+        ('schedules', '0018_oncallschedulemembership'),
+    ]
+
+    operations = [
+        linter.IgnoreMigration(),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='final_schedule_events_end',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='final_schedule_full_refresh_at',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='final_schedule_source_hash',
+            field=models.CharField(default=None, max_length=40, null=True),
+        ),
+        migrations.CreateModel(
+            name='FinalScheduleEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.CharField(max_length=255)),
+                ('summary', models.CharField(max_length=300)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('priority', models.PositiveSmallIntegerField(default=None, null=True)),
+                ('is_cancelled', models.BooleanField(default=False)),
+                ('last_modified', models.DateTimeField()),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_schedule_events', to='schedules.oncallschedule')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='final_schedule_events', to='user_management.user')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='finalscheduleevent',
+            index=models.Index(fields=['schedule', 'start'], name='schedules_f_schedul_b43327_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='finalscheduleevent',
+            unique_together={('schedule', 'uid')},
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 3.2.20 on 2026-10-17 08:52
+
+from django.db import migrations, models
+import django_migration_linter as linter
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedules', '0019_finalscheduleevent'),
+    ]
+
+    operations = [
+        linter.IgnoreMigration(),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='cached_ical_file_overrides_hash',
+            field=models.CharField(default=None, max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='cached_ical_file_primary_hash',
+            field=models.CharField(default=None, max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='ical_file_etag_overrides',
+            field=models.CharField(default=None, max_length=200, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='ical_file_etag_primary',
+            field=models.CharField(default=None, max_length=200, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='ical_file_last_modified_overrides',
+            field=models.CharField(default=None, max_length=200, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='ical_file_last_modified_primary',
+            field=models.CharField(default=None, max_length=200, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='ical_next_refresh_at',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='ical_refresh_interval',
+            field=models.PositiveIntegerField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='prev_ical_file_overrides_hash',
+            field=models.CharField(default=None, max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='prev_ical_file_primary_hash',
+            field=models.CharField(default=None, max_length=40, null=True),
+        ),
+    ]
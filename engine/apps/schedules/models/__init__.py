@@ -1,8 +1,11 @@
 from .custom_on_call_shift import CustomOnCallShift  # noqa: F401
+from .final_schedule_event import FinalScheduleEvent  # noqa: F401
+from .on_call_interval import OnCallInterval  # noqa: F401
 from .on_call_schedule import (  # noqa: F401
     OnCallSchedule,
     OnCallScheduleCalendar,
     OnCallScheduleICal,
     OnCallScheduleWeb,
 )
+from .on_call_schedule_membership import OnCallScheduleMembership  # noqa: F401
 from .shift_swap_request import ShiftSwapRequest  # noqa: F401
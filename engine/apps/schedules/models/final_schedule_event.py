@@ -0,0 +1,57 @@
+import icalendar
+from django.db import models
+
+from apps.schedules.constants import (
+    ICAL_DATETIME_END,
+    ICAL_DATETIME_STAMP,
+    ICAL_DATETIME_START,
+    ICAL_LAST_MODIFIED,
+    ICAL_PRIORITY,
+    ICAL_STATUS,
+    ICAL_STATUS_CANCELLED,
+    ICAL_SUMMARY,
+    ICAL_UID,
+)
+
+
+class FinalScheduleEvent(models.Model):
+    """
+    Exported final schedule: a row per user shift event (VEVENT) in the schedule iCal export.
+    Rows are patched by OnCallSchedule.refresh_ical_final_schedule, only events that changed are updated,
+    events no longer in the final schedule are kept as cancelled until they are out of the export window.
+    """
+
+    schedule = models.ForeignKey(
+        "schedules.OnCallSchedule", on_delete=models.CASCADE, related_name="final_schedule_events"
+    )
+    user = models.ForeignKey(
+        "user_management.User", on_delete=models.SET_NULL, null=True, related_name="final_schedule_events"
+    )
+    uid = models.CharField(max_length=255)
+    summary = models.CharField(max_length=300)
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    # 0: primary, 1: overrides (see OnCallSchedule.PRIMARY/OVERRIDES)
+    priority = models.PositiveSmallIntegerField(null=True, default=None)
+    is_cancelled = models.BooleanField(default=False)
+    last_modified = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("schedule", "uid")
+        indexes = [
+            models.Index(fields=["schedule", "start"]),
+        ]
+
+    def to_ical_event(self, summary_prefix: str | None = None) -> icalendar.Event:
+        event = icalendar.Event()
+        event.add(ICAL_SUMMARY, f"{summary_prefix}: {self.summary}" if summary_prefix else self.summary)
+        event.add(ICAL_DATETIME_START, self.start)
+        event.add(ICAL_DATETIME_END, self.end)
+        event.add(ICAL_DATETIME_STAMP, self.last_modified)
+        event.add(ICAL_LAST_MODIFIED, self.last_modified)
+        if self.priority is not None:
+            event.add(ICAL_PRIORITY, self.priority)
+        event[ICAL_UID] = self.uid
+        if self.is_cancelled:
+            event[ICAL_STATUS] = ICAL_STATUS_CANCELLED
+        return event
@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class OnCallInterval(models.Model):
+    """
+    Materialized final schedule: a row per user on-call from start to end, after resolving shifts, overrides and swaps.
+    Rows are rebuilt by OnCallSchedule.refresh_ical_final_schedule for the next ONCALL_INTERVALS_WINDOW_DAYS_AFTER
+    days, so "who is on-call at T" is an indexed range query instead of parsing and expanding iCal files.
+    """
+
+    schedule = models.ForeignKey("schedules.OnCallSchedule", on_delete=models.CASCADE, related_name="oncall_intervals")
+    user = models.ForeignKey("user_management.User", on_delete=models.CASCADE, related_name="oncall_intervals")
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["schedule", "start", "end"]),
+        ]
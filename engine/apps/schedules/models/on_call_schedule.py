@@ -1,7 +1,10 @@
+import bisect
 import copy
 import datetime
+import hashlib
+import heapq
 import itertools
-import re
+import operator
 import typing
 from collections import defaultdict
 from enum import Enum
@@ -10,7 +13,7 @@ import icalendar
 import pytz
 from django.conf import settings
 from django.core.validators import MinLengthValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
 from django.db.utils import DatabaseError
 from django.utils import timezone
@@ -20,27 +23,32 @@ from polymorphic.models import PolymorphicModel
 from polymorphic.query import PolymorphicQuerySet
 
 from apps.schedules.constants import (
+    EXPORT_FULL_REFRESH_DAYS,
     EXPORT_WINDOW_DAYS_AFTER,
     EXPORT_WINDOW_DAYS_BEFORE,
     ICAL_COMPONENT_VEVENT,
     ICAL_DATETIME_END,
-    ICAL_DATETIME_STAMP,
     ICAL_DATETIME_START,
     ICAL_LAST_MODIFIED,
     ICAL_PRIORITY,
     ICAL_STATUS,
-    ICAL_STATUS_CANCELLED,
     ICAL_SUMMARY,
     ICAL_UID,
+    ONCALL_INTERVALS_WINDOW_DAYS_AFTER,
+    ONCALL_INTERVALS_WINDOW_DAYS_BEFORE,
 )
 from apps.schedules.ical_utils import (
     create_base_icalendar,
-    fetch_ical_file_or_get_error,
+    fetch_ical_file_if_modified_or_get_error,
+    get_ical_file_hash,
     get_oncall_users_for_multiple_schedules,
+    get_user_identifiers_from_ical,
     list_of_empty_shifts_in_schedule,
     list_of_oncall_shifts_from_ical,
 )
-from apps.schedules.models import CustomOnCallShift
+from apps.schedules.models import CustomOnCallShift, FinalScheduleEvent, OnCallInterval
+from apps.schedules.models.on_call_schedule_membership import OnCallScheduleMembership
+from apps.schedules.parsed_calendar_cache import parsed_calendar_cache
 from apps.user_management.models import User
 from common.database import NON_POLYMORPHIC_CASCADE, NON_POLYMORPHIC_SET_NULL
 from common.public_primary_keys import generate_public_primary_key, increase_public_primary_key_length
@@ -55,8 +63,13 @@ if typing.TYPE_CHECKING:
     from apps.user_management.models import Organization, Team
 
 
-RE_ICAL_SEARCH_USERNAME = r"SUMMARY:(\[L[0-9]+\] )?{}"
-RE_ICAL_FETCH_USERNAME = re.compile(r"SUMMARY:(?:\[L[0-9]+\] )?([^\s]+)")
+RELATED_USERS_SOURCE_FIELDS = {"cached_ical_file_primary", "cached_ical_file_overrides"}
+ICAL_FILE_HASH_FIELDS = {
+    "cached_ical_file_primary": "cached_ical_file_primary_hash",
+    "prev_ical_file_primary": "prev_ical_file_primary_hash",
+    "cached_ical_file_overrides": "cached_ical_file_overrides_hash",
+    "prev_ical_file_overrides": "prev_ical_file_overrides_hash",
+}
 
 
 # Utility classes for schedule quality report
@@ -154,22 +167,17 @@ class OnCallScheduleQuerySet(PolymorphicQuerySet):
         return get_oncall_users_for_multiple_schedules(self.all(), events_datetime)
 
     def related_to_user(self, user):
-        username_regex = RE_ICAL_SEARCH_USERNAME.format(user.username)
-        return self.filter(
-            Q(cached_ical_file_primary__regex=username_regex)
-            | Q(cached_ical_file_primary__contains=user.email)
-            | Q(cached_ical_file_overrides__regex=username_regex)
-            | Q(cached_ical_file_overrides__contains=user.email),
-            organization=user.organization,
-        )
+        return self.filter(user_memberships__user=user, organization=user.organization)
 
 
 class OnCallSchedule(PolymorphicModel):
     custom_shifts: "RelatedManager['CustomOnCallShift']"
+    final_schedule_events: "RelatedManager['FinalScheduleEvent']"
     organization: "Organization"
     shift_swap_requests: "RelatedManager['ShiftSwapRequest']"
     slack_user_group: typing.Optional["SlackUserGroup"]
     team: typing.Optional["Team"]
+    user_memberships: "RelatedManager['OnCallScheduleMembership']"
 
     objects: models.Manager["OnCallSchedule"] = PolymorphicManager.from_queryset(OnCallScheduleQuerySet)()
 
@@ -193,8 +201,35 @@ class OnCallSchedule(PolymorphicModel):
     cached_ical_file_overrides = models.TextField(null=True, default=None)
     prev_ical_file_overrides = models.TextField(null=True, default=None)
 
+    # content hashes of the iCal files above, kept up to date on save
+    cached_ical_file_primary_hash = models.CharField(max_length=40, null=True, default=None)
+    prev_ical_file_primary_hash = models.CharField(max_length=40, null=True, default=None)
+    cached_ical_file_overrides_hash = models.CharField(max_length=40, null=True, default=None)
+    prev_ical_file_overrides_hash = models.CharField(max_length=40, null=True, default=None)
+
+    # ETag/Last-Modified of the iCal files downloaded from ical_url_primary/ical_url_overrides
+    ical_file_etag_primary = models.CharField(max_length=200, null=True, default=None)
+    ical_file_last_modified_primary = models.CharField(max_length=200, null=True, default=None)
+    ical_file_etag_overrides = models.CharField(max_length=200, null=True, default=None)
+    ical_file_last_modified_overrides = models.CharField(max_length=200, null=True, default=None)
+
+    # periodic iCal files refresh, the interval (in seconds) grows while iCal files don't change
+    ical_refresh_interval = models.PositiveIntegerField(null=True, default=None)
+    ical_next_refresh_at = models.DateTimeField(null=True, default=None)
+
     cached_ical_final_schedule = models.TextField(null=True, default=None)
 
+    # window covered by OnCallInterval rows and hash of the iCal files they were built from
+    oncall_intervals_start = models.DateTimeField(null=True, default=None)
+    oncall_intervals_end = models.DateTimeField(null=True, default=None)
+    oncall_intervals_source_hash = models.CharField(max_length=40, null=True, default=None)
+
+    # end of the window covered by FinalScheduleEvent rows, hash of the sources they were computed from
+    # and last time they were recomputed for the whole export window
+    final_schedule_events_end = models.DateTimeField(null=True, default=None)
+    final_schedule_source_hash = models.CharField(max_length=40, null=True, default=None)
+    final_schedule_full_refresh_at = models.DateTimeField(null=True, default=None)
+
     organization = models.ForeignKey(
         "user_management.Organization", on_delete=NON_POLYMORPHIC_CASCADE, related_name="oncall_schedules"
     )
@@ -247,6 +282,34 @@ class OnCallSchedule(PolymorphicModel):
     has_empty_shifts = models.BooleanField(default=False)
     empty_shifts_report_sent_at = models.DateField(null=True, default=None)
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        # keep iCal files hashes in sync with the iCal files
+        hash_fields = {
+            field: hash_field
+            for field, hash_field in ICAL_FILE_HASH_FIELDS.items()
+            if update_fields is None or field in update_fields
+        }
+        deferred_fields = self.get_deferred_fields()
+        related_users_source_changed = False
+        for field, hash_field in hash_fields.items():
+            ical_file_hash = get_ical_file_hash(getattr(self, field))
+            if field in RELATED_USERS_SOURCE_FIELDS and (
+                hash_field in deferred_fields or getattr(self, hash_field) != ical_file_hash
+            ):
+                related_users_source_changed = True
+            setattr(self, hash_field, ical_file_hash)
+        if update_fields is not None and hash_fields:
+            kwargs["update_fields"] = [*update_fields, *hash_fields.values()]
+
+        super().save(*args, **kwargs)
+        # keep schedule memberships in sync with the cached iCal files they are built from
+        if adding:
+            related_users_source_changed = bool(self.cached_ical_file_primary or self.cached_ical_file_overrides)
+        if related_users_source_changed:
+            self.refresh_related_users()
+
     @property
     def web_page_link(self) -> str:
         return f"{self.organization.web_link}schedules"
@@ -259,15 +322,8 @@ class OnCallSchedule(PolymorphicModel):
         """Returns list of calendars. Primary calendar should always be the first"""
         # if self._ical_file_(primary|overrides) is None -> no cache, will trigger a refresh
         # if self._ical_file_(primary|overrides) == "" -> cached value for an empty schedule
-        if self._ical_file_primary:
-            calendar_primary: icalendar.Calendar = icalendar.Calendar.from_ical(self._ical_file_primary)
-        else:
-            calendar_primary = None
-
-        if self._ical_file_overrides:
-            calendar_overrides: icalendar.Calendar = icalendar.Calendar.from_ical(self._ical_file_overrides)
-        else:
-            calendar_overrides = None
+        calendar_primary = parsed_calendar_cache.get_calendar_or_none(self._ical_file_primary)
+        calendar_overrides = parsed_calendar_cache.get_calendar_or_none(self._ical_file_overrides)
 
         return calendar_primary, calendar_overrides
 
@@ -303,6 +359,30 @@ class OnCallSchedule(PolymorphicModel):
         self._refresh_primary_ical_file()
         self._refresh_overrides_ical_file()
 
+    @staticmethod
+    def get_ical_refresh_due_before(now: datetime.datetime) -> datetime.datetime:
+        """
+        Schedules with ical_next_refresh_at before the returned datetime are refreshed by the periodic task run at `now`.
+        Refresh a bit early, so a schedule due right after a periodic run doesn't wait for the next one.
+        """
+        return now + datetime.timedelta(seconds=settings.SCHEDULE_ICAL_REFRESH_MIN_INTERVAL / 2)
+
+    def is_ical_refresh_due(self, now: datetime.datetime) -> bool:
+        return self.ical_next_refresh_at is None or self.ical_next_refresh_at <= self.get_ical_refresh_due_before(now)
+
+    def update_ical_refresh_interval(self, now: datetime.datetime, ical_files_changed: bool) -> None:
+        """
+        Schedule the next periodic iCal files refresh: soon if iCal files just changed,
+        backing off exponentially while they don't change.
+        """
+        if ical_files_changed or self.ical_refresh_interval is None:
+            interval = settings.SCHEDULE_ICAL_REFRESH_MIN_INTERVAL
+        else:
+            interval = min(self.ical_refresh_interval * 2, settings.SCHEDULE_ICAL_REFRESH_MAX_INTERVAL)
+        self.ical_refresh_interval = interval
+        self.ical_next_refresh_at = now + datetime.timedelta(seconds=interval)
+        self.save(update_fields=["ical_refresh_interval", "ical_next_refresh_at"])
+
     @property
     def _ical_file_primary(self):
         raise NotImplementedError
@@ -317,6 +397,32 @@ class OnCallSchedule(PolymorphicModel):
     def _refresh_overrides_ical_file(self):
         raise NotImplementedError
 
+    def _fetch_ical_file_from_url(self, calendar_type_verbal: str) -> typing.List[str]:
+        """
+        Download iCal file from ical_url_(primary|overrides) into cached_ical_file_(primary|overrides).
+        ETag/Last-Modified of the cached file are sent along, so an unchanged calendar is not downloaded again.
+        Returns the list of updated fields.
+        """
+        cached_field = f"cached_ical_file_{calendar_type_verbal}"
+        error_field = f"ical_file_error_{calendar_type_verbal}"
+        etag_field = f"ical_file_etag_{calendar_type_verbal}"
+        last_modified_field = f"ical_file_last_modified_{calendar_type_verbal}"
+
+        has_cached_ical_file = getattr(self, cached_field) is not None
+        result = fetch_ical_file_if_modified_or_get_error(
+            getattr(self, f"ical_url_{calendar_type_verbal}"),
+            etag=getattr(self, etag_field) if has_cached_ical_file else None,
+            last_modified=getattr(self, last_modified_field) if has_cached_ical_file else None,
+        )
+        if not result.not_modified:
+            setattr(self, cached_field, result.ical_file)
+            # validators that don't fit in the DB field are dropped, the file will be downloaded unconditionally
+            for field, value in ((etag_field, result.etag), (last_modified_field, result.last_modified)):
+                fits = value is not None and len(value) <= self._meta.get_field(field).max_length
+                setattr(self, field, value if fits else None)
+        setattr(self, error_field, result.error)
+        return [cached_field, error_field, etag_field, last_modified_field]
+
     def _drop_primary_ical_file(self):
         self.prev_ical_file_primary = self.cached_ical_file_primary
         self.cached_ical_file_primary = None
@@ -329,12 +435,30 @@ class OnCallSchedule(PolymorphicModel):
 
     def related_users(self):
         """Return users referenced in the schedule."""
-        usernames = []
-        if self.cached_ical_file_primary:
-            usernames += RE_ICAL_FETCH_USERNAME.findall(self.cached_ical_file_primary)
-        if self.cached_ical_file_overrides:
-            usernames += RE_ICAL_FETCH_USERNAME.findall(self.cached_ical_file_overrides)
-        return self.organization.users.filter(username__in=usernames)
+        return self.organization.users.filter(schedule_memberships__schedule=self)
+
+    def refresh_related_users(self):
+        """Rebuild OnCallScheduleMembership rows from the usernames and e-mails referenced in the iCal files."""
+        identifiers = get_user_identifiers_from_ical(self.cached_ical_file_primary) | get_user_identifiers_from_ical(
+            self.cached_ical_file_overrides
+        )
+        user_pks = set()
+        if identifiers:
+            emails = {identifier.lower() for identifier in identifiers}
+            user_pks = set(
+                self.organization.users.filter(Q(username__in=identifiers) | Q(email__lower__in=emails)).values_list(
+                    "pk", flat=True
+                )
+            )
+
+        existing_user_pks = set(self.user_memberships.values_list("user_id", flat=True))
+        if existing_user_pks - user_pks:
+            self.user_memberships.filter(user_id__in=existing_user_pks - user_pks).delete()
+        if user_pks - existing_user_pks:
+            OnCallScheduleMembership.objects.bulk_create(
+                [OnCallScheduleMembership(schedule=self, user_id=pk) for pk in user_pks - existing_user_pks],
+                ignore_conflicts=True,
+            )
 
     def filter_events(
         self,
@@ -461,6 +585,13 @@ class OnCallSchedule(PolymorphicModel):
         return swap_requests
 
     def refresh_ical_final_schedule(self):
+        """
+        Update the final schedule export (FinalScheduleEvent rows and cached_ical_final_schedule).
+        Final events are recomputed for the whole export window only if the schedule sources changed since
+        the last refresh (or every EXPORT_FULL_REFRESH_DAYS), otherwise only for the days added to the window.
+        cached_ical_final_schedule is serialized from all the rows of the window (a few thousand events for
+        a busy schedule), so it is only rebuilt on full refreshes and when any row changed.
+        """
         now = timezone.now()
         # window to consider: from now, -15 days + 6 months
         delta = EXPORT_WINDOW_DAYS_BEFORE
@@ -468,61 +599,232 @@ class OnCallSchedule(PolymorphicModel):
         datetime_start = now.replace(hour=0, minute=0, second=0, microsecond=0) - datetime.timedelta(days=delta)
         datetime_end = datetime_start + datetime.timedelta(days=days - 1, hours=23, minutes=59, seconds=59)
 
-        # setup calendar with final schedule shift events
-        calendar = create_base_icalendar(self.name)
-        events = self.final_events(datetime_start, datetime_end, ignore_untaken_swaps=True)
-        updated_ids = set()
+        source_hash = self._get_final_schedule_source_hash(datetime_start)
+        full_refresh = (
+            self.final_schedule_events_end is None
+            or self.final_schedule_events_end < datetime_start
+            or self.final_schedule_source_hash != source_hash
+            or self.final_schedule_full_refresh_at is None
+            or now - self.final_schedule_full_refresh_at >= datetime.timedelta(days=EXPORT_FULL_REFRESH_DAYS)
+        )
+        refresh_start = datetime_start if full_refresh else self.final_schedule_events_end
+        events = []
+        if refresh_start < datetime_end:
+            events_start = refresh_start if full_refresh else self._get_resolution_start(refresh_start, datetime_end)
+            events = self.final_events(events_start, datetime_end, ignore_untaken_swaps=True)
+            # events ending before refresh_start are already stored
+            events = [e for e in events if e["end"] > refresh_start]
+
+        with transaction.atomic():
+            # lock the schedule, so events and intervals of concurrent refreshes are not mixed
+            list(OnCallSchedule.objects.non_polymorphic().select_for_update().filter(pk=self.pk).values_list("pk"))
+            if self.final_schedule_events_end is None and self.cached_ical_final_schedule:
+                # keep events exported before final schedule events were stored, so they can be cancelled
+                self._import_final_schedule_events(now)
+            events_changed = self._update_final_schedule_events(events, refresh_start, datetime_start, now)
+
+            self.final_schedule_source_hash = source_hash
+            self.final_schedule_events_end = datetime_end
+            if full_refresh:
+                self.final_schedule_full_refresh_at = now
+            if full_refresh or events_changed or self.cached_ical_final_schedule is None:
+                calendar = create_base_icalendar(self.name)
+                for final_schedule_event in self.final_schedule_events.order_by("start", "uid"):
+                    calendar.add_component(final_schedule_event.to_ical_event())
+                self.cached_ical_final_schedule = calendar.to_ical().decode()
+            self._refresh_oncall_intervals(now)
+            self.save(
+                update_fields=[
+                    "cached_ical_final_schedule",
+                    "final_schedule_source_hash",
+                    "final_schedule_events_end",
+                    "final_schedule_full_refresh_at",
+                    "oncall_intervals_start",
+                    "oncall_intervals_end",
+                    "oncall_intervals_source_hash",
+                ]
+            )
+
+    def _get_resolution_start(
+        self, refresh_start: datetime.datetime, datetime_end: datetime.datetime
+    ) -> datetime.datetime:
+        """
+        Return the datetime to resolve final events from, so events ending after refresh_start are split
+        the same way as in a full refresh. Shifts crossing refresh_start are resolved together with every event
+        overlapping them, including overrides ended before refresh_start: any of those events ends after
+        the earliest start of the shifts and overrides ongoing at refresh_start or later.
+        """
+        events = self.filter_events(refresh_start, datetime_end, all_day_datetime=True, ignore_untaken_swaps=True)
+        return min([refresh_start, *(e["start"] for e in events)])
+
+    def _get_final_schedule_source_hash(self, datetime_start: datetime.datetime) -> str:
+        swap_requests = self.shift_swap_requests.filter(swap_end__gte=datetime_start).order_by("pk")
+        swaps = list(swap_requests.values_list("pk", "benefactor_id", "swap_start", "swap_end"))
+        source = f"{self._get_oncall_intervals_source_hash()}\0{swaps}"
+        return hashlib.sha1(source.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+    def _import_final_schedule_events(self, now: datetime.datetime) -> None:
+        """Create FinalScheduleEvent rows from the previously cached final schedule iCal file."""
+        previous = parsed_calendar_cache.get_calendar(self.cached_ical_final_schedule)
+        final_schedule_events = {}
+        for component in previous.walk():
+            if component.name != ICAL_COMPONENT_VEVENT or ICAL_DATETIME_START not in component:
+                continue
+            start = component[ICAL_DATETIME_START].dt
+            dtend = component.get(ICAL_DATETIME_END)
+            end = dtend.dt if dtend else start
+            # shift or overrides coming from ical calendars can be all day events, change to datetime
+            if type(start) == datetime.date:
+                start = datetime.datetime.combine(start, datetime.datetime.min.time(), tzinfo=pytz.UTC)
+            if type(end) == datetime.date:
+                end = datetime.datetime.combine(end, datetime.datetime.min.time(), tzinfo=pytz.UTC)
+            last_modified = component.get(ICAL_LAST_MODIFIED)
+            priority = component.get(ICAL_PRIORITY)
+            uid = str(component[ICAL_UID])
+            final_schedule_events[uid] = FinalScheduleEvent(
+                schedule_id=self.pk,
+                uid=uid,
+                summary=str(component.get(ICAL_SUMMARY, "")),
+                start=start,
+                end=end,
+                priority=int(priority) if priority is not None else None,
+                is_cancelled=bool(component.get(ICAL_STATUS)),
+                last_modified=last_modified.dt if last_modified else now,
+            )
+
+        # event UIDs end with the user public primary key
+        user_ids = dict(
+            self.organization.users.filter(
+                public_primary_key__in={uid.rsplit("-", 1)[-1] for uid in final_schedule_events}
+            ).values_list("public_primary_key", "id")
+        )
+        for uid, final_schedule_event in final_schedule_events.items():
+            final_schedule_event.user_id = user_ids.get(uid.rsplit("-", 1)[-1])
+        FinalScheduleEvent.objects.bulk_create(final_schedule_events.values(), batch_size=1000, ignore_conflicts=True)
+
+    def _update_final_schedule_events(
+        self,
+        events: ScheduleEvents,
+        refresh_start: datetime.datetime,
+        datetime_start: datetime.datetime,
+        now: datetime.datetime,
+    ) -> bool:
+        """
+        Patch FinalScheduleEvent rows with final schedule events recomputed from refresh_start,
+        must be called inside a transaction. Return True if any row was created, updated or deleted.
+        Events ending after refresh_start which are not in the final schedule anymore are cancelled,
+        events ended (or cancelled) before the window start are dropped.
+        """
+        user_ids = dict(
+            self.organization.users.filter(
+                public_primary_key__in={u["pk"] for e in events for u in e["users"]}
+            ).values_list("public_primary_key", "id")
+        )
+        updated = {}
         for e in events:
             for u in e["users"]:
-                event = icalendar.Event()
-                event.add(ICAL_SUMMARY, u["display_name"])
-                event.add(ICAL_DATETIME_START, e["start"])
-                event.add(ICAL_DATETIME_END, e["end"])
-                event.add(ICAL_DATETIME_STAMP, now)
-                event.add(ICAL_LAST_MODIFIED, now)
-                # set priority based on primary/overrides
-                # 0: undefined priority, 1: high priority
-                event.add(ICAL_PRIORITY, e["calendar_type"])
-                event_uid = "{}-{}-{}".format(e["shift"]["pk"], e["start"].strftime("%Y%m%d%H%S"), u["pk"])
-                event[ICAL_UID] = event_uid
-                calendar.add_component(event)
-                updated_ids.add(event_uid)
-
-        # check previously cached final schedule for potentially cancelled events
-        if self.cached_ical_final_schedule:
-            previous = icalendar.Calendar.from_ical(self.cached_ical_final_schedule)
-            for component in previous.walk():
-                if component.name == ICAL_COMPONENT_VEVENT and component[ICAL_UID] not in updated_ids:
-                    # check if event was ended or cancelled, update ical
-                    dtend = component.get(ICAL_DATETIME_END)
-                    dtend_datetime = dtend.dt if dtend else None
-                    if dtend_datetime and type(dtend_datetime) == datetime.date:
-                        # shift or overrides coming from ical calendars can be all day events, change to datetime
-                        dtend_datetime = datetime.datetime.combine(
-                            dtend.dt, datetime.datetime.min.time(), tzinfo=pytz.UTC
-                        )
-                    if dtend_datetime and dtend_datetime < datetime_start:
-                        # event ended before window start
-                        continue
-                    is_cancelled = component.get(ICAL_STATUS)
-                    last_modified = component.get(ICAL_LAST_MODIFIED)
-                    if is_cancelled and last_modified and last_modified.dt < datetime_start:
-                        # drop already ended events older than the window we consider
-                        continue
-                    elif is_cancelled and not last_modified:
-                        # set last_modified if it was missing (e.g. from previous export ical implementation)
-                        component[ICAL_LAST_MODIFIED] = icalendar.vDatetime(now).to_ical()
-                    elif not is_cancelled:
-                        # set the event as cancelled
-                        component[ICAL_DATETIME_END] = component[ICAL_DATETIME_START]
-                        component[ICAL_STATUS] = ICAL_STATUS_CANCELLED
-                        component[ICAL_LAST_MODIFIED] = icalendar.vDatetime(now).to_ical()
-                    # include just cancelled events as well as those that were cancelled during the time window
-                    calendar.add_component(component)
-
-        ical_data = calendar.to_ical().decode()
-        self.cached_ical_final_schedule = ical_data
-        self.save(update_fields=["cached_ical_final_schedule"])
+                uid = "{}-{}-{}".format(e["shift"]["pk"], e["start"].strftime("%Y%m%d%H%S"), u["pk"])
+                updated[uid] = FinalScheduleEvent(
+                    schedule_id=self.pk,
+                    user_id=user_ids.get(u["pk"]),
+                    uid=uid,
+                    summary=u["display_name"],
+                    start=e["start"],
+                    end=e["end"],
+                    priority=e["calendar_type"],
+                    is_cancelled=False,
+                    last_modified=now,
+                )
+
+        # fields compared to decide if an event changed, last_modified is only updated for changed events
+        event_state = operator.attrgetter("user_id", "summary", "start", "end", "priority", "is_cancelled")
+        to_update, to_delete = [], []
+        # only load rows which can be updated, cancelled or dropped,
+        # event UIDs include the start hour, so rows matching recomputed events start in the same hour or later
+        final_schedule_events_filter = (
+            Q(end__gt=refresh_start)
+            | Q(end__lt=datetime_start)
+            | Q(is_cancelled=True, last_modified__lt=datetime_start)
+        )
+        if updated:
+            events_start = min(e.start for e in updated.values()).replace(minute=0, second=0, microsecond=0)
+            final_schedule_events_filter |= Q(start__gte=events_start)
+        for final_schedule_event in self.final_schedule_events.filter(final_schedule_events_filter):
+            new_event = updated.pop(final_schedule_event.uid, None)
+            if new_event is not None:
+                if event_state(final_schedule_event) != event_state(new_event):
+                    new_event.pk = final_schedule_event.pk
+                    to_update.append(new_event)
+            elif final_schedule_event.end < datetime_start or (
+                final_schedule_event.is_cancelled and final_schedule_event.last_modified < datetime_start
+            ):
+                # drop events out of the window and events cancelled before the window start
+                to_delete.append(final_schedule_event.pk)
+            elif not final_schedule_event.is_cancelled and final_schedule_event.end > refresh_start:
+                # set the event as cancelled
+                final_schedule_event.end = final_schedule_event.start
+                final_schedule_event.is_cancelled = True
+                final_schedule_event.last_modified = now
+                to_update.append(final_schedule_event)
+        to_create = list(updated.values())
+
+        if to_delete:
+            FinalScheduleEvent.objects.filter(pk__in=to_delete).delete()
+        FinalScheduleEvent.objects.bulk_update(
+            to_update,
+            ["user", "summary", "start", "end", "priority", "is_cancelled", "last_modified"],
+            batch_size=1000,
+        )
+        FinalScheduleEvent.objects.bulk_create(to_create, batch_size=1000)
+        return bool(to_delete or to_update or to_create)
+
+    def _get_oncall_intervals_source_hash(self) -> str:
+        # combine the hashes of the iCal files kept up to date on save, instead of hashing the files on every lookup
+        source = f"{self.cached_ical_file_primary_hash}\0{self.cached_ical_file_overrides_hash}"
+        return hashlib.sha1(source.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+    def has_oncall_intervals_for(self, events_datetime: datetime.datetime) -> bool:
+        """
+        Check if on-call users at events_datetime can be taken from OnCallInterval rows:
+        the datetime is in the materialized window and iCal files didn't change since the intervals were built.
+        """
+        return (
+            self.oncall_intervals_start is not None
+            and self.oncall_intervals_end is not None
+            and self.oncall_intervals_start <= events_datetime < self.oncall_intervals_end
+            and self.oncall_intervals_source_hash == self._get_oncall_intervals_source_hash()
+        )
+
+    def invalidate_oncall_intervals(self) -> None:
+        """Stop using OnCallInterval rows until the next final schedule refresh, e.g. when a swap is taken."""
+        self.oncall_intervals_start = self.oncall_intervals_end = None
+        OnCallSchedule.objects.non_polymorphic().filter(pk=self.pk).update(
+            oncall_intervals_start=None, oncall_intervals_end=None
+        )
+
+    def _refresh_oncall_intervals(self, now: datetime.datetime) -> None:
+        """
+        Replace OnCallInterval rows with the ones from final schedule events, must be called inside a transaction
+        after FinalScheduleEvent rows are updated. Schedule fields are updated, but not saved.
+        """
+        intervals_start = now.replace(hour=0, minute=0, second=0, microsecond=0) - datetime.timedelta(
+            days=ONCALL_INTERVALS_WINDOW_DAYS_BEFORE
+        )
+        intervals_end = now + datetime.timedelta(days=ONCALL_INTERVALS_WINDOW_DAYS_AFTER)
+        final_schedule_events = self.final_schedule_events.filter(
+            is_cancelled=False, user__isnull=False, start__lt=intervals_end, end__gt=intervals_start
+        )
+        intervals = [
+            OnCallInterval(schedule_id=self.pk, user_id=user_id, start=start, end=end)
+            for user_id, start, end in final_schedule_events.values_list("user_id", "start", "end")
+        ]
+
+        OnCallInterval.objects.filter(schedule_id=self.pk).delete()
+        OnCallInterval.objects.bulk_create(intervals, batch_size=1000)
+
+        self.oncall_intervals_start = intervals_start
+        self.oncall_intervals_end = intervals_end
+        self.oncall_intervals_source_hash = self._get_oncall_intervals_source_hash()
 
     def shifts_for_user(
         self, user: User, datetime_start: datetime.datetime, days: int = 7
@@ -789,46 +1091,48 @@ class OnCallSchedule(PolymorphicModel):
                 start,
             )
 
-        def insort_event(eventlist: ScheduleEvents, e: ScheduleEvent) -> None:
-            """Insert event keeping ordering criteria into already sorted event list."""
-            idx = 0
-            for i in eventlist:
-                if event_cmp_key(e) > event_cmp_key(i):
-                    idx += 1
-                else:
-                    break
-            eventlist.insert(idx, e)
-
-        def _merge_intervals(evs: ScheduleEvents) -> ScheduleEventIntervals:
-            """Keep track of scheduled intervals."""
+        def _merge_intervals(intervals: ScheduleEventIntervals, evs: ScheduleEvents) -> ScheduleEventIntervals:
+            """Keep track of scheduled intervals, adding events to already merged intervals."""
             if not evs:
-                return []
-            intervals = [[e["start"], e["end"]] for e in evs]
-            result = [intervals[0]]
-            for interval in intervals[1:]:
+                return intervals
+            # intervals are already sorted by start, so sorting them together with new events is cheap
+            to_merge = sorted(intervals + [[e["start"], e["end"]] for e in evs], key=lambda i: i[0])
+            result = [list(to_merge[0])]
+            for interval in to_merge[1:]:
                 previous_interval = result[-1]
                 if previous_interval[0] <= interval[0] <= previous_interval[1]:
                     previous_interval[1] = max(previous_interval[1], interval[1])
                 else:
-                    result.append(interval)
+                    result.append(list(interval))
             return result
 
         # sort schedule events by (type desc, priority desc, start timestamp asc)
         events.sort(key=event_cmp_key)
 
+        # pending events are kept in a heap ordered by the same criteria, ties are ordered by a sequence number:
+        # initial events keep their sorted order, and an updated event goes before pending events with the same key
+        pending: typing.List[typing.Tuple[typing.Tuple[int, int, datetime.datetime], int, ScheduleEvent]] = [
+            (event_cmp_key(e), idx, e) for idx, e in enumerate(events)
+        ]  # a sorted list is a valid heap
+        updated_events_sequence = itertools.count(-1, -1)
+
+        def push_pending(e: ScheduleEvent) -> None:
+            heapq.heappush(pending, (event_cmp_key(e), next(updated_events_sequence), e))
+
         # iterate over events, reserving schedule slots based on their priority
         # if the expected slot was already scheduled for a higher priority event,
         # split the event, or fix start/end timestamps accordingly
 
-        intervals = []
+        intervals: ScheduleEventIntervals = []
+        interval_ends: typing.List[datetime.datetime] = []
         resolved: ScheduleEvents = []
-        pending: ScheduleEvents = events
+        merged_count = 0  # number of resolved events already included in intervals
         current_interval_idx = 0  # current scheduled interval being checked
         current_type: typing.Optional[int] = OnCallSchedule.TYPE_ICAL_OVERRIDES  # current calendar type
         current_priority: typing.Optional[int] = None  # current priority level being resolved
 
         while pending:
-            ev = pending.pop(0)
+            _, _, ev = heapq.heappop(pending)
 
             if ev["is_empty"]:
                 # exclude events without active users
@@ -844,8 +1148,9 @@ class OnCallSchedule(PolymorphicModel):
                 # update scheduled intervals on priority change
                 # and start from the beginning for the new priority level
                 # also for calendar event type (overrides first, then apply regular shifts)
-                resolved.sort(key=event_start_cmp_key)
-                intervals = _merge_intervals(resolved)
+                intervals = _merge_intervals(intervals, resolved[merged_count:])
+                interval_ends = [interval[1] for interval in intervals]
+                merged_count = len(resolved)
                 current_interval_idx = 0
                 current_priority = priority
                 current_type = ev["calendar_type"]
@@ -877,8 +1182,7 @@ class OnCallSchedule(PolymorphicModel):
                         # only include event if it is still inside the requested time range
                         # reorder pending events after updating current event start date
                         # (ie. insert the event where it should be to keep the order criteria)
-                        # TODO: switch to bisect insert on python 3.10 (or consider heapq)
-                        insort_event(pending, ev)
+                        push_pending(ev)
                 # done, go to next event
 
             elif ev["start"] >= intervals[current_interval_idx][0] and ev["end"] <= intervals[current_interval_idx][1]:
@@ -894,16 +1198,18 @@ class OnCallSchedule(PolymorphicModel):
                 # update the event start timestamp to match the interval end
                 ev["start"] = intervals[current_interval_idx][1]
                 # unresolved, re-add to pending
-                # TODO: switch to bisect insert on python 3.10 (or consider heapq)
-                insort_event(pending, ev)
+                push_pending(ev)
 
             elif ev["start"] >= intervals[current_interval_idx][1]:
-                # event starts after the current interval, move to next interval and go through it
-                current_interval_idx += 1
+                # event starts after the current interval, move to the first interval it's not after
+                # (intervals don't overlap, so their ends are sorted) and go through it,
+                # a zero-length event at the end of an interval is considered inside of it
+                find_interval = bisect.bisect_right if ev["end"] > ev["start"] else bisect.bisect_left
+                current_interval_idx = find_interval(interval_ends, ev["start"], lo=current_interval_idx)
                 # unresolved, re-add to pending
-                # TODO: switch to bisect insert on python 3.10 (or consider heapq)
-                insort_event(pending, ev)
+                push_pending(ev)
 
+        # events with the same start and shift keep the order they were resolved in
         resolved.sort(key=lambda e: (event_start_cmp_key(e), e["shift"]["pk"] or ""))
         return resolved
 
@@ -1055,10 +1361,7 @@ class OnCallScheduleICal(OnCallSchedule):
         """
         cached_ical_file = self.cached_ical_file_primary
         if self.ical_url_primary is not None and self.cached_ical_file_primary is None:
-            self.cached_ical_file_primary, self.ical_file_error_primary = fetch_ical_file_or_get_error(
-                self.ical_url_primary
-            )
-            self.save(update_fields=["cached_ical_file_primary", "ical_file_error_primary"])
+            self.save(update_fields=self._fetch_ical_file_from_url("primary"))
             cached_ical_file = self.cached_ical_file_primary
         return cached_ical_file
 
@@ -1069,28 +1372,23 @@ class OnCallScheduleICal(OnCallSchedule):
         """
         cached_ical_file = self.cached_ical_file_overrides
         if self.ical_url_overrides is not None and self.cached_ical_file_overrides is None:
-            self.cached_ical_file_overrides, self.ical_file_error_overrides = fetch_ical_file_or_get_error(
-                self.ical_url_overrides
-            )
-            self.save(update_fields=["cached_ical_file_overrides", "ical_file_error_overrides"])
+            self.save(update_fields=self._fetch_ical_file_from_url("overrides"))
             cached_ical_file = self.cached_ical_file_overrides
         return cached_ical_file
 
     def _refresh_primary_ical_file(self):
         self.prev_ical_file_primary = self.cached_ical_file_primary
+        update_fields = ["cached_ical_file_primary", "prev_ical_file_primary", "ical_file_error_primary"]
         if self.ical_url_primary is not None:
-            self.cached_ical_file_primary, self.ical_file_error_primary = fetch_ical_file_or_get_error(
-                self.ical_url_primary,
-            )
-        self.save(update_fields=["cached_ical_file_primary", "prev_ical_file_primary", "ical_file_error_primary"])
+            update_fields = ["prev_ical_file_primary", *self._fetch_ical_file_from_url("primary")]
+        self.save(update_fields=update_fields)
 
     def _refresh_overrides_ical_file(self):
         self.prev_ical_file_overrides = self.cached_ical_file_overrides
+        update_fields = ["cached_ical_file_overrides", "prev_ical_file_overrides", "ical_file_error_overrides"]
         if self.ical_url_overrides is not None:
-            self.cached_ical_file_overrides, self.ical_file_error_overrides = fetch_ical_file_or_get_error(
-                self.ical_url_overrides,
-            )
-        self.save(update_fields=["cached_ical_file_overrides", "prev_ical_file_overrides", "ical_file_error_overrides"])
+            update_fields = ["prev_ical_file_overrides", *self._fetch_ical_file_from_url("overrides")]
+        self.save(update_fields=update_fields)
 
     # Insight logs
     @property
@@ -1154,16 +1452,15 @@ class OnCallScheduleCalendar(OnCallSchedule):
     def _refresh_overrides_ical_file(self):
         self.prev_ical_file_overrides = self.cached_ical_file_overrides
 
+        update_fields = ["cached_ical_file_overrides", "prev_ical_file_overrides", "ical_file_error_overrides"]
         if self.enable_web_overrides:
             # web overrides
             qs = self.custom_shifts.filter(type=CustomOnCallShift.TYPE_OVERRIDE)
             self.cached_ical_file_overrides = self._generate_ical_file_from_shifts(qs)
         elif self.ical_url_overrides is not None:
-            self.cached_ical_file_overrides, self.ical_file_error_overrides = fetch_ical_file_or_get_error(
-                self.ical_url_overrides,
-            )
+            update_fields = ["prev_ical_file_overrides", *self._fetch_ical_file_from_url("overrides")]
 
-        self.save(update_fields=["cached_ical_file_overrides", "prev_ical_file_overrides", "ical_file_error_overrides"])
+        self.save(update_fields=update_fields)
 
     def _generate_ical_file_primary(self):
         """
@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class OnCallScheduleMembership(models.Model):
+    """
+    A row per user referenced in the schedule iCal files (primary or overrides), no matter when they are on-call.
+    Rows are rebuilt by OnCallSchedule.refresh_related_users whenever the cached iCal files are saved,
+    so "schedules related to a user" is an indexed join instead of a regex scan over every schedule iCal file.
+    """
+
+    schedule = models.ForeignKey("schedules.OnCallSchedule", on_delete=models.CASCADE, related_name="user_memberships")
+    user = models.ForeignKey("user_management.User", on_delete=models.CASCADE, related_name="schedule_memberships")
+
+    class Meta:
+        unique_together = ("schedule", "user")
@@ -187,11 +187,13 @@ class ShiftSwapRequest(models.Model):
         self.deleted_at = timezone.now()
         self.save()
         # make sure final schedule ical representation is updated
+        self.schedule.invalidate_oncall_intervals()
         refresh_ical_final_schedule.apply_async((self.schedule.pk,))
 
     def hard_delete(self):
         super().delete()
         # make sure final schedule ical representation is updated
+        self.schedule.invalidate_oncall_intervals()
         refresh_ical_final_schedule.apply_async((self.schedule.pk,))
 
     def shifts(self) -> "ScheduleEvents":
@@ -223,6 +225,7 @@ class ShiftSwapRequest(models.Model):
         notify_beneficiary_about_taken_shift_swap_request.apply_async((self.pk,))
 
         # make sure final schedule ical representation is updated
+        self.schedule.invalidate_oncall_intervals()
         refresh_ical_final_schedule.apply_async((self.schedule.pk,))
 
     # Insight logs
@@ -0,0 +1,91 @@
+import hashlib
+import pickle
+import threading
+import typing
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from icalendar import Calendar
+
+PARSED_CALENDAR_CACHE_KEY = "parsed_ical_{key}"
+# entries are keyed by the iCal text hash and never become stale, timeout only limits memory usage
+PARSED_CALENDAR_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+
+class ParsedCalendarCache:
+    """
+    Parsed iCal calendars keyed by the hash of the iCal text, so an updated iCal file never gets a stale calendar.
+    Calendars are kept pickled in process (LRU limited by the total size in bytes) and in the shared cache,
+    unpickling is many times faster than parsing, and every caller gets its own copy it's free to modify.
+    """
+
+    def __init__(self, max_bytes: int, max_shared_item_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_shared_item_bytes = max_shared_item_bytes
+        self._calendars: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(ical_text: str | bytes) -> str:
+        if isinstance(ical_text, str):
+            ical_text = ical_text.encode("utf-8", errors="surrogatepass")
+        return hashlib.sha1(ical_text).hexdigest()
+
+    def get_calendar(self, ical_text: str | bytes) -> Calendar:
+        if self.max_bytes <= 0:
+            return Calendar.from_ical(ical_text)
+
+        key = self.make_key(ical_text)
+        with self._lock:
+            pickled_calendar = self._calendars.get(key)
+            if pickled_calendar is not None:
+                self._calendars.move_to_end(key)
+        if pickled_calendar is not None:
+            return pickle.loads(pickled_calendar)
+
+        cache_key = PARSED_CALENDAR_CACHE_KEY.format(key=key)
+        pickled_calendar = cache.get(cache_key)
+        if pickled_calendar is not None:
+            calendar = pickle.loads(pickled_calendar)
+        else:
+            # parsing errors are propagated and never cached
+            calendar = Calendar.from_ical(ical_text)
+            pickled_calendar = pickle.dumps(calendar, protocol=pickle.HIGHEST_PROTOCOL)
+            if len(pickled_calendar) <= self.max_shared_item_bytes:
+                cache.set(cache_key, pickled_calendar, timeout=PARSED_CALENDAR_CACHE_TIMEOUT)
+
+        self._add(key, pickled_calendar)
+        return calendar
+
+    def get_calendar_or_none(self, ical_text: str | bytes | None) -> typing.Optional[Calendar]:
+        return self.get_calendar(ical_text) if ical_text else None
+
+    def _add(self, key: str, pickled_calendar: bytes) -> None:
+        if len(pickled_calendar) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._calendars.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._calendars[key] = pickled_calendar
+            self._size += len(pickled_calendar)
+            while self._size > self.max_bytes:
+                _, evicted = self._calendars.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._calendars.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+
+parsed_calendar_cache = ParsedCalendarCache(
+    max_bytes=settings.PARSED_ICAL_CACHE_MAX_BYTES,
+    max_shared_item_bytes=settings.PARSED_ICAL_SHARED_CACHE_MAX_ITEM_BYTES,
+)
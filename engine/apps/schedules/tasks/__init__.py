@@ -19,3 +19,7 @@ from .refresh_ical_files import (  # noqa: F401
     start_refresh_ical_files,
     start_refresh_ical_final_schedules,
 )
+from .refresh_schedules_on_users_change import (  # noqa: F401
+    refresh_schedules_on_users_change,
+    schedule_refresh_on_users_change,
+)
@@ -1,4 +1,6 @@
 from celery.utils.log import get_task_logger
+from django.db.models import Q
+from django.utils import timezone
 
 from apps.alerts.tasks import notify_ical_schedule_shift
 from apps.schedules.ical_utils import is_icals_equal
@@ -15,7 +17,14 @@ def start_refresh_ical_files():
 
     task_logger.info("Start refresh ical files")
 
-    schedules = OnCallSchedule.objects.filter(organization__deleted_at__isnull=True)
+    # schedules with a Slack channel are always processed to send shift notifications
+    refresh_due_before = OnCallSchedule.get_ical_refresh_due_before(timezone.now())
+    schedules = OnCallSchedule.objects.filter(
+        Q(ical_next_refresh_at__isnull=True)
+        | Q(ical_next_refresh_at__lte=refresh_due_before)
+        | Q(channel__isnull=False),
+        organization__deleted_at__isnull=True,
+    )
     for schedule in schedules:
         refresh_ical_file.apply_async((schedule.pk,))
 
@@ -46,46 +55,61 @@ def refresh_ical_file(schedule_pk):
         task_logger.info(f"Tried to refresh non-existing schedule {schedule_pk}")
         return
 
+    now = timezone.now()
+    if not schedule.is_ical_refresh_due(now):
+        task_logger.info(f"Skip refresh ical files for schedule {schedule_pk}, next at {schedule.ical_next_refresh_at}")
+        if schedule.channel is not None:
+            notify_ical_schedule_shift.apply_async((schedule.pk,))
+        return
+
     schedule.refresh_ical_file()
     if schedule.channel is not None:
         notify_ical_schedule_shift.apply_async((schedule.pk,))
 
-    run_task_primary = False
-    if schedule.cached_ical_file_primary:
-        # ie. primary schedule is not empty (None -> no ical, "" -> empty cached value)
-        if not schedule.prev_ical_file_primary:
-            # prev value is empty
-            run_task_primary = True
-            task_logger.info(f"run_task_primary {schedule_pk} {run_task_primary} prev_ical_file_primary is None")
-        else:
-            # prev value is not empty, we need to compare
-            run_task_primary = not is_icals_equal(
-                schedule.cached_ical_file_primary,
-                schedule.prev_ical_file_primary,
-            )
-            task_logger.info(f"run_task_primary {schedule_pk} {run_task_primary} icals not equal")
-
-    run_task_overrides = False
-    if schedule.cached_ical_file_overrides:
-        # ie. overrides schedule is not empty (None -> no ical, "" -> empty cached value)
-        if not schedule.prev_ical_file_overrides:
-            # prev value is empty
-            run_task_overrides = True
-            task_logger.info(f"run_task_overrides {schedule_pk} {run_task_primary} prev_ical_file_overrides is None")
-        else:
-            # prev value is not empty, we need to compare
-            run_task_overrides = not is_icals_equal(
-                schedule.cached_ical_file_overrides,
-                schedule.prev_ical_file_overrides,
-            )
-            task_logger.info(f"run_task_overrides {schedule_pk} {run_task_primary} icals not equal")
+    primary_changed = _is_ical_file_changed(
+        schedule.cached_ical_file_primary,
+        schedule.prev_ical_file_primary,
+        schedule.cached_ical_file_primary_hash,
+        schedule.prev_ical_file_primary_hash,
+    )
+    # ie. primary schedule is not empty (None -> no ical, "" -> empty cached value)
+    run_task_primary = bool(schedule.cached_ical_file_primary) and primary_changed
+    task_logger.info(f"run_task_primary {schedule_pk} {run_task_primary}")
+
+    overrides_changed = _is_ical_file_changed(
+        schedule.cached_ical_file_overrides,
+        schedule.prev_ical_file_overrides,
+        schedule.cached_ical_file_overrides_hash,
+        schedule.prev_ical_file_overrides_hash,
+    )
+    # ie. overrides schedule is not empty (None -> no ical, "" -> empty cached value)
+    run_task_overrides = bool(schedule.cached_ical_file_overrides) and overrides_changed
+    task_logger.info(f"run_task_overrides {schedule_pk} {run_task_overrides}")
     run_task = run_task_primary or run_task_overrides
 
+    schedule.update_ical_refresh_interval(now, primary_changed or overrides_changed)
+    if primary_changed or overrides_changed:
+        # on-call intervals built from the previous files are not used anymore, rebuild them
+        refresh_ical_final_schedule.apply_async((schedule_pk,))
+
     if run_task:
         notify_about_empty_shifts_in_schedule.apply_async((schedule_pk,))
         notify_about_gaps_in_schedule.apply_async((schedule_pk,))
 
 
+def _is_ical_file_changed(
+    cached_ical_file: str | None, prev_ical_file: str | None, cached_hash: str | None, prev_hash: str | None
+) -> bool:
+    if cached_hash is not None and cached_hash == prev_hash:
+        # same content, no need to parse and compare the calendars
+        return False
+    if not cached_ical_file or not prev_ical_file:
+        # None -> no ical, "" -> empty cached value
+        return bool(cached_ical_file) or bool(prev_ical_file)
+    # the content differs, check if the events differ (eg. not only DTSTAMP)
+    return not is_icals_equal(cached_ical_file, prev_ical_file)
+
+
 @shared_dedicated_queue_retry_task()
 def refresh_ical_final_schedule(schedule_pk):
     from apps.schedules.models import OnCallSchedule
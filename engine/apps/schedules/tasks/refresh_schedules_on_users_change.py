@@ -0,0 +1,45 @@
+from celery.utils.log import get_task_logger
+from django.core.cache import cache
+
+from common.custom_celery_tasks import shared_dedicated_queue_retry_task
+
+from .refresh_ical_files import refresh_ical_final_schedule
+
+task_logger = get_task_logger(__name__)
+
+# changes made within the delay (e.g. a save of every user on sync) are handled by a single task run
+USERS_CHANGE_REFRESH_DELAY = 10
+USERS_CHANGE_REFRESH_LOCK_TIMEOUT = 60 * 10
+
+
+def _get_users_change_refresh_lock_cache_key(organization_id):
+    return f"refresh_schedules_on_users_change_{organization_id}"
+
+
+def schedule_refresh_on_users_change(organization_id):
+    """Queue a refresh of the organization schedules after its users were created, updated or deleted."""
+    if cache.add(_get_users_change_refresh_lock_cache_key(organization_id), True, USERS_CHANGE_REFRESH_LOCK_TIMEOUT):
+        refresh_schedules_on_users_change.apply_async((organization_id,), countdown=USERS_CHANGE_REFRESH_DELAY)
+
+
+@shared_dedicated_queue_retry_task(autoretry_for=(Exception,), retry_backoff=True, max_retries=1)
+def refresh_schedules_on_users_change(organization_id):
+    """
+    Update the data schedules resolve from usernames and e-mails in iCal files only when the files change
+    (memberships, final schedule events and on-call intervals), so users created, renamed or granted permissions after that are taken into account.
+    """
+    from apps.schedules.models import OnCallSchedule
+
+    # release the lock first, so users changed while the task is running queue another refresh
+    cache.delete(_get_users_change_refresh_lock_cache_key(organization_id))
+    task_logger.info(f"Start refresh_schedules_on_users_change for organization {organization_id}")
+    # final schedule events are only patched for the days added to the export window while the schedule sources
+    # don't change, reset the source hash so the next refresh resolves the users of all the events again.
+    # On-call intervals are built from those events, look up on-call users from iCal files until then.
+    OnCallSchedule.objects.non_polymorphic().filter(organization_id=organization_id).update(
+        final_schedule_source_hash=None, oncall_intervals_start=None, oncall_intervals_end=None
+    )
+    for schedule in OnCallSchedule.objects.filter(organization_id=organization_id):
+        schedule.refresh_related_users()
+        refresh_ical_final_schedule.apply_async((schedule.pk,))
+    task_logger.info(f"Finish refresh_schedules_on_users_change for organization {organization_id}")
@@ -2,6 +2,8 @@ import datetime
 from unittest.mock import patch
 
 import pytest
+from django.test import override_settings
+from django.utils import timezone
 
 from apps.schedules.models import OnCallScheduleICal, OnCallScheduleWeb
 from apps.schedules.tasks.refresh_ical_files import refresh_ical_file, start_refresh_ical_files
@@ -9,16 +11,16 @@ from apps.schedules.tasks.refresh_ical_files import refresh_ical_file, start_ref
 
 @pytest.mark.django_db
 @pytest.mark.parametrize(
-    "cached_ical_primary,prev_ical_primary,cached_ical_overrides,prev_ical_overrides,run_task",
+    "cached_ical_primary,prev_ical_primary,cached_ical_overrides,prev_ical_overrides,run_task,refresh_final",
     [
-        ("ical data", "", None, None, True),
-        (None, None, "ical data", "", True),
-        ("", "ical data", None, None, False),
-        (None, None, "", "ical data", False),
-        ("ical data", "diff data", None, None, True),
-        ("ical data", "ical data", None, None, False),
-        (None, None, "ical data", "diff data", True),
-        (None, None, "ical data", "ical data", False),
+        ("ical data", "", None, None, True, True),
+        (None, None, "ical data", "", True, True),
+        ("", "ical data", None, None, False, True),
+        (None, None, "", "ical data", False, True),
+        ("ical data", "diff data", None, None, True, True),
+        ("ical data", "ical data", None, None, False, False),
+        (None, None, "ical data", "diff data", True, True),
+        (None, None, "ical data", "ical data", False, False),
     ],
 )
 def test_refresh_ical_file_trigger_run(
@@ -27,6 +29,7 @@ def test_refresh_ical_file_trigger_run(
     cached_ical_overrides,
     prev_ical_overrides,
     run_task,
+    refresh_final,
     make_organization,
     make_schedule,
 ):
@@ -53,10 +56,14 @@ def test_refresh_ical_file_trigger_run(
                     with patch(
                         "apps.schedules.tasks.refresh_ical_files.notify_about_gaps_in_schedule"
                     ) as mock_notify_gaps:
-                        refresh_ical_file(schedule.pk)
+                        with patch(
+                            "apps.schedules.tasks.refresh_ical_files.refresh_ical_final_schedule"
+                        ) as mock_refresh_final:
+                            refresh_ical_file(schedule.pk)
 
         assert mock_notify_empty.apply_async.called == run_task
         assert mock_notify_gaps.apply_async.called == run_task
+        assert mock_refresh_final.apply_async.called == refresh_final
 
 
 @pytest.mark.django_db
@@ -79,3 +86,96 @@ def test_refresh_ical_files_filter_orgs(
         assert len(called_args) == 1
         assert schedule.id in called_args[0].args[0]
         assert schedule_from_deleted_org.id not in called_args[0].args[0]
+
+
+@pytest.mark.django_db
+def test_refresh_ical_file_same_hash_skips_comparison(make_organization, make_schedule):
+    organization = make_organization()
+    schedule = make_schedule(
+        organization,
+        schedule_class=OnCallScheduleICal,
+        cached_ical_file_primary="ical data",
+        prev_ical_file_primary="ical data",
+    )
+
+    with patch("apps.schedules.tasks.refresh_ical_files.is_icals_equal") as mock_is_icals_equal:
+        with patch("apps.schedules.models.OnCallSchedule.refresh_ical_file", return_value=None):
+            with patch(
+                "apps.schedules.tasks.refresh_ical_files.notify_about_empty_shifts_in_schedule"
+            ) as mock_notify_empty:
+                refresh_ical_file(schedule.pk)
+
+    assert not mock_is_icals_equal.called
+    assert not mock_notify_empty.apply_async.called
+
+
+@pytest.mark.django_db
+@override_settings(SCHEDULE_ICAL_REFRESH_MIN_INTERVAL=600, SCHEDULE_ICAL_REFRESH_MAX_INTERVAL=2400)
+def test_refresh_ical_file_adaptive_interval(make_organization, make_schedule):
+    organization = make_organization()
+    schedule = make_schedule(
+        organization,
+        schedule_class=OnCallScheduleICal,
+        cached_ical_file_primary="ical data",
+        prev_ical_file_primary="ical data",
+    )
+
+    def _refresh(changed=False):
+        OnCallScheduleICal.objects.filter(pk=schedule.pk).update(
+            prev_ical_file_primary="diff data" if changed else "ical data",
+            prev_ical_file_primary_hash=None if changed else schedule.cached_ical_file_primary_hash,
+        )
+        with patch("apps.schedules.models.OnCallSchedule.refresh_ical_file", return_value=None) as mock_refresh:
+            with patch("apps.schedules.tasks.refresh_ical_files.notify_about_empty_shifts_in_schedule"):
+                with patch("apps.schedules.tasks.refresh_ical_files.notify_about_gaps_in_schedule"):
+                    refresh_ical_file(schedule.pk)
+        schedule.refresh_from_db()
+        return mock_refresh.called
+
+    def _make_due():
+        OnCallScheduleICal.objects.filter(pk=schedule.pk).update(ical_next_refresh_at=timezone.now())
+
+    assert _refresh()
+    assert schedule.ical_refresh_interval == 600
+    # not due yet
+    assert not _refresh()
+    assert schedule.ical_refresh_interval == 600
+
+    # interval doubles while iCal files don't change, up to the max interval
+    for expected_interval in (1200, 2400, 2400):
+        _make_due()
+        assert _refresh()
+        assert schedule.ical_refresh_interval == expected_interval
+        assert schedule.ical_next_refresh_at > timezone.now() + datetime.timedelta(seconds=expected_interval - 60)
+
+    # iCal files changed, back to the min interval
+    _make_due()
+    with patch("apps.schedules.tasks.refresh_ical_files.is_icals_equal", return_value=False):
+        assert _refresh(changed=True)
+    assert schedule.ical_refresh_interval == 600
+
+
+@pytest.mark.django_db
+@patch("apps.slack.tasks.start_update_slack_user_group_for_schedules.apply_async")
+def test_refresh_ical_files_skip_not_due(
+    mocked_start_update_slack_user_group_for_schedules,
+    make_organization,
+    make_schedule,
+):
+    organization = make_organization()
+    next_refresh_at = timezone.now() + datetime.timedelta(hours=1)
+    due_schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    not_due_schedule = make_schedule(
+        organization, schedule_class=OnCallScheduleWeb, ical_next_refresh_at=next_refresh_at
+    )
+    # shift notifications are sent for schedules with a channel on every run
+    channel_schedule = make_schedule(
+        organization, schedule_class=OnCallScheduleWeb, ical_next_refresh_at=next_refresh_at, channel="channel"
+    )
+
+    with patch("apps.schedules.tasks.refresh_ical_file.apply_async") as mocked_refresh_ical_file:
+        start_refresh_ical_files()
+
+    refreshed = {call.args[0][0] for call in mocked_refresh_ical_file.call_args_list}
+    assert refreshed == {due_schedule.pk, channel_schedule.pk}
+    assert not_due_schedule.pk not in refreshed
@@ -0,0 +1,109 @@
+import datetime
+import textwrap
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from apps.schedules.models import OnCallSchedule, OnCallScheduleICal
+from apps.schedules.tasks.refresh_schedules_on_users_change import refresh_schedules_on_users_change
+from apps.user_management.models import User
+from apps.user_management.models.user import listen_for_user_model_save
+
+ICAL_FILE = textwrap.dedent(
+    """
+    BEGIN:VCALENDAR
+    VERSION:2.0
+    BEGIN:VEVENT
+    SUMMARY:alex
+    DTSTART;VALUE=DATE-TIME:20230807T001508Z
+    DTEND;VALUE=DATE-TIME:20230807T101508Z
+    UID:some-uid
+    END:VEVENT
+    END:VCALENDAR
+"""
+)
+
+
+@pytest.mark.django_db
+def test_refresh_schedules_on_users_change_queued_once(make_organization, make_user_for_organization):
+    organization = make_organization()
+    user = make_user_for_organization(organization)
+    path = "apps.schedules.tasks.refresh_schedules_on_users_change.refresh_schedules_on_users_change.apply_async"
+
+    with patch(path) as mock_apply_async:
+        listen_for_user_model_save(User, user, created=False, update_fields=frozenset(["username"]))
+        listen_for_user_model_save(User, user, created=False, update_fields=frozenset(["permissions"]))
+        listen_for_user_model_save(User, user, created=False)
+        # saving fields not used by schedules doesn't queue a refresh
+        listen_for_user_model_save(User, user, created=False, update_fields=frozenset(["_timezone"]))
+    mock_apply_async.assert_called_once()
+    assert mock_apply_async.call_args.args == ((organization.pk,),)
+
+    # the task allows queueing the next refresh
+    with patch(path) as mock_apply_async:
+        refresh_schedules_on_users_change(organization.pk)
+        listen_for_user_model_save(User, user, created=False)
+    mock_apply_async.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_refresh_schedules_on_users_change_memberships(make_organization, make_user_for_organization, make_schedule):
+    organization = make_organization()
+    user = make_user_for_organization(organization, username="bob")
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleICal, cached_ical_file_primary=ICAL_FILE)
+    assert list(schedule.related_users()) == []
+
+    # user renamed to the username referenced in the iCal file
+    user.username = "alex"
+    user.save(update_fields=["username"])
+    refresh_schedules_on_users_change(organization.pk)
+
+    assert list(schedule.related_users()) == [user]
+    assert list(OnCallSchedule.objects.related_to_user(user)) == [schedule]
+
+    # user created after the iCal file was refreshed
+    other_schedule = make_schedule(
+        organization,
+        schedule_class=OnCallScheduleICal,
+        cached_ical_file_primary=ICAL_FILE.replace("SUMMARY:alex", "SUMMARY:carol@example.com"),
+    )
+    new_user = make_user_for_organization(organization, email="Carol@example.com")
+    assert list(other_schedule.related_users()) == []
+    refresh_schedules_on_users_change(organization.pk)
+
+    assert list(other_schedule.related_users()) == [new_user]
+    assert list(schedule.related_users()) == [user]
+
+
+@pytest.mark.django_db
+def test_refresh_schedules_on_users_change_final_schedule(make_organization, make_user_for_organization, make_schedule):
+    organization = make_organization()
+    user = make_user_for_organization(organization, username="bob")
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    ical_file = ICAL_FILE.replace("20230807T001508Z", today.strftime("%Y%m%dT%H%M%SZ")).replace(
+        "20230807T101508Z", (today + datetime.timedelta(days=1)).strftime("%Y%m%dT%H%M%SZ")
+    )
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleICal, cached_ical_file_primary=ical_file)
+    schedule.refresh_ical_final_schedule()
+    assert schedule.has_oncall_intervals_for(timezone.now())
+    # events of unknown users are not stored
+    assert list(schedule.final_schedule_events.values_list("summary", "user")) == []
+
+    user.username = "alex"
+    user.save(update_fields=["username"])
+    with patch(
+        "apps.schedules.tasks.refresh_schedules_on_users_change.refresh_ical_final_schedule"
+    ) as mock_refresh_final:
+        refresh_schedules_on_users_change(organization.pk)
+    mock_refresh_final.apply_async.assert_called_once_with((schedule.pk,))
+
+    # on-call intervals built before the change are not used
+    schedule = OnCallSchedule.objects.get(pk=schedule.pk)
+    assert not schedule.has_oncall_intervals_for(timezone.now())
+
+    # the next refresh resolves the users of the whole window again
+    schedule.refresh_ical_final_schedule()
+    assert list(schedule.final_schedule_events.values_list("summary", "user")) == [("alex", user.pk)]
+    assert schedule.has_oncall_intervals_for(timezone.now())
+    assert list(schedule.oncall_intervals.values_list("user", flat=True)) == [user.pk]
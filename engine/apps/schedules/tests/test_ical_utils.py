@@ -10,9 +10,12 @@ from django.utils import timezone
 from apps.api.permissions import LegacyAccessControlRole
 from apps.schedules.ical_utils import (
     get_icalendar_tz_or_utc,
+    get_shifts_dict,
+    get_user_identifiers_from_ical,
     is_icals_equal,
     list_of_oncall_shifts_from_ical,
     list_users_to_notify_from_ical,
+    memoized_users_in_ical,
     parse_event_uid,
     users_in_ical,
 )
@@ -78,6 +81,30 @@ def test_get_icalendar_tz_or_utc_fallback():
     assert tz == pytz.timezone("UTC")
 
 
+def test_get_user_identifiers_from_ical():
+    ical_data = textwrap.dedent(
+        """
+        BEGIN:VCALENDAR
+        VERSION:2.0
+        BEGIN:VEVENT
+        SUMMARY:[L1] alex
+        UID:some-uid
+        END:VEVENT
+        BEGIN:VEVENT
+        SUMMARY:On call
+        DESCRIPTION:bob@company.com
+        ATTENDEE;CN=Some Very Long Name;ROLE=REQ-PARTICIPANT;PARTSTAT=ACCEPTED:mailto:carol.
+         smith@company.com
+        UID:other-uid
+        END:VEVENT
+        END:VCALENDAR
+    """
+    )
+    assert get_user_identifiers_from_ical(ical_data) == {"alex", "On", "bob@company.com", "carol.smith@company.com"}
+    assert get_user_identifiers_from_ical(ical_data.encode()) == get_user_identifiers_from_ical(ical_data)
+    assert get_user_identifiers_from_ical(None) == set()
+
+
 @pytest.mark.django_db
 def test_users_in_ical_email_case_insensitive(make_organization_and_user, make_user_for_organization):
     organization, user = make_organization_and_user()
@@ -317,6 +344,57 @@ def test_shifts_dict_from_cached_final(
     assert shifts == expected_events
 
 
+@pytest.mark.django_db
+def test_shifts_dict_resolves_users_once_per_calendar(
+    make_organization,
+    make_user_for_organization,
+    make_schedule,
+    make_on_call_shift,
+    django_assert_max_num_queries,
+):
+    organization = make_organization()
+    users = [make_user_for_organization(organization) for _ in range(20)]
+    # one of the users is referenced by e-mail, as in imported calendars
+    users[0].username = "not-in-ical"
+    users[0].save(update_fields=["username"])
+
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    data = {
+        "start": today,
+        "rotation_start": today,
+        "duration": timezone.timedelta(hours=24),
+        "priority_level": 1,
+        "frequency": CustomOnCallShift.FREQUENCY_DAILY,
+        "schedule": schedule,
+    }
+    on_call_shift = make_on_call_shift(
+        organization=organization, shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT, **data
+    )
+    on_call_shift.add_rolling_users([[u] for u in users])
+    schedule.refresh_ical_file()
+    schedule.refresh_from_db()
+    schedule.cached_ical_file_primary = schedule.cached_ical_file_primary.replace(
+        "SUMMARY:[L1] not-in-ical", f"SUMMARY:[L1] {users[0].email.upper()}"
+    )
+    memoized_users_in_ical.cache_clear()
+
+    # 90-day view of a 20-person daily rotation
+    calendar = icalendar.Calendar.from_ical(schedule.cached_ical_file_primary)
+    # organization + users referenced in the calendar, fetched with a single query
+    with django_assert_max_num_queries(2) as ctx:
+        shifts, _ = get_shifts_dict(
+            calendar, OnCallSchedule.PRIMARY, schedule, today, today + timezone.timedelta(days=90)
+        )
+    assert len([q for q in ctx.captured_queries if "user_management_user" in q["sql"]]) == 1
+
+    assert len(shifts) == 90
+    for day, shift in enumerate(sorted(shifts, key=lambda s: s["start"])):
+        assert shift["start"] == today + timezone.timedelta(days=day)
+        assert list(shift["users"]) == [users[day % 20]]
+        assert shift["missing_users"] == []
+
+
 def test_parse_event_uid_from_export():
     shift_pk = "OUCE6WAHL35PP"
     user_pk = "UHZ38D6AQXXBY"
@@ -17,8 +17,15 @@ from apps.schedules.constants import (
     ICAL_STATUS,
     ICAL_STATUS_CANCELLED,
     ICAL_SUMMARY,
+    ONCALL_INTERVALS_WINDOW_DAYS_AFTER,
+)
+from apps.schedules.ical_utils import (
+    IcalFileFetchResult,
+    get_oncall_users_for_multiple_schedules,
+    list_users_to_notify_from_ical,
+    list_users_to_notify_from_ical_for_period,
+    memoized_users_in_ical,
 )
-from apps.schedules.ical_utils import memoized_users_in_ical
 from apps.schedules.models import (
     CustomOnCallShift,
     OnCallSchedule,
@@ -1383,14 +1390,54 @@ def test_api_schedule_use_overrides_from_url(make_organization, make_schedule, g
     )
     assert schedule.enable_web_overrides is False
 
-    with patch("apps.schedules.models.on_call_schedule.fetch_ical_file_or_get_error") as mock_fetch_ical:
-        mock_fetch_ical.return_value = (ical_data, None)
+    with patch("apps.schedules.models.on_call_schedule.fetch_ical_file_if_modified_or_get_error") as mock_fetch_ical:
+        mock_fetch_ical.return_value = IcalFileFetchResult(ical_data, None)
         schedule.refresh_ical_file()
 
     schedule.refresh_from_db()
     assert schedule.cached_ical_file_overrides == ical_data
 
 
+@pytest.mark.django_db
+def test_refresh_ical_file_from_url_not_modified(make_organization, make_schedule, get_ical):
+    ical_data = get_ical("calendar_with_recurring_event.ics").to_ical().decode("utf-8")
+    organization = make_organization()
+    schedule = make_schedule(
+        organization,
+        schedule_class=OnCallScheduleICal,
+        ical_url_primary="http://some-url",
+    )
+
+    with patch("apps.schedules.ical_utils.requests.get") as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.text = ical_data
+        mock_get.return_value.headers = {"ETag": '"v1"', "Last-Modified": "Tue, 17 Oct 2023 08:00:00 GMT"}
+        schedule.refresh_ical_file()
+
+    # no validators sent for the first download
+    assert "If-None-Match" not in mock_get.call_args.kwargs["headers"]
+    schedule.refresh_from_db()
+    assert schedule.cached_ical_file_primary == ical_data
+    assert schedule.ical_file_etag_primary == '"v1"'
+    assert schedule.ical_file_last_modified_primary == "Tue, 17 Oct 2023 08:00:00 GMT"
+
+    with patch("apps.schedules.ical_utils.requests.get") as mock_get:
+        mock_get.return_value.status_code = 304
+        mock_get.return_value.headers = {}
+        schedule.refresh_ical_file()
+
+    headers = mock_get.call_args.kwargs["headers"]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Tue, 17 Oct 2023 08:00:00 GMT"
+    schedule.refresh_from_db()
+    # cached file is kept as is
+    assert schedule.cached_ical_file_primary == ical_data
+    assert schedule.prev_ical_file_primary == ical_data
+    assert schedule.cached_ical_file_primary_hash == schedule.prev_ical_file_primary_hash
+    assert schedule.ical_file_error_primary is None
+    assert schedule.ical_file_etag_primary == '"v1"'
+
+
 @pytest.mark.django_db
 def test_api_schedule_use_overrides_from_db(
     make_organization, make_user_for_organization, make_schedule, make_on_call_shift
@@ -1482,8 +1529,8 @@ def test_api_schedule_ignores_overrides_from_url(
     )
     override.add_rolling_users([[user_1, user_2]])
 
-    with patch("apps.schedules.models.on_call_schedule.fetch_ical_file_or_get_error") as mock_fetch_ical:
-        mock_fetch_ical.return_value = (ical_data, None)
+    with patch("apps.schedules.models.on_call_schedule.fetch_ical_file_if_modified_or_get_error") as mock_fetch_ical:
+        mock_fetch_ical.return_value = IcalFileFetchResult(ical_data, None)
         schedule.refresh_ical_file()
 
     schedule.refresh_from_db()
@@ -2783,3 +2830,379 @@ def test_shifts_for_user_without_final_ical(
     assert len(passed_shifts) == 0
     assert len(current_shifts) == 0
     assert len(upcoming_shifts) == 0
+
+
+@pytest.mark.django_db
+def test_refresh_ical_final_schedule_oncall_intervals(
+    make_organization,
+    make_user_for_organization,
+    make_schedule,
+    make_on_call_shift,
+    django_assert_num_queries,
+):
+    organization = make_organization()
+    user_1 = make_user_for_organization(organization)
+    user_2 = make_user_for_organization(organization)
+    user_3 = make_user_for_organization(organization)
+
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today + timezone.timedelta(hours=6)
+    data = {
+        "start": start,
+        "rotation_start": start,
+        "duration": timezone.timedelta(hours=12),
+        "priority_level": 1,
+        "frequency": CustomOnCallShift.FREQUENCY_DAILY,
+        "schedule": schedule,
+    }
+    on_call_shift = make_on_call_shift(
+        organization=organization, shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT, **data
+    )
+    on_call_shift.add_rolling_users([[user_1], [user_2]])
+    override = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_OVERRIDE,
+        start=start + timezone.timedelta(days=1, hours=2),
+        rotation_start=start + timezone.timedelta(days=1, hours=2),
+        duration=timezone.timedelta(hours=3),
+        schedule=schedule,
+    )
+    override.add_rolling_users([[user_3]])
+
+    schedule.refresh_ical_final_schedule()
+    schedule.refresh_from_db()
+    assert schedule.oncall_intervals.exists()
+
+    # shift boundaries are checked separately, iCal expansion doesn't include events starting or ending at the time
+    times = [today + timezone.timedelta(hours=hours, minutes=30) for hours in range(0, 24 * 3)]
+    times += [
+        start + timezone.timedelta(days=1, hours=2, seconds=1),
+        start + timezone.timedelta(days=1, hours=5, seconds=1),
+    ]
+    for events_datetime in times:
+        assert schedule.has_oncall_intervals_for(events_datetime)
+        with patch.object(OnCallSchedule, "final_events") as mock_final_events:
+            users = list_users_to_notify_from_ical(schedule, events_datetime)
+        assert not mock_final_events.called
+        expected = list_users_to_notify_from_ical_for_period(schedule, events_datetime, events_datetime)
+        assert sorted(u.pk for u in users) == sorted(u.pk for u in expected), events_datetime
+
+    # a single query for intervals and a single query for users of all schedules
+    with django_assert_num_queries(2):
+        oncall_users = get_oncall_users_for_multiple_schedules([schedule], start + timezone.timedelta(hours=1))
+    assert oncall_users == {schedule.pk: [user_1]}
+
+    # a user is on-call from the start of the shift and until its end
+    assert list_users_to_notify_from_ical(schedule, start) == [user_1]
+    assert list_users_to_notify_from_ical(schedule, start + timezone.timedelta(days=1, hours=2)) == [user_3]
+    assert list_users_to_notify_from_ical(schedule, start + timezone.timedelta(days=1, hours=5)) == [user_2]
+    assert list_users_to_notify_from_ical(schedule, start + timezone.timedelta(hours=12)) == []
+
+
+@pytest.mark.django_db
+def test_oncall_intervals_users_in_events_order(
+    make_organization,
+    make_user_for_organization,
+    make_schedule,
+    make_on_call_shift,
+):
+    organization = make_organization()
+    user_1 = make_user_for_organization(organization)
+    user_2 = make_user_for_organization(organization)
+
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0) + timezone.timedelta(days=1)
+    # user_2 shift starts before user_1 shift, they overlap
+    for user, shift_start in ((user_2, start), (user_1, start + timezone.timedelta(hours=1))):
+        on_call_shift = make_on_call_shift(
+            organization=organization,
+            shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+            start=shift_start,
+            rotation_start=shift_start,
+            duration=timezone.timedelta(hours=3),
+            priority_level=1,
+            frequency=CustomOnCallShift.FREQUENCY_DAILY,
+            schedule=schedule,
+        )
+        on_call_shift.add_rolling_users([[user]])
+    schedule.refresh_ical_final_schedule()
+
+    events_datetime = start + timezone.timedelta(hours=2)
+    assert schedule.has_oncall_intervals_for(events_datetime)
+    assert list_users_to_notify_from_ical(schedule, events_datetime) == [user_2, user_1]
+
+
+@pytest.mark.django_db
+def test_oncall_intervals_not_used_when_outdated(
+    make_organization,
+    make_user_for_organization,
+    make_schedule,
+    make_on_call_shift,
+    make_shift_swap_request,
+):
+    organization = make_organization()
+    user = make_user_for_organization(organization)
+    other_user = make_user_for_organization(organization)
+
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0) + timezone.timedelta(days=1)
+    on_call_shift = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+        start=start,
+        rotation_start=start,
+        duration=timezone.timedelta(hours=12),
+        priority_level=1,
+        frequency=CustomOnCallShift.FREQUENCY_DAILY,
+        schedule=schedule,
+    )
+    on_call_shift.add_rolling_users([[user]])
+    schedule.refresh_ical_final_schedule()
+    events_datetime = start + timezone.timedelta(hours=1)
+    assert schedule.has_oncall_intervals_for(events_datetime)
+    # not materialized
+    assert not schedule.has_oncall_intervals_for(start + timezone.timedelta(days=ONCALL_INTERVALS_WINDOW_DAYS_AFTER))
+
+    # taken swap request changes on-call users
+    swap_request = make_shift_swap_request(
+        schedule, user, swap_start=start, swap_end=start + timezone.timedelta(hours=12)
+    )
+    swap_request.take(other_user)
+    schedule.refresh_from_db()
+    assert not schedule.has_oncall_intervals_for(events_datetime)
+    assert list_users_to_notify_from_ical(schedule, events_datetime) == [other_user]
+
+    schedule.refresh_ical_final_schedule()
+    assert schedule.has_oncall_intervals_for(events_datetime)
+    assert list_users_to_notify_from_ical(schedule, events_datetime) == [other_user]
+
+    # iCal files changed
+    schedule.drop_cached_ical()
+    assert not schedule.has_oncall_intervals_for(events_datetime)
+
+
+@pytest.mark.django_db
+def test_resolve_schedule_many_events(make_organization, make_schedule):
+    organization = make_organization()
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    datetime_start = timezone.now().replace(minute=0, second=0, microsecond=0)
+    hours = 1000
+
+    def _event(priority_level, start, end):
+        return {
+            "start": start,
+            "end": end,
+            "calendar_type": OnCallSchedule.TYPE_ICAL_PRIMARY,
+            "priority_level": priority_level,
+            "is_empty": False,
+            "is_gap": False,
+            "users": [],
+            "shift": {"pk": f"shift-{priority_level}"},
+        }
+
+    # 10 priority levels with 1000 hourly events each, lower levels are shifted by 30 minutes,
+    # so each of their events overlaps two events of the top level and has to be split
+    events = []
+    for priority_level in range(1, 11):
+        offset = timezone.timedelta(minutes=0 if priority_level == 10 else 30)
+        for hour in range(hours):
+            start = datetime_start + timezone.timedelta(hours=hour) + offset
+            events.append(_event(priority_level, start, start + timezone.timedelta(hours=1)))
+
+    datetime_end = datetime_start + timezone.timedelta(hours=hours + 1)
+    resolved = schedule._resolve_schedule(events, datetime_start, datetime_end)
+
+    top_level_end = datetime_start + timezone.timedelta(hours=hours)
+    expected = [
+        (datetime_start + timezone.timedelta(hours=hour), datetime_start + timezone.timedelta(hours=hour + 1), 10)
+        for hour in range(hours)
+    ]
+    # only the part of the highest lower level event after the top level ends is left
+    expected.append((top_level_end, top_level_end + timezone.timedelta(minutes=30), 9))
+    assert [(e["start"], e["end"], e["priority_level"]) for e in resolved] == expected
+
+
+@pytest.mark.django_db
+def test_schedule_memberships_follow_ical_files(make_organization, make_user_for_organization, make_schedule):
+    organization = make_organization()
+    user_a = make_user_for_organization(organization, username="alex")
+    user_b = make_user_for_organization(organization, email="Bob@Company.com")
+    other_organization_user = make_user_for_organization(make_organization(), username="alex")
+    ical_template = textwrap.dedent(
+        """
+        BEGIN:VCALENDAR
+        VERSION:2.0
+        BEGIN:VEVENT
+        SUMMARY:{}
+        DESCRIPTION:{}
+        DTSTART;VALUE=DATE-TIME:20230807T001508Z
+        DTEND;VALUE=DATE-TIME:20230807T101508Z
+        UID:some-uid
+        END:VEVENT
+        END:VCALENDAR
+    """
+    )
+    schedule = make_schedule(
+        organization,
+        schedule_class=OnCallScheduleICal,
+        cached_ical_file_primary=ical_template.format("[L1] alex", "bob@company.com"),
+    )
+
+    assert set(schedule.related_users()) == {user_a, user_b}
+    assert list(OnCallSchedule.objects.related_to_user(user_a)) == [schedule]
+    assert list(OnCallSchedule.objects.related_to_user(user_b)) == [schedule]
+    assert list(OnCallSchedule.objects.related_to_user(other_organization_user)) == []
+
+    # user_b is no longer referenced once the iCal file is refreshed
+    schedule.cached_ical_file_primary = ical_template.format("[L1] alex", "nobody")
+    schedule.save(update_fields=["cached_ical_file_primary"])
+
+    assert set(schedule.related_users()) == {user_a}
+    assert list(OnCallSchedule.objects.related_to_user(user_b)) == []
+
+    # saving other fields or saving the schedule with unchanged iCal files doesn't rebuild memberships
+    with patch.object(OnCallSchedule, "refresh_related_users") as mock_refresh_related_users:
+        schedule.save(update_fields=["name"])
+        schedule.save()
+        OnCallSchedule.objects.get(pk=schedule.pk).save()
+    mock_refresh_related_users.assert_not_called()
+
+    # a full save with a changed iCal file rebuilds memberships
+    schedule.cached_ical_file_primary = ical_template.format("[L1] alex", "bob@company.com")
+    schedule.save()
+
+    assert set(schedule.related_users()) == {user_a, user_b}
+
+
+@pytest.mark.django_db
+def test_refresh_ical_final_schedule_incremental(
+    make_organization,
+    make_user_for_organization,
+    make_schedule,
+    make_on_call_shift,
+):
+    organization = make_organization()
+    u1 = make_user_for_organization(organization)
+
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    # shifts start tomorrow, so deleting the shift cancels all of its events
+    data = {
+        "start": today + timezone.timedelta(days=1, hours=10),
+        "rotation_start": today + timezone.timedelta(days=1, hours=10),
+        "duration": timezone.timedelta(hours=2),
+        "priority_level": 1,
+        "frequency": CustomOnCallShift.FREQUENCY_DAILY,
+        "schedule": schedule,
+    }
+    on_call_shift = make_on_call_shift(
+        organization=organization, shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT, **data
+    )
+    on_call_shift.add_rolling_users([[u1]])
+    schedule.refresh_ical_file()
+
+    def _refresh(days_after):
+        with patch("apps.schedules.models.on_call_schedule.EXPORT_WINDOW_DAYS_AFTER", days_after):
+            with patch("apps.schedules.models.on_call_schedule.EXPORT_WINDOW_DAYS_BEFORE", 0):
+                with patch.object(schedule, "final_events", wraps=schedule.final_events) as mock_final_events:
+                    schedule.refresh_ical_final_schedule()
+        return mock_final_events
+
+    # first refresh computes the whole window
+    mock_final_events = _refresh(3)
+    assert mock_final_events.call_args.args[0] == today
+    events_end = schedule.final_schedule_events_end
+    first_event = schedule.final_schedule_events.get(start=on_call_shift.start)
+    assert first_event.user == u1
+    assert schedule.final_schedule_events.count() == 2
+
+    # window moves forward, sources are unchanged: only the new days are computed, existing events are untouched
+    mock_final_events = _refresh(5)
+    assert mock_final_events.call_args.args[0] == events_end
+    assert schedule.final_schedule_events.count() == 4
+    assert schedule.final_schedule_events.get(pk=first_event.pk).last_modified == first_event.last_modified
+    assert schedule.oncall_intervals.filter(user=u1).count() == 4
+
+    # nothing to compute or export if the window didn't change
+    with patch("apps.schedules.models.on_call_schedule.create_base_icalendar") as mock_create_base_icalendar:
+        mock_final_events = _refresh(5)
+    mock_final_events.assert_not_called()
+    mock_create_base_icalendar.assert_not_called()
+
+    # shift change: whole window is recomputed, events are patched
+    on_call_shift.delete()
+    # reload instance to avoid cached properties issue
+    schedule = OnCallScheduleWeb.objects.get(id=schedule.id)
+    schedule.refresh_ical_file()
+    mock_final_events = _refresh(5)
+    assert mock_final_events.call_args.args[0] == today
+    assert schedule.final_schedule_events.filter(is_cancelled=True).count() == 4
+
+    calendar = icalendar.Calendar.from_ical(schedule.cached_ical_final_schedule)
+    events = [component for component in calendar.walk() if component.name == ICAL_COMPONENT_VEVENT]
+    assert len(events) == 4
+    assert all(component[ICAL_STATUS] == ICAL_STATUS_CANCELLED for component in events)
+
+
+@pytest.mark.django_db
+def test_refresh_ical_final_schedule_incremental_split_shift_crossing_window_end(
+    make_organization,
+    make_user_for_organization,
+    make_schedule,
+    make_on_call_shift,
+):
+    organization = make_organization()
+    user_a = make_user_for_organization(organization)
+    user_b = make_user_for_organization(organization)
+
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    # shift: tomorrow 20 - day after tomorrow 12 / A, crossing the end of the export window
+    on_call_shift = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+        start=today + timezone.timedelta(days=1, hours=20),
+        rotation_start=today + timezone.timedelta(days=1, hours=20),
+        duration=timezone.timedelta(hours=16),
+        priority_level=1,
+        schedule=schedule,
+    )
+    on_call_shift.add_rolling_users([[user_a]])
+    # override: tomorrow 21-22 / B, ending before the end of the export window
+    override = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_OVERRIDE,
+        start=today + timezone.timedelta(days=1, hours=21),
+        rotation_start=today + timezone.timedelta(days=1, hours=21),
+        duration=timezone.timedelta(hours=1),
+        schedule=schedule,
+    )
+    override.add_rolling_users([[user_b]])
+    schedule.refresh_ical_file()
+
+    def _refresh(days_after):
+        with patch("apps.schedules.models.on_call_schedule.EXPORT_WINDOW_DAYS_AFTER", days_after):
+            with patch("apps.schedules.models.on_call_schedule.EXPORT_WINDOW_DAYS_BEFORE", 0):
+                schedule.refresh_ical_final_schedule()
+
+    def _final_schedule_events():
+        final_schedule_events = schedule.final_schedule_events.filter(is_cancelled=False).order_by("start", "uid")
+        return list(final_schedule_events.values_list("uid", "user", "start", "end"))
+
+    _refresh(2)
+    full_refresh_at = schedule.final_schedule_full_refresh_at
+    # window moves forward: the shift is recomputed together with the override
+    _refresh(3)
+    assert schedule.final_schedule_full_refresh_at == full_refresh_at
+    incremental_events = _final_schedule_events()
+    assert not schedule.final_schedule_events.filter(is_cancelled=True).exists()
+
+    schedule.final_schedule_full_refresh_at = None
+    _refresh(3)
+    assert _final_schedule_events() == incremental_events
+    assert [(user, start - today, end - today) for _, user, start, end in incremental_events] == [
+        (user_a.pk, timezone.timedelta(days=1, hours=20), timezone.timedelta(days=1, hours=21)),
+        (user_b.pk, timezone.timedelta(days=1, hours=21), timezone.timedelta(days=1, hours=22)),
+        (user_a.pk, timezone.timedelta(days=1, hours=22), timezone.timedelta(days=2, hours=12)),
+    ]
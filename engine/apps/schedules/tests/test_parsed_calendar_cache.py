@@ -0,0 +1,87 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from icalendar import Calendar
+
+from apps.schedules.parsed_calendar_cache import PARSED_CALENDAR_CACHE_KEY, ParsedCalendarCache
+from apps.schedules.tests.conftest import CALENDARS_FOLDER
+
+
+def read_calendar(calendar_name):
+    with open(os.path.join(CALENDARS_FOLDER, calendar_name)) as file:
+        return file.read()
+
+
+@pytest.fixture()
+def ical_text():
+    ical_text = read_calendar("calendar_with_recurring_event.ics")
+    cache.delete(PARSED_CALENDAR_CACHE_KEY.format(key=ParsedCalendarCache.make_key(ical_text)))
+    return ical_text
+
+
+def test_get_calendar(ical_text):
+    parsed_calendar_cache = ParsedCalendarCache(max_bytes=1024 * 1024, max_shared_item_bytes=1024 * 1024)
+
+    with patch.object(Calendar, "from_ical", wraps=Calendar.from_ical) as mock_from_ical:
+        calendar = parsed_calendar_cache.get_calendar(ical_text)
+        same_calendar = parsed_calendar_cache.get_calendar(ical_text)
+    assert mock_from_ical.call_count == 1
+
+    assert calendar.to_ical() == Calendar.from_ical(ical_text).to_ical()
+    assert same_calendar.to_ical() == calendar.to_ical()
+    # every caller gets its own copy
+    assert same_calendar is not calendar
+
+
+def test_get_calendar_from_shared_cache(ical_text):
+    ParsedCalendarCache(max_bytes=1024 * 1024, max_shared_item_bytes=1024 * 1024).get_calendar(ical_text)
+
+    # another process gets the calendar parsed by the first one
+    parsed_calendar_cache = ParsedCalendarCache(max_bytes=1024 * 1024, max_shared_item_bytes=1024 * 1024)
+    with patch.object(Calendar, "from_ical", wraps=Calendar.from_ical) as mock_from_ical:
+        calendar = parsed_calendar_cache.get_calendar(ical_text)
+    assert mock_from_ical.call_count == 0
+    assert calendar.to_ical() == Calendar.from_ical(ical_text).to_ical()
+
+
+def test_get_calendar_max_bytes(ical_text):
+    other_ical_text = read_calendar("calendar_with_all_day_event.ics")
+    parsed_calendar_cache = ParsedCalendarCache(max_bytes=1024 * 1024, max_shared_item_bytes=0)
+    parsed_calendar_cache.get_calendar(ical_text)
+    size = parsed_calendar_cache.size
+    parsed_calendar_cache.get_calendar(other_ical_text)
+    other_size = parsed_calendar_cache.size - size
+
+    # only one of the calendars fits, least recently used one is evicted
+    parsed_calendar_cache.clear()
+    parsed_calendar_cache.max_bytes = max(size, other_size)
+    parsed_calendar_cache.get_calendar(ical_text)
+    parsed_calendar_cache.get_calendar(other_ical_text)
+    assert parsed_calendar_cache.size == other_size
+    with patch.object(Calendar, "from_ical", wraps=Calendar.from_ical) as mock_from_ical:
+        parsed_calendar_cache.get_calendar(ical_text)
+    assert mock_from_ical.call_count == 1
+
+    # calendars bigger than the limit are not cached
+    parsed_calendar_cache.max_bytes = size - 1
+    parsed_calendar_cache.clear()
+    parsed_calendar_cache.get_calendar(ical_text)
+    assert parsed_calendar_cache.size == 0
+
+
+def test_get_calendar_changed_ical(ical_text):
+    parsed_calendar_cache = ParsedCalendarCache(max_bytes=1024 * 1024, max_shared_item_bytes=1024 * 1024)
+    parsed_calendar_cache.get_calendar(ical_text)
+
+    updated_ical_text = ical_text.replace("SUMMARY:", "SUMMARY:updated ", 1)
+    calendar = parsed_calendar_cache.get_calendar(updated_ical_text)
+    assert calendar.to_ical() == Calendar.from_ical(updated_ical_text).to_ical()
+
+
+def test_get_calendar_parse_error_not_cached():
+    parsed_calendar_cache = ParsedCalendarCache(max_bytes=1024 * 1024, max_shared_item_bytes=1024 * 1024)
+    with pytest.raises(ValueError):
+        parsed_calendar_cache.get_calendar("not a calendar")
+    assert parsed_calendar_cache.size == 0
@@ -19,7 +19,7 @@ from apps.api.permissions import (
     RBACPermission,
     user_is_authorized,
 )
-from apps.schedules.tasks import drop_cached_ical_for_custom_events_for_organization
+from apps.schedules.tasks import drop_cached_ical_for_custom_events_for_organization, schedule_refresh_on_users_change
 from common.public_primary_keys import generate_public_primary_key, increase_public_primary_key_length
 
 if typing.TYPE_CHECKING:
@@ -147,6 +147,10 @@ class UserManager(models.Manager["User"]):
             users_to_update, ["email", "name", "username", "role", "avatar_url", "permissions"], batch_size=5000
         )
 
+        # bulk operations don't send post_save signals
+        if users_to_create or user_ids_to_delete or users_to_update:
+            schedule_refresh_on_users_change(organization.pk)
+
 
 class UserQuerySet(models.QuerySet):
     def filter(self, *args, **kwargs):
@@ -230,6 +234,9 @@ class User(models.Model):
     is_active = models.BooleanField(null=True, default=True)
     permissions = models.JSONField(null=False, default=list)
 
+    # fields used to resolve on-call users from schedules
+    SCHEDULE_USER_FIELDS = frozenset(("organization", "username", "email", "is_active", "role", "permissions"))
+
     def __str__(self):
         return f"{self.pk}: {self.username}"
 
@@ -442,10 +449,15 @@ class User(models.Model):
 
 # TODO: check whether this signal can be moved to save method of the model
 @receiver(post_save, sender=User)
-def listen_for_user_model_save(sender: User, instance: User, created: bool, *args, **kwargs) -> None:
+def listen_for_user_model_save(
+    sender: User, instance: User, created: bool, update_fields: typing.Optional[frozenset[str]] = None, **kwargs
+) -> None:
     if created:
         instance.notification_policies.create_default_policies_for_user(instance)
         instance.notification_policies.create_important_policies_for_user(instance)
     drop_cached_ical_for_custom_events_for_organization.apply_async(
         (instance.organization_id,),
     )
+    # schedules match users by username and e-mail, on-call users must have schedules permissions
+    if update_fields is None or not update_fields.isdisjoint(User.SCHEDULE_USER_FIELDS):
+        schedule_refresh_on_users_change(instance.organization_id)
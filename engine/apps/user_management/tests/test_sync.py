@@ -319,6 +319,30 @@ def test_sync_organization_is_rbac_permissions_enabled_cloud(mocked_gcom_client,
     assert organization.is_rbac_permissions_enabled == gcom_api_response
 
 
+@pytest.mark.django_db
+def test_sync_users_for_organization_refreshes_schedules(make_organization, make_user_for_organization):
+    organization = make_organization()
+    make_user_for_organization(organization, user_id=1, email="test@test.test", username="test")
+    api_user = {
+        "userId": 1,
+        "email": "test@test.test",
+        "name": "Test",
+        "login": "test",
+        "role": "admin",
+        "avatarUrl": "/test/1234",
+        "permissions": [],
+    }
+
+    with patch("apps.user_management.models.user.schedule_refresh_on_users_change") as mock_refresh:
+        User.objects.sync_for_organization(organization, api_users=[api_user])
+        User.objects.sync_for_organization(organization, api_users=[api_user])
+    mock_refresh.assert_called_once_with(organization.pk)
+
+    with patch("apps.user_management.models.user.schedule_refresh_on_users_change") as mock_refresh:
+        User.objects.sync_for_organization(organization, api_users=[api_user | {"login": "renamed"}])
+    mock_refresh.assert_called_once_with(organization.pk)
+
+
 @pytest.mark.django_db
 def test_duplicate_user_ids(make_organization, make_user_for_organization):
     organization = make_organization()
@@ -19,19 +19,21 @@ if [ -z "$CELERY_WORKER_CONCURRENCY" ]; then
   exit 1
 fi
 
-if [ -z "$CELERY_WORKER_MAX_TASKS_PER_CHILD" ]; then
-  echo "CELERY_WORKER_MAX_TASKS_PER_CHILD is not set"
-  exit 1
-fi
-
 CELERY_ARGS=(
   "--quiet"  # --quite parameter removes pointless banner when celery starts
   "-A" "engine"
   "worker"
   "--concurrency=$CELERY_WORKER_CONCURRENCY"
-  "--max-tasks-per-child=$CELERY_WORKER_MAX_TASKS_PER_CHILD"
   "-Q" "$CELERY_WORKER_QUEUE"
 )
+# Worker processes are recycled according to CELERY_WORKER_MAX_TASKS_PER_CHILD and CELERY_WORKER_MAX_MEMORY_PER_CHILD
+# settings, command line arguments take precedence over them
+if [ -n "$CELERY_WORKER_MAX_TASKS_PER_CHILD" ]; then
+  CELERY_ARGS+=("--max-tasks-per-child=$CELERY_WORKER_MAX_TASKS_PER_CHILD")
+fi
+if [ -n "$CELERY_WORKER_MAX_MEMORY_PER_CHILD" ]; then
+  CELERY_ARGS+=("--max-memory-per-child=$CELERY_WORKER_MAX_MEMORY_PER_CHILD")
+fi
 if [[ $CELERY_WORKER_BEAT_ENABLED = True ]]; then
   CELERY_ARGS+=("--beat")
 fi
@@ -83,3 +83,34 @@ class FifteenPageSizePaginator(PathPrefixedPagePagination):
 class TwentyFiveCursorPaginator(PathPrefixedCursorPagination):
     page_size = 25
     ordering = "-pk"
+
+
+class FiftyPageSizeCursorPaginator(PathPrefixedCursorPagination):
+    page_size = 50
+    ordering = "-pk"
+
+
+class PathPrefixedPageOrCursorPagination(BasePagination):
+    """
+    Page number pagination by default, keyset pagination when the cursor query param is given (`?cursor=` for the
+    first page). Keyset pagination doesn't count all the results and doesn't scan the rows of the previous pages,
+    so it is the way to walk through big result sets.
+    """
+
+    page_pagination_class: typing.Type[PathPrefixedPagePagination]
+    cursor_pagination_class: typing.Type[PathPrefixedCursorPagination]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_pagination_class.cursor_query_param in request.query_params:
+            self.paginator = self.cursor_pagination_class()
+        else:
+            self.paginator = self.page_pagination_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data: PaginatedData) -> Response:
+        return self.paginator.get_paginated_response(data)
+
+
+class FiftyPageSizeOrCursorPaginator(PathPrefixedPageOrCursorPagination):
+    page_pagination_class = FiftyPageSizePaginator
+    cursor_pagination_class = FiftyPageSizeCursorPaginator
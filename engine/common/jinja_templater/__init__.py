@@ -1,2 +1,2 @@
 from .apply_jinja_template import apply_jinja_template  # noqa: F401
-from .jinja_template_env import jinja_template_env  # noqa: F401
+from .jinja_template_env import compiled_template_cache, jinja_template_env  # noqa: F401
@@ -0,0 +1,67 @@
+import hashlib
+import threading
+import typing
+from collections import OrderedDict
+
+from jinja2 import Environment
+
+
+class CompiledTemplateCache:
+    """
+    Bounded LRU of compiled jinja2 templates keyed by the hash of the template source.
+    Environment.from_string bypasses jinja2's own loader cache, so without it every alert recompiles
+    the same title/grouping/resolve/route templates from source.
+    Keys are content hashes, so an edited template never gets a stale compiled version, the old one just ages out.
+    """
+
+    def __init__(self, environment: Environment, maxsize: int) -> None:
+        self.environment = environment
+        self.maxsize = maxsize
+        self._templates: OrderedDict[str, typing.Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(source: str) -> str:
+        return hashlib.sha1(source.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+    def get_template(self, source: str) -> typing.Any:
+        """Return the compiled template, an instance of the environment's template_class"""
+        if self.maxsize <= 0:
+            return self.environment.from_string(source)
+
+        key = self.make_key(source)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        # compile outside of the lock, compilation errors are propagated and never cached
+        template = self.environment.from_string(source)
+
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.maxsize:
+                self._templates.popitem(last=False)
+                self.evictions += 1
+        return template
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._templates),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.utils import timezone
 from jinja2 import BaseLoader
 from jinja2.exceptions import SecurityError
 from jinja2.sandbox import SandboxedEnvironment
 
+from .compiled_template_cache import CompiledTemplateCache
 from .filters import (
     datetimeformat,
     iso8601_to_time,
@@ -29,3 +31,7 @@ jinja_template_env.filters["regex_replace"] = regex_replace
 jinja_template_env.filters["regex_match"] = regex_match
 jinja_template_env.filters["regex_search"] = regex_search
 jinja_template_env.filters["json_dumps"] = json_dumps
+
+compiled_template_cache = CompiledTemplateCache(
+    jinja_template_env, maxsize=settings.JINJA_COMPILED_TEMPLATES_CACHE_SIZE
+)
@@ -2,9 +2,11 @@ import json
 
 import pytest
 from django.conf import settings
+from jinja2 import TemplateSyntaxError
 
-from common.jinja_templater import apply_jinja_template
+from common.jinja_templater import apply_jinja_template, compiled_template_cache, jinja_template_env
 from common.jinja_templater.apply_jinja_template import JinjaTemplateError, JinjaTemplateWarning
+from common.jinja_templater.compiled_template_cache import CompiledTemplateCache
 
 
 def test_apply_jinja_template():
@@ -96,3 +98,44 @@ def test_apply_jinja_template_result_truncate():
     result = apply_jinja_template("{{ payload.value }}", payload)
     # Length == Limit + 2 to account for '..' appended to end
     assert len(result) == settings.JINJA_RESULT_MAX_LENGTH + 2
+
+
+def test_compiled_template_cache_reuses_templates():
+    cache = CompiledTemplateCache(jinja_template_env, maxsize=2)
+
+    first = cache.get_template("{{ payload.a }}")
+    assert cache.get_template("{{ payload.a }}") is first
+    assert cache.stats == {"size": 1, "maxsize": 2, "hits": 1, "misses": 1, "evictions": 0}
+
+    cache.get_template("{{ payload.b }}")
+    cache.get_template("{{ payload.a }}")  # "a" is now the most recently used one
+    cache.get_template("{{ payload.c }}")  # evicts "b"
+    assert cache.stats == {"size": 2, "maxsize": 2, "hits": 2, "misses": 3, "evictions": 1}
+    assert cache.get_template("{{ payload.a }}") is first
+
+    cache.clear()
+    assert cache.get_template("{{ payload.a }}") is not first
+
+
+def test_compiled_template_cache_does_not_cache_errors():
+    cache = CompiledTemplateCache(jinja_template_env, maxsize=2)
+    with pytest.raises(TemplateSyntaxError):
+        cache.get_template("{{%")
+    assert cache.stats["size"] == 0
+
+
+@pytest.mark.django_db
+def test_compiled_template_cache_cleared_on_templates_save(make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization, grouping_id_template="{{ payload.a }}")
+
+    apply_jinja_template(alert_receive_channel.grouping_id_template, payload={"a": 1})
+    assert compiled_template_cache.stats["size"] > 0
+
+    alert_receive_channel.grouping_id_template = "{{ payload.b }}"
+    alert_receive_channel.save(update_fields=["grouping_id_template"])
+    assert compiled_template_cache.stats["size"] == 0
+
+    apply_jinja_template(alert_receive_channel.grouping_id_template, payload={"b": 1})
+    alert_receive_channel.save(update_fields=["verbal_name"])
+    assert compiled_template_cache.stats["size"] > 0
@@ -8,6 +8,7 @@ from importlib import import_module, reload
 
 import pytest
 from celery import Task
+from django.core.cache import cache
 from django.db.models.signals import post_save
 from django.urls import clear_url_caches
 from django.utils import timezone
@@ -131,6 +132,12 @@ register(LiveSettingFactory)
 IS_RBAC_ENABLED = os.getenv("ONCALL_TESTING_RBAC_ENABLED", "True") == "True"
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # cached values are keyed by object IDs, which are reused across tests
+    cache.clear()
+
+
 @pytest.fixture(autouse=True)
 def mock_slack_api_call(monkeypatch):
     def mock_api_call(*args, **kwargs):
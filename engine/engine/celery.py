@@ -1,11 +1,13 @@
 import logging
 import os
 import time
+import typing
+from collections import defaultdict
 
 import celery
 from celery import Celery
 from celery.app.log import TaskFormatter
-from celery.utils.debug import memdump, sample_mem
+from celery.utils.debug import memdump, ps, sample_mem
 from celery.utils.log import get_task_logger
 from django.conf import settings
 from opentelemetry import trace
@@ -72,18 +74,57 @@ if settings.OTEL_TRACING_ENABLED and settings.OTEL_EXPORTER_OTLP_ENDPOINT:
         CeleryInstrumentor().instrument()
 
 
+class TaskMemoryLeakDetector:
+    """
+    Tracks resident memory of a worker process around tasks.
+    Worker processes are reused between tasks, so a task that keeps references to the data it loaded grows the process
+    until it's recycled by CELERY_WORKER_MAX_MEMORY_PER_CHILD. Such tasks are logged with the total growth they caused.
+    """
+
+    def __init__(self, threshold_kb: int) -> None:
+        self.threshold_kb = threshold_kb
+        self._rss_before_task: typing.Dict[str, int] = {}
+        self.rss_growth_by_task_name: typing.Dict[str, int] = defaultdict(int)
+
+    @staticmethod
+    def get_rss_kb() -> int:
+        process = ps()
+        return process.memory_info().rss // 1024 if process is not None else 0
+
+    def task_started(self, task_id: str) -> None:
+        self._rss_before_task[task_id] = self.get_rss_kb()
+
+    def task_finished(self, task_id: str, task_name: str) -> int:
+        """Returns process memory growth caused by the task in kilobytes."""
+        rss_before = self._rss_before_task.pop(task_id, None)
+        if rss_before is None:
+            return 0
+        rss_growth = self.get_rss_kb() - rss_before
+        if rss_growth > 0:
+            self.rss_growth_by_task_name[task_name] += rss_growth
+            if rss_growth >= self.threshold_kb:
+                logger.warning(
+                    f"possible memory leak: {task_id} of {task_name} grew worker process memory by {rss_growth}KB, "
+                    f"{self.rss_growth_by_task_name[task_name]}KB by all runs of the task in the process"
+                )
+        return rss_growth
+
+
 if settings.DEBUG_CELERY_TASKS_PROFILING:
+    task_memory_leak_detector = TaskMemoryLeakDetector(threshold_kb=settings.DEBUG_CELERY_TASKS_MEMORY_LEAK_THRESHOLD)
 
     @celery.signals.task_prerun.connect
     def start_task_timer(task_id=None, task=None, *a, **kw):
         logger.info("started: {} of {} with cpu={} at {}".format(task_id, task.name, time.perf_counter(), time.time()))
         sample_mem()
+        task_memory_leak_detector.task_started(task_id)
 
     @celery.signals.task_postrun.connect
     def finish_task_timer(task_id=None, task=None, *a, **kw):
         logger.info("ended: {} of {} with cpu={} at {}".format(task_id, task.name, time.perf_counter(), time.time()))
         sample_mem()
         memdump()
+        task_memory_leak_detector.task_finished(task_id, task.name)
 
 
 if settings.PYROSCOPE_PROFILER_ENABLED:
@@ -65,14 +65,14 @@ class BanAlertConsumptionBasedOnSettingsMiddleware(MiddlewareMixin):
         try:
             from apps.base.models import DynamicSetting
 
-            banned_paths = DynamicSetting.objects.get_or_create(
+            banned_paths = DynamicSetting.objects.get_cached(
                 name="ban_hammer_list",
                 defaults={
                     "json_value": [
                         "full_path_here",
                     ]
                 },
-            )[0]
+            )
             result = any(p for p in banned_paths.json_value if path.startswith(p))
             return result
         except OperationalError:
@@ -0,0 +1,26 @@
+from unittest.mock import patch
+
+from engine.celery import TaskMemoryLeakDetector
+
+
+def test_task_memory_leak_detector():
+    detector = TaskMemoryLeakDetector(threshold_kb=100)
+
+    with patch.object(TaskMemoryLeakDetector, "get_rss_kb", side_effect=[1000, 1050, 1050, 1200, 1200, 1100]):
+        with patch("engine.celery.logger.warning") as mock_warning:
+            detector.task_started("task-1")
+            assert detector.task_finished("task-1", "some_task") == 50
+            assert not mock_warning.called
+
+            detector.task_started("task-2")
+            assert detector.task_finished("task-2", "some_task") == 150
+            assert mock_warning.call_count == 1
+
+            # memory released by the task is not counted
+            detector.task_started("task-3")
+            assert detector.task_finished("task-3", "other_task") == -100
+            assert mock_warning.call_count == 1
+
+    assert detector.rss_growth_by_task_name == {"some_task": 200}
+    # task that wasn't started in this process
+    assert detector.task_finished("task-4", "some_task") == 0
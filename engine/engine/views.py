@@ -3,7 +3,8 @@ from django.core.cache import cache
 from django.http import HttpResponse, JsonResponse
 from django.views.generic import View
 
-from apps.integrations.mixins import AlertChannelDefiningMixin
+from apps.integrations.alert_receive_channel_resolver import alert_receive_channel_resolver
+from apps.integrations.tasks import populate_integration_tokens_db_fallback
 
 
 class HealthCheckView(View):
@@ -37,14 +38,14 @@ class StartupProbeView(View):
     This view is used in k8s startup probe.
     k8s makes requests to this view on the startup and
     if the requests fail the container will be restarted
-    Caching AlertReceive channels if they are not cached. Also checking initial database connection.
+    Caching AlertReceive channels for DB outages in a background task if they are not cached.
     """
 
     dangerously_bypass_middlewares = True
 
     def get(self, request):
-        if cache.get(AlertChannelDefiningMixin.CACHE_KEY_DB_FALLBACK) is None:
-            AlertChannelDefiningMixin().update_alert_receive_channel_cache()
+        if not alert_receive_channel_resolver.is_db_fallback_populated():
+            populate_integration_tokens_db_fallback.delay()
 
         cache.set("healthcheck", "healthcheck", 30)  # Checking cache connectivity
         assert cache.get("healthcheck") == "healthcheck"
@@ -45,6 +45,8 @@ MIRAGE_CIPHER_MODE = "CBC"
 DEBUG = False
 
 DEBUG_CELERY_TASKS_PROFILING = getenv_boolean("DEBUG_CELERY_TASKS_PROFILING", False)
+# Log tasks which leave the worker process this much bigger (in kilobytes), when DEBUG_CELERY_TASKS_PROFILING is on
+DEBUG_CELERY_TASKS_MEMORY_LEAK_THRESHOLD = getenv_integer("DEBUG_CELERY_TASKS_MEMORY_LEAK_THRESHOLD", 10 * 1024)
 
 OTEL_TRACING_ENABLED = getenv_boolean("OTEL_TRACING_ENABLED", False)
 OTEL_EXPORTER_OTLP_ENDPOINT = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT")
@@ -66,8 +68,26 @@ FEATURE_MULTIREGION_ENABLED = getenv_boolean("FEATURE_MULTIREGION_ENABLED", defa
 FEATURE_INBOUND_EMAIL_ENABLED = getenv_boolean("FEATURE_INBOUND_EMAIL_ENABLED", default=True)
 FEATURE_PROMETHEUS_EXPORTER_ENABLED = getenv_boolean("FEATURE_PROMETHEUS_EXPORTER_ENABLED", default=False)
 FEATURE_GRAFANA_ALERTING_V2_ENABLED = getenv_boolean("FEATURE_GRAFANA_ALERTING_V2_ENABLED", default=False)
+FEATURE_ALERTMANAGER_BATCH_INGESTION_ENABLED = getenv_boolean(
+    "FEATURE_ALERTMANAGER_BATCH_INGESTION_ENABLED", default=False
+)
+# Index the words of alert payload values on alert creation and search public API alerts through that index
+FEATURE_ALERT_SEARCH_TOKENS_ENABLED = getenv_boolean("FEATURE_ALERT_SEARCH_TOKENS_ENABLED", default=False)
 GRAFANA_CLOUD_ONCALL_HEARTBEAT_ENABLED = getenv_boolean("GRAFANA_CLOUD_ONCALL_HEARTBEAT_ENABLED", default=True)
 GRAFANA_CLOUD_NOTIFICATIONS_ENABLED = getenv_boolean("GRAFANA_CLOUD_NOTIFICATIONS_ENABLED", default=True)
+# Record integration heartbeats in the cache and save them to the DB in bulk, instead of a celery task per heartbeat
+HEARTBEAT_COALESCING_ENABLED = getenv_boolean("HEARTBEAT_COALESCING_ENABLED", default=False)
+HEARTBEAT_FLUSH_INTERVAL = getenv_integer("HEARTBEAT_FLUSH_INTERVAL", 30)  # seconds
+# Schedule iCal files are refreshed every SCHEDULE_ICAL_REFRESH_MIN_INTERVAL after they change, the interval doubles
+# every time they are refreshed without changes, up to SCHEDULE_ICAL_REFRESH_MAX_INTERVAL
+SCHEDULE_ICAL_REFRESH_MIN_INTERVAL = getenv_integer("SCHEDULE_ICAL_REFRESH_MIN_INTERVAL", 10 * 60)  # seconds
+SCHEDULE_ICAL_REFRESH_MAX_INTERVAL = getenv_integer("SCHEDULE_ICAL_REFRESH_MAX_INTERVAL", 60 * 60)  # seconds
+# Alert group stats are cached until alert groups of the organization change state, counts by state are kept up to
+# date incrementally and recalculated once in ALERT_GROUP_STATE_COUNTERS_CACHE_TIMEOUT
+ALERT_GROUP_STATS_CACHE_TIMEOUT = getenv_integer("ALERT_GROUP_STATS_CACHE_TIMEOUT", 60)  # seconds
+ALERT_GROUP_STATE_COUNTERS_CACHE_TIMEOUT = getenv_integer(
+    "ALERT_GROUP_STATE_COUNTERS_CACHE_TIMEOUT", 60 * 60
+)  # seconds
 
 TWILIO_API_KEY_SID = os.environ.get("TWILIO_API_KEY_SID")
 TWILIO_API_KEY_SECRET = os.environ.get("TWILIO_API_KEY_SECRET")
@@ -137,6 +157,9 @@ assert DATABASE_TYPE in {DatabaseTypes.MYSQL, DatabaseTypes.POSTGRESQL, Database
 
 DATABASE_ENGINE = f"django.db.backends.{DATABASE_TYPE}"
 
+# Keep database connections open between requests/tasks, in seconds. 0 closes the connection after each of them.
+DATABASE_CONN_MAX_AGE = getenv_integer("DATABASE_CONN_MAX_AGE", 0)
+
 DatabaseConfig = typing.Dict[str, typing.Dict[str, typing.Any]]
 
 DATABASE_CONFIGS: DatabaseConfig = {
@@ -151,6 +174,7 @@ DATABASE_CONFIGS: DatabaseConfig = {
         "PASSWORD": DATABASE_PASSWORD,
         "HOST": DATABASE_HOST,
         "PORT": DATABASE_PORT,
+        "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
         "OPTIONS": DATABASE_OPTIONS
         | {
             "charset": "utf8mb4",
@@ -164,6 +188,7 @@ DATABASE_CONFIGS: DatabaseConfig = {
         "PASSWORD": DATABASE_PASSWORD,
         "HOST": DATABASE_HOST,
         "PORT": DATABASE_PORT,
+        "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
         "OPTIONS": DATABASE_OPTIONS,
     },
 }
@@ -470,7 +495,11 @@ CELERY_ACKS_LATE = True
 CELERY_TASK_ACKS_LATE = True
 
 CELERY_WORKER_CONCURRENCY = 1
-CELERY_MAX_TASKS_PER_CHILD = 1
+# Worker processes are reused between tasks, so in-process caches and database connections survive across tasks.
+# A process is replaced after CELERY_WORKER_MAX_TASKS_PER_CHILD tasks
+# or when its resident memory exceeds CELERY_WORKER_MAX_MEMORY_PER_CHILD kilobytes.
+CELERY_WORKER_MAX_TASKS_PER_CHILD = getenv_integer("CELERY_WORKER_MAX_TASKS_PER_CHILD", 100)
+CELERY_WORKER_MAX_MEMORY_PER_CHILD = getenv_integer("CELERY_WORKER_MAX_MEMORY_PER_CHILD", 500 * 1024)
 
 CELERY_WORKER_SEND_TASK_EVENTS = True
 CELERY_TASK_SEND_SENT_EVENT = True
@@ -490,7 +519,7 @@ CELERY_BEAT_SCHEDULE = {
     },
     "start_refresh_ical_files": {
         "task": "apps.schedules.tasks.refresh_ical_files.start_refresh_ical_files",
-        "schedule": 10 * 60,
+        "schedule": SCHEDULE_ICAL_REFRESH_MIN_INTERVAL,
         "args": (),
     },
     "start_notify_about_gaps_in_schedule": {
@@ -562,7 +591,8 @@ CELERY_BEAT_SCHEDULE = {
     },
     "check_heartbeats": {
         "task": "apps.heartbeat.tasks.check_heartbeats",
-        "schedule": crontab(minute="*/2"),  # every 2 minutes
+        # only due heartbeats are selected by an index, so it's cheap to run often
+        "schedule": getenv_integer("HEARTBEAT_CHECK_INTERVAL", 10),  # seconds
         "args": (),
     },
 }
@@ -578,6 +608,13 @@ if ESCALATION_AUDITOR_ENABLED:
         "args": (),
     }
 
+if HEARTBEAT_COALESCING_ENABLED:
+    CELERY_BEAT_SCHEDULE["flush_heartbeats"] = {
+        "task": "apps.heartbeat.tasks.flush_heartbeats_task",
+        "schedule": HEARTBEAT_FLUSH_INTERVAL,
+        "args": (),
+    }
+
 INTERNAL_IPS = ["127.0.0.1"]
 
 SELF_IP = os.environ.get("SELF_IP")
@@ -721,6 +758,16 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = getenv_integer("DATA_UPLOAD_MAX_MEMORY_SIZE", 1_04
 JINJA_TEMPLATE_MAX_LENGTH = 50000
 JINJA_RESULT_TITLE_MAX_LENGTH = 500
 JINJA_RESULT_MAX_LENGTH = 50000
+# Max number of compiled templates kept in memory per process, 0 disables the cache
+JINJA_COMPILED_TEMPLATES_CACHE_SIZE = getenv_integer("JINJA_COMPILED_TEMPLATES_CACHE_SIZE", 1000)
+# Max number of integrations with routes kept in memory per process, 0 disables the cache
+ROUTING_TABLES_CACHE_SIZE = getenv_integer("ROUTING_TABLES_CACHE_SIZE", 1000)
+# Max number of integration tokens resolved to integrations kept in memory per process, 0 disables the cache
+INTEGRATION_TOKENS_CACHE_SIZE = getenv_integer("INTEGRATION_TOKENS_CACHE_SIZE", 1000)
+# Max total size in bytes of parsed iCal calendars kept in memory per process, 0 disables the cache
+PARSED_ICAL_CACHE_MAX_BYTES = getenv_integer("PARSED_ICAL_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+# Parsed iCal calendars bigger than this are not stored in the shared cache
+PARSED_ICAL_SHARED_CACHE_MAX_ITEM_BYTES = getenv_integer("PARSED_ICAL_SHARED_CACHE_MAX_ITEM_BYTES", 8 * 1024 * 1024)
 
 # Log inbound/outbound calls as slow=1 if they exceed threshold
 SLOW_THRESHOLD_SECONDS = 2.0
@@ -26,6 +26,7 @@ CELERY_TASK_ROUTES = {
     "apps.schedules.tasks.refresh_ical_files.start_refresh_ical_files": {"queue": "default"},
     "apps.schedules.tasks.refresh_ical_files.refresh_ical_final_schedule": {"queue": "default"},
     "apps.schedules.tasks.refresh_ical_files.start_refresh_ical_final_schedules": {"queue": "default"},
+    "apps.schedules.tasks.refresh_schedules_on_users_change.refresh_schedules_on_users_change": {"queue": "default"},
     "apps.schedules.tasks.notify_about_gaps_in_schedule.check_empty_shifts_in_schedule": {"queue": "default"},
     "apps.schedules.tasks.notify_about_gaps_in_schedule.start_notify_about_gaps_in_schedule": {"queue": "default"},
     "apps.schedules.tasks.notify_about_gaps_in_schedule.check_gaps_in_schedule": {"queue": "default"},
@@ -72,6 +73,7 @@ CELERY_TASK_ROUTES = {
     "apps.schedules.tasks.notify_about_gaps_in_schedule.notify_about_gaps_in_schedule": {"queue": "default"},
     "celery.backend_cleanup": {"queue": "default"},
     "apps.heartbeat.tasks.check_heartbeats": {"queue": "default"},
+    "apps.heartbeat.tasks.flush_heartbeats_task": {"queue": "default"},
     "apps.oss_installation.tasks.send_cloud_heartbeat_task": {"queue": "default"},
     "apps.oss_installation.tasks.send_usage_stats_report": {"queue": "default"},
     "apps.oss_installation.tasks.sync_users_with_cloud": {"queue": "default"},
@@ -102,6 +104,7 @@ CELERY_TASK_ROUTES = {
     "apps.email.tasks.notify_user_async": {"queue": "critical"},
     "apps.integrations.tasks.create_alert": {"queue": "critical"},
     "apps.integrations.tasks.create_alertmanager_alerts": {"queue": "critical"},
+    "apps.integrations.tasks.create_alertmanager_alerts_batch": {"queue": "critical"},
     "apps.integrations.tasks.start_notify_about_integration_ratelimit": {"queue": "critical"},
     "apps.mobile_app.tasks.new_alert_group.notify_user_about_new_alert_group": {"queue": "critical"},
     "apps.mobile_app.tasks.going_oncall_notification.conditionally_send_going_oncall_push_notifications_for_schedule": {
@@ -115,8 +118,11 @@ CELERY_TASK_ROUTES = {
     # GRAFANA
     "apps.grafana_plugin.tasks.sync.plugin_sync_organization_async": {"queue": "grafana"},
     # LONG
+    "apps.alerts.tasks.alert_group_alerts_info.backfill_alert_group_alerts_info": {"queue": "long"},
     "apps.alerts.tasks.alert_group_web_title_cache.update_web_title_cache_for_alert_receive_channel": {"queue": "long"},
     "apps.alerts.tasks.alert_group_web_title_cache.update_web_title_cache": {"queue": "long"},
+    "apps.alerts.tasks.alert_search_tokens.backfill_alert_group_search_tokens": {"queue": "long"},
+    "apps.alerts.tasks.alert_search_tokens.backfill_alert_search_tokens": {"queue": "long"},
     "apps.alerts.tasks.check_escalation_finished.check_escalation_finished_task": {"queue": "long"},
     "apps.grafana_plugin.tasks.sync.cleanup_organization_async": {"queue": "long"},
     "apps.grafana_plugin.tasks.sync.start_cleanup_deleted_organizations": {"queue": "long"},
@@ -124,6 +130,7 @@ CELERY_TASK_ROUTES = {
     "apps.grafana_plugin.tasks.sync.sync_organization_async": {"queue": "long"},
     "apps.grafana_plugin.tasks.sync.sync_team_members_for_organization_async": {"queue": "long"},
     "apps.grafana_plugin.tasks.sync.start_sync_regions": {"queue": "long"},
+    "apps.integrations.tasks.populate_integration_tokens_db_fallback": {"queue": "long"},
     "apps.metrics_exporter.tasks.calculate_and_cache_metrics": {"queue": "long"},
     "apps.metrics_exporter.tasks.calculate_and_cache_user_was_notified_metric": {"queue": "long"},
     # SLACK